@@ -1,17 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from datetime import datetime
 from app.database.connection import get_db
 from app.database.models import User
 from app.api.jwt_auth import (
-    create_tokens_for_user,
     create_access_token_for_user,
+    create_anonymous_refresh_token,
+    verify_anonymous_refresh_token,
     get_current_user_optional,
     get_current_user_required
 )
-from app.api.jwt_auth import REFRESH_TOKEN_EXPIRE_DAYS
-from datetime import timedelta
+from app.api.refresh_tokens import RefreshTokenService
+from app.profile.services import UserService
 from typing import Optional
 
 
@@ -40,36 +40,31 @@ async def create_anonymous_token(
     request: RefreshTokenRequest,
     db: Session = Depends(get_db)
 ):
-    """익명 사용자용 JWT 토큰 발급"""
-    user = db.query(User).filter(
-        User.refresh_token == request.refresh_token,
-        User.refresh_token_expires_at > datetime.utcnow()
-    ).first()
-
-    if not user:
-        user = User(
-            is_anonymous=True,
-            is_active=True
-        )
-        tokens = create_tokens_for_user(user.id, is_anonymous=True)
-        user.refresh_token = tokens["refresh_token"]
-        user.refresh_token_expires_at = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-        db.add(user)
-        db.commit()
-        db.refresh(user)
+    """익명 사용자용 JWT 토큰 발급
+
+    익명 사용자는 서명된 stateless 토큰만 받고, users 행은 첫 쓰기(채팅, 스토리 매칭) 때
+    생성된다 (UserService.ensure_user). 이전에 발급된 익명 사용자의 DB 리프레시 토큰은
+    한 번만 stateless 토큰으로 교환되고 폐기된다. 그 외의 토큰이면 새 익명 id를 받는다.
+    """
+    user_id = verify_anonymous_refresh_token(request.refresh_token)
+    if user_id is not None:
+        UserService(db).touch_anonymous_user(user_id)
     else:
-        tokens = create_tokens_for_user(user.id, is_anonymous=True)
-        user.refresh_token = tokens["refresh_token"]
-        user.refresh_token_expires_at = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-        db.commit()
-        db.refresh(user)
+        user_id = RefreshTokenService(db).exchange_anonymous(request.refresh_token)
+    if user_id is None:
+        user_id = UserService(db).reserve_anonymous_user_id()
+
+    tokens = {
+        "access_token": create_access_token_for_user(user_id, is_anonymous=True),
+        "refresh_token": create_anonymous_refresh_token(user_id)
+    }
 
     return TokenResponse(
         access_token=tokens["access_token"],
         refresh_token=tokens["refresh_token"],
         token_type="bearer",
         user_type="anonymous",
-        user_id=user.id
+        user_id=user_id
     )
 
 
@@ -117,31 +112,36 @@ async def refresh_access_token(
     request: RefreshTokenRequest,
     db: Session = Depends(get_db)
 ):
-    """refresh_token으로 새로운 access_token 발급"""
-    user = db.query(User).filter(
-        User.refresh_token == request.refresh_token,
-        User.refresh_token_expires_at > datetime.utcnow()
-    ).first()
+    """refresh_token으로 새로운 access_token 발급 (refresh_token도 새로 교체)"""
+    anonymous_user_id = verify_anonymous_refresh_token(request.refresh_token)
+    if anonymous_user_id is not None:
+        UserService(db).touch_anonymous_user(anonymous_user_id)
+        return TokenResponse(
+            access_token=create_access_token_for_user(anonymous_user_id, is_anonymous=True),
+            refresh_token=create_anonymous_refresh_token(anonymous_user_id),
+            token_type="bearer",
+            user_type="anonymous",
+            user_id=anonymous_user_id
+        )
+
+    rotated = RefreshTokenService(db).rotate(request.refresh_token)
     
-    if not user:
+    if not rotated:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired refresh token"
         )
     
     # 새로운 토큰 생성
-    access_token = create_access_token_for_user(user.id)
-
-    user.refresh_token_expires_at = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    db.commit()
-    db.refresh(user)
+    user_id, refresh_token = rotated
+    access_token = create_access_token_for_user(user_id)
     
     return TokenResponse(
         access_token=access_token,
-        refresh_token=user.refresh_token,
+        refresh_token=refresh_token,
         token_type="bearer",
         user_type="authenticated",
-        user_id=user.id
+        user_id=user_id
     )
 
 
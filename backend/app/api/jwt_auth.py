@@ -1,13 +1,15 @@
 from datetime import datetime, timedelta
 from typing import Optional
+import hashlib
 import os
 import secrets
+import time
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.database.connection import get_db
-from app.database.models import User
+from app.config import settings
+from app.cache.lru import TTLLRUCache
+from app.tracing.middleware import request_span
 
 # JWT 설정 - 환경변수에서 가져오기
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
@@ -15,9 +17,16 @@ ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
 
+# 액세스 토큰으로 인정하는 type (익명 리프레시 토큰은 제외)
+ACCESS_TOKEN_TYPES = ("authenticated", "anonymous")
+ANONYMOUS_REFRESH_TOKEN_TYPE = "anonymous_refresh"
+
 # HTTP Bearer 토큰 스키마 (optional=True로 설정하여 토큰이 없어도 허용)
 security = HTTPBearer(auto_error=False)
 
+# 검증된 토큰 캐시 (토큰 해시 -> 페이로드). 프로세스마다 토큰당 한 번만 서명을 검증
+verified_token_cache = TTLLRUCache(settings.verified_token_cache_size, settings.verified_token_cache_ttl_seconds)
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """JWT 액세스 토큰 생성"""
@@ -35,6 +44,23 @@ def create_refresh_token() -> str:
     """리프레시 토큰 생성 (랜덤 문자열)"""
     return secrets.token_urlsafe(32)
 
+def create_anonymous_refresh_token(user_id: int) -> str:
+    """익명 사용자용 서명된 stateless 리프레시 토큰 (DB에 저장하지 않음)"""
+    return create_access_token(
+        data={"sub": str(user_id), "type": ANONYMOUS_REFRESH_TOKEN_TYPE},
+        expires_delta=timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    )
+
+def verify_anonymous_refresh_token(token: str) -> Optional[int]:
+    """익명 리프레시 토큰 검증 후 user_id 반환 (DB 조회 없음)"""
+    payload = verify_token(token)
+    if not payload or payload.get("type") != ANONYMOUS_REFRESH_TOKEN_TYPE:
+        return None
+    try:
+        return int(payload.get("sub"))
+    except (TypeError, ValueError):
+        return None
+
 def verify_token(token: str) -> Optional[dict]:
     """JWT 토큰 검증 및 페이로드 반환"""
     try:
@@ -62,17 +88,51 @@ def create_tokens_for_user(user_id: int, is_anonymous: bool = False) -> dict:
         "refresh_token": refresh_token
     }
 
+def verify_token_cached(token: str) -> Optional[dict]:
+    """verify_token 결과를 토큰 해시 기준으로 캐시 (exp 이후에는 재사용하지 않음)"""
+    key = hashlib.sha256(token.encode()).digest()
+    payload = verified_token_cache.get(key)
+    if payload is not None:
+        if payload.get("exp", 0) > time.time():
+            return payload
+        return None
+
+    payload = verify_token(token)
+    if payload and isinstance(payload.get("exp"), (int, float)):
+        remaining = payload["exp"] - time.time()
+        if remaining > 0:
+            verified_token_cache.set(key, payload, ttl=min(remaining, settings.verified_token_cache_ttl_seconds))
+    return payload
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def _user_id_from_payload(payload: dict) -> int:
+    if payload.get("type") not in ACCESS_TOKEN_TYPES:
+        raise _unauthorized("Invalid token type")
+    try:
+        user_id = int(payload.get("sub"))
+    except (TypeError, ValueError):
+        raise _unauthorized("Invalid user token")
+    # 사용자 문의를 트레이스로 찾을 수 있도록 요청 span에 사용자 기록
+    span = request_span()
+    span.set_attribute("enduser.id", user_id)
+    span.set_attribute("enduser.anonymous", payload.get("type") == "anonymous")
+    return user_id
+
 async def get_current_user_optional(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db)
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
 ) -> Optional[int]:
     """현재 사용자 반환 (토큰이 없거나 유효하지 않으면 None 반환)"""
     if not credentials:
         return None
     
-    token = credentials.credentials
-    payload = verify_token(token)
-    if not payload:
+    payload = verify_token_cached(credentials.credentials)
+    if not payload or payload.get("type") not in ACCESS_TOKEN_TYPES:
         return None
     
     # 인증된 사용자 토큰인 경우
@@ -83,79 +143,31 @@ async def get_current_user_optional(
     return user_id
 
 async def get_current_user_or_anonymous(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db)
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
 ) -> int:
-    """현재 사용자 또는 익명 사용자 정보 반환"""
-    print(f"Credentials: {credentials}")
+    """현재 사용자 또는 익명 사용자 정보 반환 (DB 조회 없음)"""
     if not credentials:
-        # 토큰이 없으면 익명 사용자로 처리
-        raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, 
-                detail="Authentication required",
-                headers={"WWW-Authenticate": "Bearer"}
-             )
+        raise _unauthorized("Authentication required")
     
-    token = credentials.credentials
-    payload = verify_token(token)
-    print(f"Payload: {payload}")
+    payload = verify_token_cached(credentials.credentials)
     if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, 
-            detail="Invalid token",
-            headers={"WWW-Authenticate": "Bearer"}
-        )
-    
-    user_id = payload.get("sub")
-    try:
-        user_id = int(user_id)
-    except:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, 
-            detail="Invalid user token",
-            headers={"WWW-Authenticate": "Bearer"}
-        )
+        raise _unauthorized("Invalid token")
     
-    return user_id
+    return _user_id_from_payload(payload)
 
 async def get_current_user_required(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> int:
-    """인증이 필수인 엔드포인트용 - 유효한 사용자 토큰이 필요"""
+    """인증이 필수인 엔드포인트용 - 유효한 사용자 토큰이 필요 (DB 조회 없음)"""
     if not credentials:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Authentication required",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _unauthorized("Authentication required")
     
-    token = credentials.credentials
-    payload = verify_token(token)
+    payload = verify_token_cached(credentials.credentials)
     if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _unauthorized("Invalid token")
     
     # 익명 토큰은 허용하지 않음
     if payload.get("type") == "anonymous":
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User authentication required - login required",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _unauthorized("User authentication required - login required")
     
-    user_id = payload.get("sub")
-    try:
-        user_id = int(user_id)
-    except:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid user token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    return user_id
-    
\ No newline at end of file
+    return _user_id_from_payload(payload)
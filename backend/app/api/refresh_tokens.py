@@ -0,0 +1,137 @@
+"""
+리프레시 토큰 저장소
+
+토큰 원문은 저장하지 않고 sha256 해시만 unique 인덱스와 함께 저장하므로,
+모든 조회는 인덱스 포인트 조회다. 리프레시할 때마다 새 토큰으로 교체(rotation)하고,
+같은 로그인에서 이어진 토큰들은 family_id를 공유한다. 이미 교체된 토큰이 다시
+사용되면 탈취로 보고 해당 family 전체를 폐기한다. 단, 교체 직후
+refresh_token_reuse_grace_seconds 이내의 재사용은 여러 탭/동시 재시도로 보고
+같은 family의 새 토큰을 발급한다. 만료된 행은 retention 작업이
+배치로 삭제한다 (app/database/retention.py).
+"""
+from typing import Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import hashlib
+import logging
+import uuid
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database.models import RefreshToken, User
+from app.api.jwt_auth import create_refresh_token, REFRESH_TOKEN_EXPIRE_DAYS
+
+logger = logging.getLogger(__name__)
+
+
+def hash_refresh_token(token: str) -> str:
+    """리프레시 토큰의 sha256 (토큰이 256비트 난수이므로 salt 불필요)"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class RefreshTokenService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def issue(self, user_id: int, family_id: Optional[str] = None) -> str:
+        """새 리프레시 토큰 발급 후 원문 반환 (commit은 호출한 쪽에서)"""
+        token = create_refresh_token()
+        self.db.add(RefreshToken(
+            user_id=user_id,
+            token_hash=hash_refresh_token(token),
+            family_id=family_id or str(uuid.uuid4()),
+            expires_at=datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+        ))
+        self.db.flush()
+        return token
+
+    def get_active_user(self, token: str, include_anonymous: bool = True) -> Optional[User]:
+        """유효한(만료/폐기되지 않은) 토큰의 사용자 조회"""
+        query = (
+            self.db.query(User)
+            .join(RefreshToken, RefreshToken.user_id == User.id)
+            .filter(
+                RefreshToken.token_hash == hash_refresh_token(token),
+                RefreshToken.expires_at > datetime.now(timezone.utc),
+                RefreshToken.revoked_at.is_(None)
+            )
+        )
+        if not include_anonymous:
+            query = query.filter(User.is_anonymous == False)
+        return query.first()
+
+    def exchange_anonymous(self, token: str) -> Optional[int]:
+        """이전 방식의 익명 사용자 DB 토큰을 stateless 토큰으로 바꿀 때: family를 폐기하고 user_id 반환
+
+        익명 사용자의 유효한 토큰이 아니면 None (카카오 사용자 토큰은 /auth/refresh의 rotation으로만 갱신).
+        """
+        row = (
+            self.db.query(RefreshToken)
+            .join(User, User.id == RefreshToken.user_id)
+            .filter(
+                RefreshToken.token_hash == hash_refresh_token(token),
+                RefreshToken.expires_at > datetime.now(timezone.utc),
+                RefreshToken.revoked_at.is_(None),
+                User.is_anonymous == True
+            )
+            .with_for_update(of=RefreshToken)
+            .first()
+        )
+        if row is None:
+            return None
+        self.revoke_family(row.family_id)
+        return row.user_id
+
+    def rotate(self, token: str) -> Optional[Tuple[int, str]]:
+        """토큰을 폐기하고 같은 family의 새 토큰 발급 -> (user_id, 새 토큰)
+
+        만료되었거나 없는 토큰이면 None. 이미 교체된 토큰의 재사용이면 family 전체를 폐기하고 None.
+        """
+        now = datetime.now(timezone.utc)
+        row = (
+            self.db.query(RefreshToken)
+            .filter(RefreshToken.token_hash == hash_refresh_token(token), RefreshToken.expires_at > now)
+            .with_for_update()
+            .first()
+        )
+        if row is None:
+            return None
+
+        if row.revoked_at is not None:
+            if self._within_reuse_grace(row, now):
+                new_token = self.issue(row.user_id, row.family_id)
+                self.db.commit()
+                return row.user_id, new_token
+            logger.warning(f"리프레시 토큰 재사용 감지: user_id={row.user_id}, family={row.family_id}")
+            self.revoke_family(row.family_id)
+            return None
+
+        row.revoked_at = now
+        new_token = self.issue(row.user_id, row.family_id)
+        self.db.commit()
+        return row.user_id, new_token
+
+    def _within_reuse_grace(self, row: RefreshToken, now: datetime) -> bool:
+        """방금 교체된 토큰의 재사용인지 (family가 폐기되지 않고 살아 있는 토큰이 있어야 함)"""
+        revoked_at = row.revoked_at
+        if revoked_at.tzinfo is None:
+            revoked_at = revoked_at.replace(tzinfo=timezone.utc)
+        if now - revoked_at > timedelta(seconds=settings.refresh_token_reuse_grace_seconds):
+            return False
+        return self.db.query(
+            self.db.query(RefreshToken.id)
+            .filter(
+                RefreshToken.family_id == row.family_id,
+                RefreshToken.revoked_at.is_(None),
+                RefreshToken.expires_at > now
+            )
+            .exists()
+        ).scalar()
+
+    def revoke_family(self, family_id: str) -> int:
+        """family의 모든 토큰 폐기"""
+        revoked = (
+            self.db.query(RefreshToken)
+            .filter(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+            .update({RefreshToken.revoked_at: datetime.now(timezone.utc)}, synchronize_session=False)
+        )
+        self.db.commit()
+        return revoked
@@ -0,0 +1,45 @@
+"""
+Validate-once JSON responses.
+
+When an endpoint returns pydantic objects, FastAPI validates them again
+against response_model and only then serializes them. Endpoints on hot
+paths instead build their schema objects once (lists in a single
+TypeAdapter call) and return typed_json_response(), which serializes
+straight to bytes with pydantic-core. Keep response_model on the route so
+the OpenAPI schema is unchanged; FastAPI passes Response objects through.
+See benchmarks/json_responses.py for the measured difference.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+from functools import lru_cache
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def type_adapter(model_type: Any) -> TypeAdapter:
+    """Cached TypeAdapter; building one compiles a core schema"""
+    return TypeAdapter(model_type)
+
+
+def validate_list(item_type: Any, rows: Iterable[Any]) -> List[Any]:
+    """Validate ORM objects or result rows into item_type in one core call"""
+    return type_adapter(List[item_type]).validate_python(list(rows), from_attributes=True)
+
+
+def dump_json(model_type: Any, value: Any) -> bytes:
+    """Serialize already-validated value as model_type to JSON bytes"""
+    return type_adapter(model_type).dump_json(value)
+
+
+class JSONBytesResponse(Response):
+    media_type = "application/json"
+
+
+def typed_json_response(
+    model_type: Any,
+    value: Any,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """Response whose body is value serialized as model_type, without re-validation"""
+    return JSONBytesResponse(content=dump_json(model_type, value), status_code=status_code, headers=headers)
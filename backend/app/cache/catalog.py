@@ -0,0 +1,118 @@
+"""
+Versioned read-through cache for the character and story catalog.
+
+Catalog responses are stored in Redis as ready-to-send JSON bytes under a key
+that embeds the current catalog version. Any write to characters or stories
+bumps the version with invalidate_catalog(), so every cached entry is
+superseded at once and the old ones simply expire. On a miss only one worker
+rebuilds an entry while the others wait briefly for it (stampede guard).
+When Redis is unavailable responses are built from the database as before.
+
+cached_catalog_response blocks (Redis, the build queries, the wait for
+another builder), so the routes using it are plain def endpoints and run in
+the threadpool, never on the event loop.
+
+Each entry is stored with the ETag of its body, so a client revalidating
+with If-None-Match gets a 304 from one small Redis read, without the body
+being fetched or any query being run.
+"""
+from typing import Any, Callable, Optional
+import logging
+import time
+from fastapi import Request, Response
+from redis.exceptions import LockError, RedisError
+from app.config import settings
+from app.redis_client import redis_client
+from app.cache.conditional import body_etag, etag_matches, not_modified, set_validators
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION_KEY = "catalog:version"
+CATALOG_KEY = "catalog:v{version}:{name}"
+CATALOG_LOCK_KEY = "catalog:lock:{key}"
+
+LOCK_POLL_SECONDS = 0.05
+
+
+def json_response(body: bytes, etag: Optional[str] = None, request: Optional[Request] = None) -> Response:
+    """Send body, or a 304 if the client already holds this representation"""
+    etag = etag or body_etag(body)
+    if etag_matches(request, etag):
+        return not_modified(etag, settings.catalog_cache_control)
+    return set_validators(
+        Response(content=body, media_type="application/json"), etag, settings.catalog_cache_control
+    )
+
+
+def invalidate_catalog() -> None:
+    """Supersede every cached catalog response; call after committing a catalog write"""
+    try:
+        redis_client.incr(CATALOG_VERSION_KEY)
+    except RedisError as e:
+        # Entries still expire after catalog_cache_ttl_seconds
+        logger.error(f"Could not invalidate catalog cache: {e}")
+
+
+def _wait_for_entry(key: str) -> Any:
+    deadline = time.monotonic() + settings.catalog_cache_lock_wait_seconds
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_SECONDS)
+        body, etag = redis_client.hmget(key, "body", "etag")
+        if body is not None:
+            return body, etag.decode()
+    return None
+
+
+def _store_entry(key: str, body: bytes, etag: str) -> None:
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.hset(key, mapping={"body": body, "etag": etag})
+    pipe.expire(key, settings.catalog_cache_ttl_seconds)
+    pipe.execute()
+
+
+def cached_catalog_response(name: str, build: Callable[[], bytes], request: Optional[Request] = None) -> Response:
+    """Serve name from the cache, building and storing it on a miss (call from a sync endpoint)
+
+    build() runs the queries and returns the serialized body; exceptions it
+    raises (e.g. a 404) propagate and nothing is cached.
+    """
+    try:
+        version = int(redis_client.get(CATALOG_VERSION_KEY) or 0)
+        key = CATALOG_KEY.format(version=version, name=name)
+
+        if request is not None and request.headers.get("if-none-match"):
+            etag = redis_client.hget(key, "etag")
+            if etag is not None and etag_matches(request, etag.decode()):
+                return not_modified(etag.decode(), settings.catalog_cache_control)
+
+        body, etag = redis_client.hmget(key, "body", "etag")
+        if body is not None:
+            return json_response(body, etag.decode(), request)
+
+        # Token-checked lock: a builder that outlived its lock never deletes the next builder's
+        lock = redis_client.lock(
+            CATALOG_LOCK_KEY.format(key=key), timeout=settings.catalog_cache_lock_seconds, blocking=False
+        )
+        if not lock.acquire(blocking=False):
+            entry = _wait_for_entry(key)
+            if entry is not None:
+                return json_response(*entry, request)
+            # The builder is slow or died; serve this request directly
+            return json_response(build(), request=request)
+    except RedisError as e:
+        logger.warning(f"Catalog cache unavailable, serving {name} from the database: {e}")
+        return json_response(build(), request=request)
+
+    try:
+        body = build()
+        etag = body_etag(body)
+        _store_entry(key, body, etag)
+        return json_response(body, etag, request)
+    except RedisError as e:
+        logger.warning(f"Could not store catalog entry {name}: {e}")
+        return json_response(body, etag, request)
+    finally:
+        try:
+            lock.release()
+        except (LockError, RedisError):
+            pass
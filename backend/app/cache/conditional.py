@@ -0,0 +1,38 @@
+"""
+HTTP conditional GET helpers: ETags, If-None-Match and Cache-Control.
+"""
+from typing import Optional
+import hashlib
+from fastapi import Request, Response
+
+
+def body_etag(body: bytes) -> str:
+    """Strong ETag derived from the representation itself"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Optional[Request], etag: Optional[str]) -> bool:
+    """Whether the request's If-None-Match already names etag
+
+    Uses the weak comparison RFC 9110 prescribes for If-None-Match, so tags
+    weakened by a proxy (nginx gzip turns "x" into W/"x") still match.
+    """
+    if request is None or not etag:
+        return False
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in candidates)
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def set_validators(response: Response, etag: str, cache_control: str) -> Response:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    return response
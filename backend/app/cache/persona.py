@@ -0,0 +1,98 @@
+"""
+Per-process cache of the story -> character persona used to build prompts.
+
+Every chat turn needs the character's system prompt and description, which
+almost never change. They are kept in a small LRU with a TTL inside each API
+process, so the prompt-building path runs no catalog queries once warm.
+Edits are broadcast over Redis pub/sub with invalidate_persona(); each
+process listens in a background thread and evicts the affected entries. If
+the subscription drops, the whole cache is cleared since invalidations may
+have been missed; the TTL bounds staleness from edits made outside the API.
+"""
+from typing import NamedTuple, Optional
+import logging
+import threading
+import time
+from redis.exceptions import RedisError
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database.models import Character, Story
+from app.redis_client import redis_client
+from app.cache.lru import TTLLRUCache
+
+logger = logging.getLogger(__name__)
+
+PERSONA_INVALIDATION_CHANNEL = "persona:invalidate"
+
+
+class Persona(NamedTuple):
+    story_id: int
+    character_id: int
+    system_prompt: str
+    description: str
+
+
+persona_cache = TTLLRUCache(settings.persona_cache_size, settings.persona_cache_ttl_seconds)
+
+
+def get_story_persona(db: Session, story_id: int) -> Optional[Persona]:
+    """Persona for story_id, from the cache or one joined query"""
+    persona = persona_cache.get(story_id)
+    if persona is not None:
+        return persona
+
+    row = (
+        db.query(Story.id, Character.id, Character.system_prompt, Character.description)
+        .join(Character, Story.character_id == Character.id)
+        .filter(Story.id == story_id)
+        .first()
+    )
+    if row is None:
+        return None
+
+    persona = Persona(*row)
+    persona_cache.set(story_id, persona)
+    return persona
+
+
+def invalidate_persona(character_id: int) -> None:
+    """Tell every API process to drop cached personas of character_id; call after committing an edit"""
+    persona_cache.evict_where(lambda persona: persona.character_id == character_id)
+    try:
+        redis_client.publish(PERSONA_INVALIDATION_CHANNEL, character_id)
+    except RedisError as e:
+        logger.error(f"Could not publish persona invalidation for character {character_id}: {e}")
+
+
+def _listen_for_invalidations() -> None:
+    while True:
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(PERSONA_INVALIDATION_CHANNEL)
+            while True:
+                message = pubsub.get_message(timeout=1.0)
+                if message is None:
+                    continue
+                character_id = int(message["data"])
+                persona_cache.evict_where(lambda persona: persona.character_id == character_id)
+        except (RedisError, ValueError) as e:
+            logger.warning(f"Persona invalidation subscription lost, clearing cache: {e}")
+            persona_cache.clear()
+        finally:
+            try:
+                pubsub.close()
+            except RedisError:
+                pass
+        time.sleep(1.0)
+
+
+_listener: Optional[threading.Thread] = None
+
+
+def start_persona_invalidation_listener() -> None:
+    """Start the per-process pub/sub listener (idempotent)"""
+    global _listener
+    if _listener is not None:
+        return
+    _listener = threading.Thread(target=_listen_for_invalidations, name="persona-invalidation", daemon=True)
+    _listener.start()
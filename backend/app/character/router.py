@@ -1,45 +1,128 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, UploadFile, File, Form
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from app.database.query_budget import query_budget
 from app.database.connection import get_db
+from app.database.routing import get_read_db, read_session
+from app.database.models import Character
+from app.images.service import ImageService, image_key_prefix, process_upload
+from app.cache.catalog import cached_catalog_response, invalidate_catalog, json_response
+from app.api.responses import dump_json, typed_json_response
+from app.ranking.popularity import top_items_json, CHARACTER_LEADERBOARD_KEY, CHARACTER_ITEMS_KEY
+from redis.exceptions import RedisError
 from app.database.models import User
 from app.api.jwt_auth import get_current_user_or_anonymous
-from app.character.schemas import CharacterDetailResponse, CharacterImageSchema, CharacterWithStoriesSchema, CharacterProfileResponse
-from app.database.services import CharacterService
+from app.character.schemas import CharacterDetailResponse, CharacterImageSchema, CharacterWithStoriesSchema, CharacterProfileResponse, CharacterListResponse, TagCountResponse
+from app.database.services import CharacterService, TagService
 
 
 
 router = APIRouter(prefix="/characters", tags=["characters"])
 
-@router.get("/", response_model=List[CharacterWithStoriesSchema])
-async def get_characters(
-    db: Session = Depends(get_db)
+@router.get("/", response_model=CharacterListResponse)
+@query_budget(2)
+def get_characters(
+    request: Request,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=100)
+):
+    def build() -> bytes:
+        with read_session() as db:
+            page = CharacterService(db).get_characters(limit, cursor)
+            return dump_json(CharacterListResponse, CharacterListResponse(
+                characters=page.items,
+                total=len(page.items),
+                has_more=page.has_more,
+                next_cursor=page.next_cursor
+            ))
+
+    return cached_catalog_response(f"characters:list:{limit}:{cursor or ''}", build, request)
+
+@router.get("/by-tags", response_model=CharacterListResponse)
+@query_budget(2)
+async def get_characters_by_tags(
+    tags: List[str] = Query(..., description="Tag names to filter by"),
+    match: str = Query("all", pattern="^(all|any)$", description="all = AND, any = OR"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db)
 ):
-    return CharacterService(db).get_characters()
+    page = CharacterService(db).get_characters(limit, cursor, tags=tags, match_all=match == "all")
+    return typed_json_response(CharacterListResponse, CharacterListResponse.model_construct(
+        characters=page.items,
+        total=len(page.items),
+        has_more=page.has_more,
+        next_cursor=page.next_cursor
+    ))
+
+@router.get("/tags", response_model=List[TagCountResponse])
+@query_budget(2)
+async def get_tag_counts(
+    db: Session = Depends(get_read_db)
+):
+    return typed_json_response(List[TagCountResponse], TagService(db).get_tag_counts())
 
 @router.get("/story_detail/{character_id}", response_model=CharacterDetailResponse)
 async def get_character_detail(
     character_id: int, 
     user_id: int = Depends(get_current_user_or_anonymous),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     return CharacterService(db).get_character_story_detail(character_id)
 
 @router.get("/{character_id}/photos", response_model=List[CharacterImageSchema])
+@query_budget(1)
 async def get_character_photos(
     character_id: int,
     active_only: bool = Query(True),
+    db: Session = Depends(get_read_db)
+):
+    return typed_json_response(List[CharacterImageSchema], CharacterService(db).get_character_photos(character_id, active_only))
+
+@router.post("/{character_id}/photos", response_model=CharacterImageSchema)
+async def upload_character_photo(
+    character_id: int,
+    file: UploadFile = File(...),
+    offset: int = Form(0),
+    bounty: int = Form(0),
+    user_id: int = Depends(get_current_user_or_anonymous),
     db: Session = Depends(get_db)
 ):
-    return CharacterService(db).get_character_photos(character_id, active_only)
+    """Upload a character image; stores resized WebP/AVIF variants and a blur placeholder"""
+    if not db.query(Character.id).filter(Character.id == character_id).first():
+        raise HTTPException(status_code=404, detail="Character not found")
+
+    data, processed = await process_upload(file)
+    image_service = ImageService(db)
+    variants = await run_in_threadpool(
+        image_service.store_variants, image_key_prefix("characters", character_id, data), processed
+    )
+    image = image_service.add_character_image(character_id, processed, variants, offset, bounty)
+    invalidate_catalog()
+    return image
 
 @router.get("/profile/{character_id}", response_model=CharacterProfileResponse)
-async def get_character_profile(character_id: int, db: Session = Depends(get_db)):
-    return CharacterService(db).get_character_profile(character_id)
+@query_budget(3)
+def get_character_profile(character_id: int, request: Request):
+    def build() -> bytes:
+        with read_session() as db:
+            profile = CharacterService(db).get_character_profile(character_id)
+        if not profile:
+            raise HTTPException(status_code=404, detail="Character not found")
+        return dump_json(CharacterProfileResponse, profile)
+
+    return cached_catalog_response(f"characters:profile:{character_id}", build, request)
 
 @router.get("/popular", response_model=List[CharacterWithStoriesSchema])
+@query_budget(0)
 async def get_popular_characters(
-    limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db)
+    request: Request,
+    limit: int = Query(10, ge=1, le=50)
 ):
-    return CharacterService(db).get_popular_characters(limit)
+    """Top characters by recent engagement, straight from the Redis leaderboard"""
+    try:
+        body, _ = top_items_json(CHARACTER_LEADERBOARD_KEY, CHARACTER_ITEMS_KEY, limit)
+    except RedisError:
+        raise HTTPException(status_code=503, detail="Popularity rankings are unavailable")
+    return json_response(body, request=request)
@@ -1,7 +1,7 @@
 from tkinter import Image
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 
 class CharacterResponse(BaseModel):
@@ -65,6 +65,8 @@ class CharacterImageBaseSchema(BaseSchema):
     offset: int
     bounty: int
     is_active: bool = True
+    image_variants: Optional[Dict[str, Dict[str, Any]]] = None
+    image_placeholder: Optional[str] = None
 
 class CharacterCreateSchema(CharacterBaseSchema):
     pass
@@ -200,12 +202,21 @@ class ChatMessageDB(ChatMessageDBBase, TimestampMixin):
 
 # Response Models for API
 class CharacterListResponse(BaseSchema):
-    characters: List[CharacterBaseSchema]
+    characters: List[CharacterWithStoriesSchema]
     total: int
+    has_more: bool = False
+    next_cursor: Optional[str] = None
+
+class TagCountResponse(BaseModel):
+    name: str
+    character_count: int
+    story_count: int
 
 class StoryListResponse(BaseSchema):
     stories: List[StoryWithCharacterSchema]
     total: int
+    has_more: bool = False
+    next_cursor: Optional[str] = None
 
 class CharacterDetailResponse(CharacterWithStoriesSchema):
     pass
@@ -3,14 +3,33 @@ from sqlalchemy.orm import Session
 from sqlalchemy import desc, and_
 from app.database.models import StoryChatHistory, User, ChatMessage, Character, StoryChatHistoryStatus
 from app.database.connection import get_db_session
+from app.database.routing import mark_user_write
+from app.profile.services import UserService
+from app.database.pagination import KeysetPage, keyset_paginate
+from app.config import settings
 from typing import List, Optional
-from sqlalchemy import select
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, update, func, cast, Float
+from sqlalchemy.engine import Row
 import logging
 from app.database.models import Story
 
 
 logger = logging.getLogger(__name__)
 
+# Generation status of an AI message and the transitions allowed out of each state.
+STATUS_PENDING = "pending"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+
+STATUS_TRANSITIONS = {
+    STATUS_PENDING: (STATUS_COMPLETED, STATUS_FAILED, STATUS_CANCELLED),
+    STATUS_COMPLETED: (),
+    STATUS_FAILED: (),
+    STATUS_CANCELLED: (),
+}
+
 class ChatService:
     def __init__(self, db: Optional[Session] = None):
         self.db = db or get_db_session()
@@ -23,26 +42,6 @@ class ChatService:
         if self._should_close:
             self.db.close()
     
-    def get_or_create_user(self, user_id: int) -> User:
-        """Get existing user or create new one"""
-        try:
-            user = self.db.query(User).filter(User.id == user_id).first()
-            if not user:
-                user = User(
-                    id=user_id,
-                    name=f"User_{user_id}",  # Provide default name
-                    is_active=True
-                )
-                self.db.add(user)
-                self.db.commit()
-                self.db.refresh(user)
-                logger.info(f"Created new user: {user_id}")
-            return user
-        except Exception as e:
-            self.db.rollback()
-            logger.error(f"Error getting/creating user {user_id}: {e}")
-            raise
-
     def get_character(self, character_id: int) -> Optional[Character]:
         try:
             return self.db.query(Character).filter(Character.id == character_id).first()
@@ -58,25 +57,41 @@ class ChatService:
             return None
     
     def get_user_chat_history(self, user_id: int, story_id: int, max_count: int = 10, offset: int = 0) -> List[StoryChatHistory]:
-        """Get chat history for a user and story"""
+        """Get chat history for a user and story
+
+        The hot window (created_at >= now - chat_history_hot_window_days)
+        lets Postgres prune down to the recent partitions. When it holds fewer
+        than offset + max_count messages, the rest comes from older partitions
+        with a second query bounded by created_at < hot_since.
+        """
         try:
             query = self.db.query(StoryChatHistory).filter(
                 StoryChatHistory.user_id == user_id, 
                 StoryChatHistory.story_id == story_id,
                 StoryChatHistory.is_active == True
-            )
-            messages = query.order_by(StoryChatHistory.created_at.desc()).offset(offset).limit(max_count).all()
+            ).order_by(StoryChatHistory.created_at.desc(), StoryChatHistory.id.desc())
+
+            hot_since = datetime.now(timezone.utc) - timedelta(days=settings.chat_history_hot_window_days)
+            hot = query.filter(StoryChatHistory.created_at >= hot_since).limit(offset + max_count).all()
+            messages = hot[offset:]
+            if len(hot) < offset + max_count:
+                messages += (
+                    query.filter(StoryChatHistory.created_at < hot_since)
+                    .offset(max(offset - len(hot), 0))
+                    .limit(max_count - len(messages))
+                    .all()
+                )
             
             return messages
         except Exception as e:
             logger.error(f"Error getting chat history for user {user_id}: {e}")
             return []
     
-    def add_message(self, user_id: int, character_id: int, story_id: int, message: str, character_image_id: int = None, message_type: str = "text", is_user_message: bool = True) -> Optional[StoryChatHistory]:
+    def add_message(self, user_id: int, character_id: int, story_id: int, message: str, character_image_id: int = None, message_type: str = "text", is_user_message: bool = True, status: Optional[str] = None) -> Optional[StoryChatHistory]:
         """Add a message to the chat history"""
         try:
-            # Ensure user exists
-            self.get_or_create_user(user_id)
+            # Anonymous users are materialized on their first message
+            UserService(self.db).ensure_user(user_id)
             
             # Create message record
             chat_message = StoryChatHistory(
@@ -87,12 +102,19 @@ class ChatService:
                 contents=message,
                 message_type=message_type,
                 is_user_message=is_user_message,
-                is_active=True
+                is_active=True,
+                status=status,
+                elapsed_time=0 if status else None,
+                status_updated_at=func.now() if status else None
             )
             
             self.db.add(chat_message)
+            if status and settings.chat_status_audit_enabled:
+                self.db.flush()
+                self._add_status_audit(chat_message.id, status, None, 0)
             self.db.commit()
             self.db.refresh(chat_message)
+            mark_user_write(user_id)
             
             logger.info(f"Added message for user {user_id}, story {story_id}")
             return chat_message
@@ -102,33 +124,72 @@ class ChatService:
             logger.error(f"Error adding message for user {user_id}: {e}")
             return None
 
-    def add_story_chat_history_status(self, story_chat_history_id: int, status: str, error_message: str = None, elapsed_time: float = 0) -> Optional[StoryChatHistoryStatus]:
-        """Add a status to a chat history"""
+    def _add_status_audit(self, story_chat_history_id: int, status: str, error_message: Optional[str], elapsed_time: float) -> None:
+        """Append a row to the optional status audit trail (caller commits)"""
+        self.db.add(StoryChatHistoryStatus(
+            story_chat_history_id=story_chat_history_id,
+            status=status,
+            error_message=error_message,
+            elapsed_time=elapsed_time
+        ))
+
+    def transition_story_chat_history_status(self, story_chat_history_id: int, status: str, error_message: str = None, elapsed_time: float = 0, contents: Optional[str] = None) -> bool:
+        """Move a chat history to a new status if the current status allows it.
+
+        The guard is part of the UPDATE itself, so a late worker result cannot
+        overwrite a message that was already cancelled or failed. Returns False
+        when the transition was rejected.
+        """
+        allowed_from = [current for current, targets in STATUS_TRANSITIONS.items() if status in targets]
+        values = {
+            "status": status,
+            "error_message": error_message,
+            "elapsed_time": elapsed_time,
+            "status_updated_at": func.now(),
+        }
+        if contents is not None:
+            values["contents"] = contents
+
         try:
-            status = StoryChatHistoryStatus(
-                story_chat_history_id=story_chat_history_id,
-                status=status,
-                error_message=error_message,
-                elapsed_time=elapsed_time
+            result = self.db.execute(
+                update(StoryChatHistory)
+                .where(
+                    StoryChatHistory.id == story_chat_history_id,
+                    StoryChatHistory.status.in_(allowed_from)
+                )
+                .values(**values)
+                .returning(StoryChatHistory.user_id)
+                .execution_options(synchronize_session=False)
             )
-            self.db.add(status)
+            user_id = result.scalar()
+            if user_id is None:
+                self.db.rollback()
+                logger.warning(f"Rejected status transition to {status} for story chat history {story_chat_history_id}")
+                return False
+
+            if settings.chat_status_audit_enabled:
+                self._add_status_audit(story_chat_history_id, status, error_message, elapsed_time)
             self.db.commit()
-            return status
+            mark_user_write(user_id)
+            return True
         except Exception as e:
             self.db.rollback()
-            logger.error(f"Error adding status for story chat history {story_chat_history_id}: {e}")
-            return None
-
-    def get_story_chat_history_status(self, story_chat_history_id: int) -> Optional[StoryChatHistoryStatus]:
+            logger.error(f"Error updating status for story chat history {story_chat_history_id}: {e}")
+            return False
 
+    def get_story_chat_history_status(self, story_chat_history_id: int) -> Optional[Row]:
+        """Get the current status columns of a chat history by primary key"""
         stmt = (
-            select(StoryChatHistoryStatus)
-            .where(StoryChatHistoryStatus.story_chat_history_id == story_chat_history_id)
-            .order_by(StoryChatHistoryStatus.created_at.desc())
-            .limit(1)
+            select(
+                StoryChatHistory.id,
+                StoryChatHistory.status,
+                StoryChatHistory.error_message,
+                StoryChatHistory.elapsed_time,
+                StoryChatHistory.status_updated_at
+            )
+            .where(StoryChatHistory.id == story_chat_history_id)
         )
-        latest = self.db.execute(stmt).scalars().first()
-        return latest
+        return self.db.execute(stmt).first()
     
     def get_story_chat_history_by_id(self, story_chat_history_id: int) -> Optional[StoryChatHistory]:
         """Get a chat history by ID"""
@@ -149,3 +210,38 @@ class ChatService:
             self.db.rollback()
             logger.error(f"Error updating chat history {story_chat_history_id}: {e}")
             return None
+
+    def search_chat_history(self, user_id: int, story_id: int, q: str, limit: int = 20, cursor: Optional[str] = None, snippet_length: int = 120) -> KeysetPage:
+        """Search one conversation for q, best matches first.
+
+        Matching is a case-insensitive substring test served by the pg_trgm GIN
+        index on (user_id, story_id, contents), which works for Korean text where
+        the built-in text search configurations do not. Rank is the trigram
+        word similarity; snippets are cut around the first match in SQL so long
+        messages are never transferred whole.
+        """
+        escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        # word_similarity() is a float4; widen it so the cursor round-trips the exact value
+        rank = cast(func.word_similarity(q, StoryChatHistory.contents), Float).label("rank")
+        match_position = func.strpos(func.lower(StoryChatHistory.contents), func.lower(q))
+        snippet_start = func.greatest(match_position - snippet_length // 3, 1)
+        snippet = func.substr(StoryChatHistory.contents, snippet_start, snippet_length).label("snippet")
+
+        query = (
+            self.db.query(
+                StoryChatHistory.id,
+                StoryChatHistory.created_at,
+                StoryChatHistory.is_user_message,
+                (snippet_start > 1).label("snippet_truncated_start"),
+                (func.length(StoryChatHistory.contents) >= snippet_start + snippet_length).label("snippet_truncated_end"),
+                snippet,
+                rank
+            )
+            .filter(
+                StoryChatHistory.user_id == user_id,
+                StoryChatHistory.story_id == story_id,
+                StoryChatHistory.is_active == True,
+                StoryChatHistory.contents.ilike(f"%{escaped}%", escape="\\")
+            )
+        )
+        return keyset_paginate(query, [rank, StoryChatHistory.id], limit, cursor, descending=True)
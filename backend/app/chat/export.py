@@ -0,0 +1,107 @@
+"""
+Streaming export of a user's chat history.
+
+Rows are read through a server-side cursor (``yield_per``) and encoded one
+fetch batch at a time, so memory stays constant no matter how long the
+history is; nothing is materialized in the API process.
+"""
+from typing import Iterator, Optional
+from datetime import datetime
+import csv
+import io
+import json
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from app.database.models import StoryChatHistory
+from app.database.routing import read_session
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = (
+    StoryChatHistory.id,
+    StoryChatHistory.story_id,
+    StoryChatHistory.character_id,
+    StoryChatHistory.character_image_id,
+    StoryChatHistory.is_user_message,
+    StoryChatHistory.message_type,
+    StoryChatHistory.status,
+    StoryChatHistory.contents,
+    StoryChatHistory.created_at,
+)
+
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _export_statement(user_id: int, story_id: Optional[int], since: Optional[datetime], until: Optional[datetime]):
+    statement = select(*EXPORT_COLUMNS).where(
+        StoryChatHistory.user_id == user_id,
+        StoryChatHistory.is_active == True
+    )
+    if story_id is not None:
+        statement = statement.where(StoryChatHistory.story_id == story_id)
+    # Date bounds on the partition key let Postgres prune whole months
+    if since is not None:
+        statement = statement.where(StoryChatHistory.created_at >= since)
+    if until is not None:
+        statement = statement.where(StoryChatHistory.created_at < until)
+    return (
+        statement
+        .order_by(StoryChatHistory.created_at, StoryChatHistory.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+
+def _row_dict(row) -> dict:
+    record = dict(row._mapping)
+    record["created_at"] = row.created_at.isoformat() if row.created_at else None
+    return record
+
+
+def _ndjson_chunks(result) -> Iterator[bytes]:
+    for rows in result.partitions():
+        yield "".join(
+            json.dumps(_row_dict(row), ensure_ascii=False, separators=(",", ":")) + "\n"
+            for row in rows
+        ).encode("utf-8")
+
+
+def _csv_chunks(result) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    # BOM so spreadsheet apps detect UTF-8 (Korean text)
+    buffer.write("﻿")
+    writer.writeheader()
+    for rows in result.partitions():
+        writer.writerows(_row_dict(row) for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def iter_chat_history_export(
+    bind: Engine,
+    user_id: int,
+    fmt: str = "ndjson",
+    story_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> Iterator[bytes]:
+    """Yield the encoded export in chunks of one cursor fetch each
+
+    The generator owns its session: StreamingResponse iterates it after the
+    request's dependencies have been torn down.
+    """
+    with read_session(bind) as db:
+        result = db.execute(_export_statement(user_id, story_id, since, until))
+        try:
+            chunks = _csv_chunks(result) if fmt == "csv" else _ndjson_chunks(result)
+            yield from chunks
+        finally:
+            result.close()
@@ -1,27 +1,46 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import desc, func, and_, or_
-from typing import Optional
+from typing import Optional, Literal
+from datetime import datetime
 from app.database.connection import get_db
+from app.database.query_budget import query_budget
+from app.database.routing import get_user_read_db, user_read_engine
+from app.database.pagination import keyset_paginate
+from app.api.responses import typed_json_response, validate_list
 from app.database.models import StoryChatHistory, User, Story
 from app.api.jwt_auth import get_current_user_or_anonymous
-from .schemas import CursorPaginatedChatHistoryResponse, ChatHistoryResponse, ChatSendRequest, ChatSendResponse
+from .schemas import CursorPaginatedChatHistoryResponse, ChatHistoryResponse, ChatSendRequest, ChatSendResponse, ChatSearchResponse, ChatSearchResult
+from .chat_service import ChatService
+from .export import iter_chat_history_export, EXPORT_MEDIA_TYPES
 from app.profile.services import UserService
 router = APIRouter(prefix="/chat", tags=["chat"])
 
 @router.get("/history", response_model=CursorPaginatedChatHistoryResponse)
+@query_budget(2)
 async def get_chat_history(
     story_id: int = Query(..., description="Story ID"),
     limit: int = Query(20, ge=1, le=100, description="Number of messages to fetch"),
-    cursor: Optional[int] = Query(None, description="Message ID cursor for pagination"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page"),
     user_id: int = Depends(get_current_user_or_anonymous),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_user_read_db)
 ):
-    story = db.query(Story).filter(Story.id == story_id).first()
+    story = db.query(Story.id).filter(Story.id == story_id).first()
     if not story:
         raise HTTPException(status_code=404, detail="Story not found")
     
-    query = db.query(StoryChatHistory).filter(
+    query = db.query(
+        StoryChatHistory.id,
+        StoryChatHistory.user_id,
+        StoryChatHistory.character_id,
+        StoryChatHistory.story_id,
+        StoryChatHistory.character_image_id,
+        StoryChatHistory.contents,
+        StoryChatHistory.is_user_message,
+        StoryChatHistory.message_type,
+        StoryChatHistory.created_at
+    ).filter(
         and_(
             StoryChatHistory.user_id == user_id,
             StoryChatHistory.story_id == story_id,
@@ -29,42 +48,23 @@ async def get_chat_history(
         )
     )
     
-    # Apply cursor pagination if provided
-    if cursor:
-        query = query.filter(StoryChatHistory.id < cursor)
-    
-    # Order by ID descending and limit
-    messages = query.order_by(desc(StoryChatHistory.id)).limit(limit + 1).all()
-    
-    # Check if there are more messages
-    has_more = len(messages) > limit
-    if has_more:
-        messages = messages[:-1]
-    
-    # Get next cursor
-    next_cursor = messages[-1].id if messages and has_more else None
+    # Newest first; the cursor seeks past the last (created_at, id) of the previous page
+    page = keyset_paginate(
+        query, [StoryChatHistory.created_at, StoryChatHistory.id], limit, cursor, descending=True
+    )
+    messages = page.items
+    has_more = page.has_more
+    next_cursor = page.next_cursor
     
-    # Convert to response format
-    chat_messages = []
-    for msg in reversed(messages):  # Reverse to show oldest first
-        chat_messages.append(ChatHistoryResponse(
-            id=msg.id,
-            user_id=msg.user_id,
-            character_id=msg.character_id,
-            story_id=msg.story_id,
-            character_image_id=msg.character_image_id,
-            contents=msg.contents,
-            is_user_message=msg.is_user_message,
-            message_type=msg.message_type,
-            created_at=msg.created_at
-        ))
+    # Validated in one pass, oldest first
+    chat_messages = validate_list(ChatHistoryResponse, reversed(messages))
     
-    return CursorPaginatedChatHistoryResponse(
+    return typed_json_response(CursorPaginatedChatHistoryResponse, CursorPaginatedChatHistoryResponse.model_construct(
         messages=chat_messages,
         has_more=has_more,
         next_cursor=next_cursor,
         total_count=len(chat_messages)
-    )
+    ))
 
 # @router.post("/send", response_model=ChatSendResponse)
 # async def send_chat_message(
@@ -122,4 +122,57 @@ async def get_chat_history(
         
 #     except Exception as e:
 #         db.rollback()
-#         raise HTTPException(status_code=500, detail=f"Failed to send message: {str(e)}")
\ No newline at end of file
+#         raise HTTPException(status_code=500, detail=f"Failed to send message: {str(e)}")
+
+
+@router.get("/search", response_model=ChatSearchResponse)
+@query_budget(1)
+async def search_chat_history(
+    story_id: int = Query(..., description="Story ID"),
+    q: str = Query(..., min_length=1, max_length=200, pattern=r"\S", description="Text to search for (not blank)"),
+    limit: int = Query(20, ge=1, le=50, description="Number of results to fetch"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page"),
+    user_id: int = Depends(get_current_user_or_anonymous),
+    db: Session = Depends(get_user_read_db)
+):
+    """Search the current user's messages in one story, best matches first"""
+    page = ChatService(db).search_chat_history(user_id, story_id, q.strip(), limit, cursor)
+
+    results = []
+    for row in page.items:
+        snippet = row.snippet
+        if row.snippet_truncated_start:
+            snippet = "…" + snippet
+        if row.snippet_truncated_end:
+            snippet = snippet + "…"
+        results.append(ChatSearchResult(
+            id=row.id,
+            created_at=row.created_at,
+            is_user_message=row.is_user_message,
+            snippet=snippet,
+            rank=row.rank
+        ))
+
+    return typed_json_response(ChatSearchResponse, ChatSearchResponse.model_construct(
+        results=results,
+        has_more=page.has_more,
+        next_cursor=page.next_cursor
+    ))
+
+
+@router.get("/export")
+@query_budget(1)
+async def export_chat_history(
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="Export format"),
+    story_id: Optional[int] = Query(None, description="Only export this story"),
+    since: Optional[datetime] = Query(None, description="Only messages created at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only messages created before this time"),
+    user_id: int = Depends(get_current_user_or_anonymous)
+):
+    """Stream the current user's chat history, oldest first"""
+    filename = f"chat_history_{story_id}.{format}" if story_id else f"chat_history.{format}"
+    return StreamingResponse(
+        iter_chat_history_export(user_read_engine(user_id), user_id, format, story_id, since, until),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
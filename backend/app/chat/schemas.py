@@ -21,14 +21,26 @@ class ChatHistoryResponse(BaseModel):
 class CursorPaginatedChatHistoryResponse(BaseModel):
     messages: List[ChatHistoryResponse]
     has_more: bool
-    next_cursor: Optional[int]
+    next_cursor: Optional[str]
     total_count: int
 
+class ChatSearchResult(BaseModel):
+    id: int
+    created_at: datetime
+    is_user_message: bool
+    snippet: str
+    rank: float
+
+class ChatSearchResponse(BaseModel):
+    results: List[ChatSearchResult]
+    has_more: bool
+    next_cursor: Optional[str]
+
 class ChatHistoryRequest(BaseModel):
     user_id: int
     story_id: int
     limit: int = 20
-    cursor: Optional[int] = None
+    cursor: Optional[str] = None
     direction: str = "before"
 
 class ChatSendRequest(BaseModel):
@@ -0,0 +1,51 @@
+"""
+Archival of old story_chat_histories partitions.
+
+Each expired monthly partition is detached from the parent, exported with
+COPY into a gzip-compressed CSV on the configured storage backend, and then
+dropped. A partition that was detached by an interrupted run is picked up
+again on the next run.
+"""
+from typing import List
+import gzip
+import tempfile
+import logging
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from app.database.partitions import PARENT_TABLE, expired_partitions, detached_partitions
+from app.storage.backends import BaseStorage
+
+logger = logging.getLogger(__name__)
+
+
+def export_table(engine: Engine, table_name: str, storage: BaseStorage) -> str:
+    """Stream a table through COPY into a gzip file and hand it to storage"""
+    key = f"{PARENT_TABLE}/{table_name}.csv.gz"
+    raw_conn = engine.raw_connection()
+    try:
+        with tempfile.TemporaryFile() as tmp:
+            with gzip.GzipFile(fileobj=tmp, mode="wb") as gz:
+                with raw_conn.cursor() as cursor:
+                    cursor.copy_expert(f"COPY {table_name} TO STDOUT WITH (FORMAT csv, HEADER true)", gz)
+            tmp.seek(0)
+            location = storage.save(key, tmp, content_type="application/gzip")
+    finally:
+        raw_conn.close()
+    return location
+
+
+def archive_expired_partitions(engine: Engine, storage: BaseStorage, retention_months: int) -> List[str]:
+    """Detach, export and drop every partition older than the retention window"""
+    archived = []
+    # DETACH ... CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for name, _ in expired_partitions(conn, retention_months):
+            logger.info(f"Detaching partition {name}")
+            conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name} CONCURRENTLY"))
+
+        for name in detached_partitions(conn):
+            location = export_table(engine, name, storage)
+            conn.execute(text(f"DROP TABLE {name}"))
+            logger.info(f"Archived partition {name} to {location}")
+            archived.append(name)
+    return archived
@@ -1,6 +1,8 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from app.config import settings
 from app.database.models import Base
 import logging
@@ -45,6 +47,12 @@ def get_db() -> Session:
     finally:
         db.close()
 
+def dialect_insert(db: Session):
+    """INSERT construct with ON CONFLICT support for the session's database"""
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite_insert
+    return postgresql_insert
+
 def get_db_session() -> Session:
     """Get database session (for use outside FastAPI dependency injection)"""
     return SessionLocal()
@@ -0,0 +1,194 @@
+"""
+Per-request SQL instrumentation.
+
+Engine event hooks record, for the request being served, how many statements
+ran, how long they took in total, and how often each statement fingerprint
+(the SQL with literals and IN-lists collapsed) repeated. A fingerprint seen
+sql_n_plus_one_threshold times or more in one request is reported as a likely
+N+1.
+
+QueryStatsMiddleware scopes the stats to each HTTP request. In debug mode it
+adds X-DB-Query-Count, X-DB-Time-Ms and X-DB-N-Plus-One response headers; in
+every mode it aggregates per-route totals served as Prometheus text from
+/metrics (per process) and logs the requests that look like N+1.
+
+Tests can fail on budgets and N+1s with app/database/pytest_plugin.py.
+"""
+from typing import Dict, Iterator, List, NamedTuple, Optional
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+import hashlib
+import logging
+import re
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Numbers, but not the digits of $1-style placeholders
+_LITERALS = re.compile(r"'(?:[^']|'')*'|(?<!\$)\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(r"\(\s*(?:\?|%\(\w+\)s|%s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|\$\d+|:\w+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    """SQL with literals and placeholder lists collapsed, so repeats of one query compare equal"""
+    normalized = _LITERALS.sub("?", statement)
+    normalized = _PLACEHOLDER_LISTS.sub("(?)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+def fingerprint(statement: str) -> str:
+    return hashlib.sha1(normalize_statement(statement).encode()).hexdigest()[:12]
+
+
+class RepeatedStatement(NamedTuple):
+    fingerprint: str
+    count: int
+    statement: str
+
+
+class QueryStats:
+    """Statements of one request (or any other scope opened with record_queries)"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints: Counter = Counter()
+        self.examples: Dict[str, str] = {}
+
+    def add(self, statement: str, duration: float) -> None:
+        key = fingerprint(statement)
+        self.count += 1
+        self.duration += duration
+        self.fingerprints[key] += 1
+        self.examples.setdefault(key, statement)
+
+    def repeated(self, threshold: Optional[int] = None) -> List[RepeatedStatement]:
+        """Fingerprints that ran at least threshold times, most frequent first"""
+        threshold = threshold or settings.sql_n_plus_one_threshold
+        return [
+            RepeatedStatement(key, count, normalize_statement(self.examples[key]))
+            for key, count in self.fingerprints.most_common()
+            if count >= threshold
+        ]
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_start_times", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    start_times = conn.info.get("query_start_times")
+    duration = time.perf_counter() - start_times.pop() if start_times else 0.0
+    stats.add(statement, duration)
+
+
+_installed = False
+
+
+def install_query_instrumentation() -> None:
+    """Hook every engine of this process (idempotent)"""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _installed = True
+
+
+@contextmanager
+def record_queries() -> Iterator[QueryStats]:
+    """Collect the statements run in this context (threadpool calls inherit it)"""
+    install_query_instrumentation()
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+class QueryMetrics:
+    """Per-route totals of requests, statements, DB time and N+1 detections"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, List[float]] = defaultdict(lambda: [0, 0, 0.0, 0])
+
+    def observe(self, route: str, stats: QueryStats, n_plus_one: bool) -> None:
+        with self._lock:
+            totals = self._routes[route]
+            totals[0] += 1
+            totals[1] += stats.count
+            totals[2] += stats.duration
+            totals[3] += int(n_plus_one)
+
+    def render_prometheus(self) -> str:
+        families = (
+            ("http_requests_total", "counter", "Requests served", 0),
+            ("db_queries_total", "counter", "SQL statements executed by requests", 1),
+            ("db_query_seconds_total", "counter", "Time spent in SQL statements by requests", 2),
+            ("db_n_plus_one_requests_total", "counter", "Requests with a statement repeated past the N+1 threshold", 3),
+        )
+        with self._lock:
+            routes = {route: list(totals) for route, totals in self._routes.items()}
+        lines = []
+        for name, kind, help_text, index in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for route, totals in sorted(routes.items()):
+                lines.append(f'{name}{{route="{route}"}} {totals[index]:g}')
+        return "\n".join(lines) + "\n"
+
+
+query_metrics = QueryMetrics()
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware recording SQL statements per HTTP request"""
+
+    def __init__(self, app, debug_headers: Optional[bool] = None):
+        self.app = app
+        self.debug_headers = settings.debug if debug_headers is None else debug_headers
+        install_query_instrumentation()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with record_queries() as stats:
+            async def send_with_stats(message):
+                if message["type"] == "http.response.start" and self.debug_headers:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-query-count", str(stats.count).encode()))
+                    headers.append((b"x-db-time-ms", f"{stats.duration * 1000:.1f}".encode()))
+                    repeated = stats.repeated()
+                    if repeated:
+                        value = ", ".join(f"{r.fingerprint}x{r.count}" for r in repeated)
+                        headers.append((b"x-db-n-plus-one", value.encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_stats)
+            finally:
+                route = getattr(scope.get("route"), "path", None) or "unmatched"
+                repeated = stats.repeated()
+                query_metrics.observe(route, stats, bool(repeated))
+                for r in repeated:
+                    logger.warning(
+                        f"Possible N+1 in {scope.get('method')} {route}: {r.count}x [{r.fingerprint}] {r.statement[:300]}"
+                    )
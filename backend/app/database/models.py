@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Float, Index, Identity, JSON, UniqueConstraint, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship, foreign
+from sqlalchemy.sql import func, text
 from typing import Optional
 from datetime import datetime
 import uuid
@@ -15,6 +15,13 @@ class BaseModel(Base):
 
 class User(BaseModel):
     __tablename__ = "users"
+    __table_args__ = (
+        # Kakao token refresh sweeper scans by expiry (app/login/token_refresh.py)
+        Index(
+            "ix_users_kakao_token_expires_at", "kakao_token_expires_at",
+            postgresql_where=text("kakao_refresh_token IS NOT NULL")
+        ),
+    )
     
     is_active = Column(Boolean, default=True)
     kakao_id = Column(String(255), nullable=True, unique=True)
@@ -23,29 +30,55 @@ class User(BaseModel):
     kakao_access_token = Column(Text, nullable=True)
     kakao_refresh_token = Column(Text, nullable=True)
     kakao_token_expires_at = Column(DateTime(timezone=True), nullable=True)
-    
-    refresh_token = Column(Text, nullable=True)
-    refresh_token_expires_at = Column(DateTime(timezone=True), nullable=True)
+    # Bumped on every change, including Kakao logins (an upsert sets it explicitly)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     messages = relationship("ChatMessage", back_populates="user", cascade="all, delete-orphan")
     profiles = relationship("Profile", back_populates="user", cascade="all, delete-orphan")
     story_matches = relationship("StoryUserMatch", back_populates="user", cascade="all, delete-orphan")
     chat_histories = relationship("StoryChatHistory", back_populates="user", cascade="all, delete-orphan")
+    refresh_tokens = relationship("RefreshToken", back_populates="user", cascade="all, delete-orphan")
+
+
+class RefreshToken(BaseModel):
+    """Issued refresh token, stored as its sha256; see app/api/refresh_tokens.py"""
+    __tablename__ = "refresh_tokens"
+
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    token_hash = Column(String(64), nullable=False, unique=True)
+    # Every rotation of one login shares a family; reuse of a rotated token revokes the family
+    family_id = Column(String(36), nullable=False, index=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+
+    user = relationship("User", back_populates="refresh_tokens")
 
 
 class Profile(BaseModel):
     __tablename__ = "profiles"
+    __table_args__ = (
+        # get_profile_etag answers from the index alone
+        Index("ix_profiles_user_updated", "user_id", "updated_at", postgresql_include=["id"]),
+    )
 
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     nickname = Column(String(255), nullable=False)
     tag_name = Column(String(255), nullable=False)
     thumbnail_url = Column(String(255), nullable=False)
     description = Column(Text, nullable=False)
+    # {size: {"width", "height", <format>: url}} from app/images, plus a blurred data URI
+    image_variants = Column(JSON, nullable=True)
+    image_placeholder = Column(Text, nullable=True)
+    # Drives the profile ETag
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     user = relationship("User", back_populates="profiles")
 
 class Story(BaseModel):
     __tablename__ = "stories"
+    __table_args__ = (
+        Index("ix_stories_active_id", "id", postgresql_where=text("is_active")),
+    )
     
     character_id = Column(Integer, ForeignKey("characters.id"), nullable=False)
     storyline = Column(Text, nullable=False)
@@ -72,9 +105,29 @@ class Character(BaseModel):
     # Relationships
     stories = relationship("Story", back_populates="character", cascade="all, delete-orphan")
     images = relationship("CharacterImage", back_populates="character", cascade="all, delete-orphan")
+    tags = relationship("Tag", secondary="character_tags", back_populates="characters")
     chats = relationship("Chat", back_populates="character", cascade="all, delete-orphan")
     chat_histories = relationship("StoryChatHistory", back_populates="character", cascade="all, delete-orphan")
 
+class Tag(BaseModel):
+    """Normalized tag; Character.tag_list is kept as the comma-joined legacy copy"""
+    __tablename__ = "tags"
+
+    name = Column(String(64), nullable=False, unique=True)
+
+    # Relationships
+    characters = relationship("Character", secondary="character_tags", back_populates="tags")
+
+class CharacterTag(Base):
+    __tablename__ = "character_tags"
+    __table_args__ = (
+        # Tag -> characters lookups; the primary key covers character -> tags
+        Index("ix_character_tags_tag_character", "tag_id", "character_id"),
+    )
+
+    character_id = Column(Integer, ForeignKey("characters.id", ondelete="CASCADE"), primary_key=True)
+    tag_id = Column(Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True)
+
 class CharacterImage(BaseModel):
     __tablename__ = "character_images"
     
@@ -83,6 +136,9 @@ class CharacterImage(BaseModel):
     offset = Column(Integer, nullable=False)
     bounty = Column(Integer, nullable=False)
     is_active = Column(Boolean, default=True)
+    # {size: {"width", "height", <format>: url}} from app/images, plus a blurred data URI
+    image_variants = Column(JSON, nullable=True)
+    image_placeholder = Column(Text, nullable=True)
 
     # Relationships
     character = relationship("Character", back_populates="images")
@@ -90,6 +146,10 @@ class CharacterImage(BaseModel):
 
 class StoryUserMatch(BaseModel):
     __tablename__ = "story_user_matches"
+    __table_args__ = (
+        # One match per user and story; also serves the per-user lookups
+        UniqueConstraint("user_id", "story_id", name="uq_story_user_matches_user_story"),
+    )
     
     story_id = Column(Integer, ForeignKey("stories.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -103,6 +163,24 @@ class StoryUserMatch(BaseModel):
 
 class StoryChatHistory(BaseModel):
     __tablename__ = "story_chat_histories"
+    __table_args__ = (
+        # Keyset pagination seeks on (created_at, id) within one conversation
+        Index("ix_story_chat_histories_user_story_created", "user_id", "story_id", "created_at", "id"),
+        # Substring search within one conversation; trigrams work for Korean text
+        # where the built-in text search configurations do not (needs pg_trgm, btree_gin)
+        Index(
+            "ix_story_chat_histories_contents_trgm", "user_id", "story_id", "contents",
+            postgresql_using="gin", postgresql_ops={"contents": "gin_trgm_ops"}
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+    # Range-partitioned by month on created_at (see app/database/partitions.py), so
+    # the partition key is part of the table's primary key. Rows are still
+    # identified by id alone in the ORM.
+    __mapper_args__ = {"primary_key": ["id"]}
+
+    id = Column(Integer, Identity(), primary_key=True)
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
     
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     character_id = Column(Integer, ForeignKey("characters.id"), nullable=False)
@@ -113,23 +191,56 @@ class StoryChatHistory(BaseModel):
     message_type = Column(String(255), nullable=False)
     is_active = Column(Boolean, default=True)
 
+    # Current generation status (AI messages only), kept on the row so a status
+    # poll is a primary-key lookup. Transitions go through ChatService.
+    status = Column(String(32), nullable=True)
+    error_message = Column(Text, nullable=True)
+    elapsed_time = Column(Float, nullable=True)
+    status_updated_at = Column(DateTime(timezone=True), nullable=True)
+
     # Relationships
     user = relationship("User", back_populates="chat_histories")
     character = relationship("Character", back_populates="chat_histories")
     story = relationship("Story", back_populates="chat_histories")
     character_image = relationship("CharacterImage", back_populates="chat_histories")
-    status = relationship("StoryChatHistoryStatus", back_populates="chat_history", cascade="all, delete-orphan")
+    status_history = relationship(
+        "StoryChatHistoryStatus",
+        primaryjoin="StoryChatHistory.id == foreign(StoryChatHistoryStatus.story_chat_history_id)",
+        back_populates="chat_history",
+        cascade="all, delete-orphan"
+    )
 
 class StoryChatHistoryStatus(BaseModel):
+    """Optional audit trail of status transitions (see chat_status_audit_enabled)"""
     __tablename__ = "story_chat_history_statuses"
     
-    story_chat_history_id = Column(Integer, ForeignKey("story_chat_histories.id"), nullable=False)
+    # No FK: story_chat_histories is partitioned and its key includes created_at
+    story_chat_history_id = Column(Integer, nullable=False, index=True)
     status = Column(String(255), nullable=False)
     error_message = Column(Text, nullable=True)
     elapsed_time = Column(Float, nullable=False)
 
     # Relationships
-    chat_history = relationship("StoryChatHistory", back_populates="status")
+    chat_history = relationship(
+        "StoryChatHistory",
+        primaryjoin="foreign(StoryChatHistoryStatus.story_chat_history_id) == StoryChatHistory.id",
+        back_populates="status_history"
+    )
+
+@event.listens_for(StoryChatHistory.__table__, "before_create")
+def create_chat_history_search_extensions(target, connection, **kw):
+    """The trigram search index needs pg_trgm, and btree_gin for its integer columns"""
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gin"))
+
+@event.listens_for(StoryChatHistory.__table__, "after_create")
+def create_initial_chat_history_partitions(target, connection, **kw):
+    """A partitioned table accepts no rows until its partitions exist"""
+    if connection.dialect.name == "postgresql":
+        from app.config import settings
+        from app.database.partitions import ensure_partitions
+        ensure_partitions(connection, settings.chat_history_partitions_ahead)
 
 class Chat(BaseModel):
     __tablename__ = "chats"
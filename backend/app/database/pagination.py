@@ -0,0 +1,88 @@
+"""
+Keyset (seek) pagination shared by the list endpoints.
+
+Pages are ordered by a fixed tuple of columns that ends in a unique column
+(usually the primary key). The cursor is an opaque token holding the
+ordering values of the last row on the page; the next page seeks past it
+with a row-value comparison, so every page is an index range scan of
+``limit + 1`` rows no matter how deep the client has paged.
+"""
+from typing import Any, List, Optional, Sequence
+from datetime import datetime, date
+import base64
+import json
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+from sqlalchemy.sql.elements import ColumnElement
+
+
+class KeysetPage:
+    """One page of results plus the cursor to fetch the next one"""
+
+    def __init__(self, items: List[Any], has_more: bool, next_cursor: Optional[str]):
+        self.items = items
+        self.has_more = has_more
+        self.next_cursor = next_cursor
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _decode_value(column: ColumnElement, value: Any) -> Any:
+    python_type = column.type.python_type
+    if value is not None and python_type in (datetime, date):
+        return python_type.fromisoformat(value)
+    return value
+
+
+def encode_cursor(columns: Sequence[ColumnElement], row: Any) -> str:
+    """Build an opaque cursor from the ordering values of a row"""
+    payload = {
+        "k": [column.key for column in columns],
+        "v": [_encode_value(getattr(row, column.key)) for column in columns],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(columns: Sequence[ColumnElement], cursor: str) -> List[Any]:
+    """Decode a cursor into ordering values, rejecting tokens from another ordering"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if payload["k"] != [column.key for column in columns] or len(payload["v"]) != len(columns):
+            raise ValueError("cursor does not match ordering")
+        return [_decode_value(column, value) for column, value in zip(columns, payload["v"])]
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+
+def keyset_paginate(
+    query: Query,
+    columns: Sequence[ColumnElement],
+    limit: int,
+    cursor: Optional[str] = None,
+    descending: bool = False
+) -> KeysetPage:
+    """Fetch one page of query ordered by columns, starting after cursor"""
+    if cursor:
+        values = decode_cursor(columns, cursor)
+        if len(columns) == 1:
+            key, bound = columns[0], values[0]
+        else:
+            key, bound = tuple_(*columns), tuple_(*values)
+        query = query.filter(key < bound if descending else key > bound)
+
+    order_by = [column.desc() if descending else column.asc() for column in columns]
+    rows = query.order_by(*order_by).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    if has_more:
+        rows = rows[:limit]
+    next_cursor = encode_cursor(columns, rows[-1]) if has_more and rows else None
+
+    return KeysetPage(rows, has_more, next_cursor)
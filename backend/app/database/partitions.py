@@ -0,0 +1,94 @@
+"""
+Monthly range partitions of story_chat_histories.
+
+Partitions are named story_chat_histories_yYYYYmMM and cover
+[first day of month, first day of next month) on created_at.
+"""
+from datetime import date, datetime, timezone
+from typing import List, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+import logging
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "story_chat_histories"
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    month_index = value.year * 12 + value.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(start: date) -> str:
+    return f"{PARENT_TABLE}_y{start.year:04d}m{start.month:02d}"
+
+
+def partition_start(name: str) -> date:
+    suffix = name[len(PARENT_TABLE) + 2:]
+    year, month = suffix.split("m")
+    return date(int(year), int(month), 1)
+
+
+def list_partitions(conn: Connection) -> List[str]:
+    """Names of the partitions currently attached to story_chat_histories"""
+    rows = conn.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+        JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+        WHERE parent.relname = :parent
+        ORDER BY child.relname
+    """), {"parent": PARENT_TABLE})
+    return [row[0] for row in rows]
+
+
+def detached_partitions(conn: Connection) -> List[str]:
+    """Monthly tables that were detached but not yet archived and dropped"""
+    rows = conn.execute(text("""
+        SELECT relname
+        FROM pg_class
+        WHERE relkind = 'r'
+          AND NOT relispartition
+          AND relname LIKE :pattern
+        ORDER BY relname
+    """), {"pattern": f"{PARENT_TABLE}\\_y%"})
+    return [row[0] for row in rows]
+
+
+def create_partition(conn: Connection, start: date) -> str:
+    """Create the monthly partition starting at start (no-op if it exists)"""
+    name = partition_name(start)
+    end = add_months(start, 1)
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+    return name
+
+
+def ensure_partitions(conn: Connection, months_ahead: int, today: date = None) -> List[str]:
+    """Make sure partitions exist from the current month through months_ahead"""
+    current = month_start(today or datetime.now(timezone.utc).date())
+    created = []
+    for offset in range(months_ahead + 1):
+        created.append(create_partition(conn, add_months(current, offset)))
+    return created
+
+
+def expired_partitions(conn: Connection, retention_months: int, today: date = None) -> List[Tuple[str, date]]:
+    """Attached partitions that end before the retention cutoff, oldest first"""
+    cutoff = add_months(month_start(today or datetime.now(timezone.utc).date()), -retention_months)
+    expired = []
+    for name in list_partitions(conn):
+        try:
+            start = partition_start(name)
+        except ValueError:
+            continue
+        if add_months(start, 1) <= cutoff:
+            expired.append((name, start))
+    return expired
@@ -0,0 +1,83 @@
+"""
+pytest fixtures that fail a test when an endpoint goes over its query budget.
+
+Enable in a conftest.py with ``pytest_plugins = ["app.database.pytest_plugin"]``.
+
+``query_budget_client`` is a FastAPI TestClient for the ``app`` fixture
+(app.main.app unless overridden). Every request it sends to a route with a
+``@query_budget`` is checked against that budget, and any statement repeated
+``sql_n_plus_one_threshold`` times fails the test as a likely N+1, with the
+offending SQL in the failure message. ``query_stats`` records the statements
+of arbitrary code inside a test.
+"""
+from typing import Iterator
+from urllib.parse import urlsplit
+import pytest
+from fastapi.testclient import TestClient
+from app.database.instrumentation import QueryStats
+from app.database.query_budget import QueryCounter, declared_query_budget
+
+
+class StatsCounter(QueryCounter):
+    """QueryCounter that also fingerprints statements
+
+    Unlike record_queries it listens process-wide, so it sees the statements
+    TestClient runs on its own event loop thread.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.stats = QueryStats()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        super()._before_cursor_execute(conn, cursor, statement, parameters, context, executemany)
+        self.stats.add(statement, 0.0)
+
+
+def _describe(stats: QueryStats) -> str:
+    return "\n".join(
+        f"  {count}x [{key}] {stats.examples[key]}" for key, count in stats.fingerprints.most_common()
+    )
+
+
+class QueryBudgetClient(TestClient):
+    """TestClient that fails the test when a request exceeds its route's query budget or repeats a statement"""
+
+    def request(self, method, url, *args, **kwargs):
+        path = urlsplit(str(url)).path
+        budget = declared_query_budget(self.app, method, path)
+        with StatsCounter() as counter:
+            response = super().request(method, url, *args, **kwargs)
+        stats = counter.stats
+
+        if budget is not None and stats.count > budget:
+            pytest.fail(
+                f"{method.upper()} {path} issued {stats.count} queries, budget is {budget}:\n{_describe(stats)}",
+                pytrace=False
+            )
+        repeated = stats.repeated()
+        if repeated:
+            pytest.fail(
+                f"{method.upper()} {path} repeated statements (likely N+1):\n"
+                + "\n".join(f"  {r.count}x [{r.fingerprint}] {r.statement}" for r in repeated),
+                pytrace=False
+            )
+        return response
+
+
+@pytest.fixture
+def app():
+    from app.main import app as fastapi_app
+    return fastapi_app
+
+
+@pytest.fixture
+def query_budget_client(app) -> Iterator[QueryBudgetClient]:
+    with QueryBudgetClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def query_stats() -> Iterator[QueryStats]:
+    with StatsCounter() as counter:
+        yield counter.stats
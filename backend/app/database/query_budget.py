@@ -0,0 +1,88 @@
+"""
+Per-endpoint SQL query budgets.
+
+Routes declare how many statements one request may issue with the
+``query_budget`` decorator (placed below ``@router.get``). ``assert_query_budget``
+sends a request through a test client while counting statements on every
+engine, and fails with the offending statements listed when the route goes
+over its budget, which is how accidental lazy loads (N+1) show up. The
+pytest fixtures in app/database/pytest_plugin.py apply the same check to
+every request a test sends.
+"""
+from typing import Callable, Iterator, List, Optional
+from urllib.parse import urlsplit
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a request issues more SQL statements than its budget"""
+    pass
+
+
+class QueryCounter:
+    """Context manager recording the SQL statements executed on an engine (all engines by default)"""
+
+    def __init__(self, bind=Engine):
+        self.bind = bind
+        self.statements: List[str] = []
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.bind, "before_cursor_execute", self._before_cursor_execute)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        event.remove(self.bind, "before_cursor_execute", self._before_cursor_execute)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+def query_budget(max_queries: int) -> Callable:
+    """Declare the maximum number of SQL statements an endpoint may issue"""
+    def decorator(func: Callable) -> Callable:
+        func.__query_budget__ = max_queries
+        return func
+    return decorator
+
+
+def _api_routes(routes) -> Iterator[APIRoute]:
+    for route in routes:
+        if isinstance(route, APIRoute):
+            yield route
+        # Routers included into the app may be wrapped rather than flattened
+        included = getattr(route, "original_router", None)
+        if included is not None:
+            yield from _api_routes(included.routes)
+
+
+def declared_query_budget(app: FastAPI, method: str, path: str) -> Optional[int]:
+    """Budget declared on the route that serves method + path, if any"""
+    for route in _api_routes(app.routes):
+        if method.upper() in route.methods and route.path_regex.match(path):
+            return getattr(route.endpoint, "__query_budget__", None)
+    return None
+
+
+def assert_query_budget(client, method: str, url: str, **kwargs):
+    """Send a request with a (FastAPI) test client and enforce the route's query budget"""
+    path = urlsplit(url).path
+    budget = declared_query_budget(client.app, method, path)
+    if budget is None:
+        raise QueryBudgetExceeded(f"No query budget declared for {method.upper()} {path}")
+
+    with QueryCounter() as counter:
+        response = client.request(method, url, **kwargs)
+
+    if counter.count > budget:
+        statements = "\n".join(f"  {i + 1}. {statement}" for i, statement in enumerate(counter.statements))
+        raise QueryBudgetExceeded(
+            f"{method.upper()} {path} issued {counter.count} queries, budget is {budget}:\n{statements}"
+        )
+    return response
@@ -0,0 +1,196 @@
+"""
+Data retention: batched, resumable purges of data nobody will read again.
+
+Each policy deletes rows in primary-key order with set-based statements of
+the form ``DELETE ... WHERE id IN (SELECT id ... ORDER BY id LIMIT n)``, one
+short transaction per batch, so no statement holds locks for long and the
+ORM never loads child rows to cascade them. The last id handled is
+checkpointed in Redis after every batch; an interrupted run picks up where it
+stopped. Between batches the purge sleeps, and it backs off while any read
+replica lags behind.
+"""
+from typing import Callable, Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+import logging
+import time
+from sqlalchemy import delete, exists, func, select
+from sqlalchemy.engine import Connection, Engine
+from app.config import settings
+from app.database.models import (
+    Chat,
+    ChatMessage,
+    Profile,
+    RefreshToken,
+    StoryChatHistory,
+    StoryChatHistoryStatus,
+    StoryUserMatch,
+    User,
+)
+from app.database.routing import replica_router
+from app.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_KEY = "retention:checkpoint:{policy}"
+
+
+def _inactive_chat_histories(conn: Connection, after_id: int, limit: int, now: datetime) -> List[int]:
+    """Soft-deleted messages past their grace period, with their status audit rows"""
+    cutoff = now - timedelta(days=settings.inactive_chat_history_retention_days)
+    ids = conn.execute(
+        select(StoryChatHistory.id)
+        .where(
+            StoryChatHistory.id > after_id,
+            StoryChatHistory.is_active == False,
+            StoryChatHistory.created_at < cutoff
+        )
+        .order_by(StoryChatHistory.id)
+        .limit(limit)
+    ).scalars().all()
+    if ids:
+        conn.execute(delete(StoryChatHistoryStatus).where(StoryChatHistoryStatus.story_chat_history_id.in_(ids)))
+        conn.execute(
+            delete(StoryChatHistory).where(
+                StoryChatHistory.id.in_(ids),
+                StoryChatHistory.created_at < cutoff
+            )
+        )
+    return ids
+
+
+def _stale_status_rows(conn: Connection, after_id: int, limit: int, now: datetime) -> List[int]:
+    """Status audit rows older than the audit retention window"""
+    cutoff = now - timedelta(days=settings.chat_status_audit_retention_days)
+    ids = conn.execute(
+        select(StoryChatHistoryStatus.id)
+        .where(StoryChatHistoryStatus.id > after_id, StoryChatHistoryStatus.created_at < cutoff)
+        .order_by(StoryChatHistoryStatus.id)
+        .limit(limit)
+    ).scalars().all()
+    if ids:
+        conn.execute(delete(StoryChatHistoryStatus).where(StoryChatHistoryStatus.id.in_(ids)))
+    return ids
+
+
+def _expired_anonymous_users(conn: Connection, after_id: int, limit: int, now: datetime) -> List[int]:
+    """Anonymous users with no activity within the retention window, with all their data
+
+    Anonymous sessions are stateless, so activity is the last token refresh
+    (users.updated_at, see UserService.touch_anonymous_user), a recent chat
+    message or story match, or a live refresh token issued before that change.
+    """
+    cutoff = now - timedelta(days=settings.anonymous_user_retention_days)
+    recent_activity = exists().where(
+        StoryChatHistory.user_id == User.id,
+        StoryChatHistory.created_at >= cutoff
+    )
+    recent_match = exists().where(
+        StoryUserMatch.user_id == User.id,
+        StoryUserMatch.created_at >= cutoff
+    )
+    live_token = exists().where(
+        RefreshToken.user_id == User.id,
+        RefreshToken.expires_at >= now,
+        RefreshToken.revoked_at.is_(None)
+    )
+    ids = conn.execute(
+        select(User.id)
+        .where(
+            User.id > after_id,
+            User.is_anonymous == True,
+            User.created_at < cutoff,
+            func.coalesce(User.updated_at, User.created_at) < cutoff,
+            ~live_token,
+            ~recent_activity,
+            ~recent_match
+        )
+        .order_by(User.id)
+        .limit(limit)
+    ).scalars().all()
+    if ids:
+        history_ids = select(StoryChatHistory.id).where(StoryChatHistory.user_id.in_(ids))
+        conn.execute(delete(StoryChatHistoryStatus).where(StoryChatHistoryStatus.story_chat_history_id.in_(history_ids)))
+        for model in (StoryChatHistory, StoryUserMatch, Profile, ChatMessage, Chat, RefreshToken):
+            conn.execute(delete(model).where(model.user_id.in_(ids)))
+        conn.execute(delete(User).where(User.id.in_(ids)))
+    return ids
+
+
+def _expired_refresh_tokens(conn: Connection, after_id: int, limit: int, now: datetime) -> List[int]:
+    """Refresh tokens past their expiry; revoked ones are kept until then for reuse detection"""
+    ids = conn.execute(
+        select(RefreshToken.id)
+        .where(RefreshToken.id > after_id, RefreshToken.expires_at < now)
+        .order_by(RefreshToken.id)
+        .limit(limit)
+    ).scalars().all()
+    if ids:
+        conn.execute(delete(RefreshToken).where(RefreshToken.id.in_(ids)))
+    return ids
+
+
+# Policy name -> batch function(conn, after_id, limit, now) returning the ids it handled
+RETENTION_POLICIES: Dict[str, Callable[[Connection, int, int, datetime], List[int]]] = {
+    "inactive_chat_histories": _inactive_chat_histories,
+    "stale_status_rows": _stale_status_rows,
+    "expired_refresh_tokens": _expired_refresh_tokens,
+    "expired_anonymous_users": _expired_anonymous_users,
+}
+
+
+def _load_checkpoint(policy: str) -> int:
+    value = redis_client.get(CHECKPOINT_KEY.format(policy=policy))
+    return int(value) if value else 0
+
+
+def _save_checkpoint(policy: str, last_id: Optional[int]) -> None:
+    key = CHECKPOINT_KEY.format(policy=policy)
+    if last_id is None:
+        redis_client.delete(key)
+    else:
+        redis_client.set(key, last_id)
+
+
+def _wait_for_replicas(deadline: float) -> bool:
+    """Sleep while a replica lags behind; False if the deadline passes first"""
+    while True:
+        lag = replica_router.max_lag_seconds()
+        if lag is None or lag <= settings.replica_max_lag_seconds:
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        logger.info(f"Retention purge paused, replica lag {lag:.1f}s")
+        time.sleep(settings.replica_lag_check_interval_seconds)
+
+
+def run_retention_policy(engine: Engine, policy: str, deadline: float) -> dict:
+    """Purge one policy in batches until it is done or the deadline passes"""
+    batch = RETENTION_POLICIES[policy]
+    after_id = _load_checkpoint(policy)
+    deleted = 0
+    finished = False
+
+    while time.monotonic() < deadline:
+        if not _wait_for_replicas(deadline):
+            break
+        with engine.begin() as conn:
+            ids = batch(conn, after_id, settings.retention_batch_size, datetime.now(timezone.utc))
+        deleted += len(ids)
+
+        if len(ids) < settings.retention_batch_size:
+            # Pass complete; the next run starts again from the lowest id
+            _save_checkpoint(policy, None)
+            finished = True
+            break
+        after_id = ids[-1]
+        _save_checkpoint(policy, after_id)
+        time.sleep(settings.retention_batch_pause_seconds)
+
+    logger.info(f"Retention policy {policy}: {deleted} rows purged, finished={finished}")
+    return {"deleted": deleted, "finished": finished, "checkpoint": None if finished else after_id}
+
+
+def run_retention(engine: Engine, max_seconds: Optional[float] = None) -> Dict[str, dict]:
+    """Run every retention policy within one shared time budget"""
+    deadline = time.monotonic() + (max_seconds or settings.retention_max_run_seconds)
+    return {policy: run_retention_policy(engine, policy, deadline) for policy in RETENTION_POLICIES}
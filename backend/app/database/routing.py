@@ -0,0 +1,154 @@
+"""
+Read routing between the primary and read replicas.
+
+Read-only GET endpoints depend on get_read_db, which hands out a session on a
+replica whose replay lag is within replica_max_lag_seconds, falling back to the
+primary. Writes keep using get_db / SessionLocal on the primary. After a user
+writes chat data their reads go to the primary for a short window
+(read-your-writes), tracked in Redis so it holds across API workers.
+"""
+from typing import Iterator, List, Optional, Dict, Tuple
+from contextlib import contextmanager
+import itertools
+import threading
+import time
+import logging
+from fastapi import Depends
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker, Session
+from app.config import settings
+from app.database.connection import engine
+from app.api.jwt_auth import get_current_user_or_anonymous
+from app.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Replay lag in seconds; 0 when the replica has applied everything it received
+REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+RECENT_WRITE_KEY = "db:recent_write:user:{user_id}"
+
+
+class ReplicaRouter:
+    """Round-robin over replicas, skipping ones that are down or lagging"""
+
+    def __init__(self, urls: List[str], max_lag: float, check_interval: float):
+        self.engines: List[Engine] = [
+            create_engine(url, pool_pre_ping=True, pool_recycle=300, echo=settings.debug)
+            for url in urls
+        ]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._lag: Dict[int, Tuple[float, Optional[float]]] = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def _replica_lag(self, index: int) -> Optional[float]:
+        """Cached replay lag of a replica, None when it cannot be reached"""
+        now = time.monotonic()
+        checked = self._lag.get(index)
+        if checked and now - checked[0] < self.check_interval:
+            return checked[1]
+
+        try:
+            with self.engines[index].connect() as conn:
+                lag = float(conn.execute(text(REPLICA_LAG_SQL)).scalar() or 0)
+        except Exception as e:
+            logger.warning(f"Replica {index} lag check failed: {e}")
+            lag = None
+
+        self._lag[index] = (now, lag)
+        if lag is not None and lag > self.max_lag:
+            logger.warning(f"Replica {index} is lagging by {lag:.1f}s")
+        return lag
+
+    def max_lag_seconds(self) -> Optional[float]:
+        """Worst replay lag over all reachable replicas, None without replicas"""
+        lags = [lag for lag in (self._replica_lag(i) for i in range(len(self.engines))) if lag is not None]
+        return max(lags) if lags else None
+
+    def get_read_engine(self) -> Engine:
+        """A healthy replica engine, or the primary when none qualifies"""
+        if not self.engines:
+            return engine
+
+        with self._lock:
+            start = next(self._counter)
+        for i in range(len(self.engines)):
+            index = (start + i) % len(self.engines)
+            lag = self._replica_lag(index)
+            if lag is not None and lag <= self.max_lag:
+                return self.engines[index]
+        return engine
+
+
+replica_router = ReplicaRouter(
+    settings.replica_urls,
+    max_lag=settings.replica_max_lag_seconds,
+    check_interval=settings.replica_lag_check_interval_seconds
+)
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+
+def mark_user_write(user_id: int) -> None:
+    """Pin the user's reads to the primary for the read-your-writes window"""
+    if not replica_router.engines:
+        return
+    try:
+        redis_client.set(
+            RECENT_WRITE_KEY.format(user_id=user_id), 1,
+            ex=settings.replica_read_your_writes_seconds
+        )
+    except Exception as e:
+        logger.warning(f"Could not record recent write for user {user_id}: {e}")
+
+
+def has_recent_write(user_id: int) -> bool:
+    if not replica_router.engines:
+        return False
+    try:
+        return bool(redis_client.exists(RECENT_WRITE_KEY.format(user_id=user_id)))
+    except Exception as e:
+        # Without the marker we cannot prove the replica is fresh enough
+        logger.warning(f"Could not check recent write for user {user_id}: {e}")
+        return True
+
+
+@contextmanager
+def read_session(bind: Optional[Engine] = None) -> Iterator[Session]:
+    """A read session outside of request dependencies, e.g. on a cache miss (a replica unless bind is given)"""
+    db = ReadSessionLocal(bind=bind or replica_router.get_read_engine())
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db() -> Session:
+    """Get a read-only database session on a replica (or the primary)"""
+    db = ReadSessionLocal(bind=replica_router.get_read_engine())
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def user_read_engine(user_id: int) -> Engine:
+    """The primary right after the user wrote, a replica otherwise"""
+    return engine if has_recent_write(user_id) else replica_router.get_read_engine()
+
+
+def get_user_read_db(user_id: int = Depends(get_current_user_or_anonymous)) -> Session:
+    """Like get_read_db, but reads from the primary right after the user wrote"""
+    db = ReadSessionLocal(bind=user_read_engine(user_id))
+    try:
+        yield db
+    finally:
+        db.close()
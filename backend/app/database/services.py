@@ -1,37 +1,200 @@
 from sqlalchemy.orm import Session, selectinload, joinedload, load_only
-from sqlalchemy import and_, desc
+from sqlalchemy import and_, desc, select, delete, func
+from sqlalchemy.engine import Row
+from collections import defaultdict
 from typing import List, Optional
-from .models import Character, Story, StoryChatHistory, StoryUserMatch, CharacterImage as CharacterImageModel
+from .pagination import KeysetPage, keyset_paginate
+from .models import Character, Story, StoryChatHistory, StoryUserMatch, CharacterImage as CharacterImageModel, Tag, CharacterTag
+from .connection import dialect_insert
+from app.api.responses import validate_list
 from app.character.schemas import (
     CharacterWithStoriesSchema, StoryWithCharacterSchema, StoryWithRelationsSchema,
-    CharacterDetailResponse, StoryDetailResponse, StoryChatHistoryWithRelationsSchema, CharacterImageSchema, CharacterProfileResponse
+    CharacterDetailResponse, StoryDetailResponse, StoryChatHistoryWithRelationsSchema, CharacterImageSchema, CharacterProfileResponse,
+    CharacterBaseSchema, StoryBaseSchema, TagCountResponse
 )
 
-class CharacterService:
+# Explicit column projections for list endpoints. Querying columns instead of
+# entities returns plain rows: no identity-map hydration and no lazy loads, and
+# each row maps directly onto a response model.
+CHARACTER_COLUMNS = (
+    Character.id,
+    Character.created_at,
+    Character.name,
+    Character.description,
+    Character.system_prompt,
+    Character.tag_list,
+    Character.main_image_url,
+)
+
+STORY_COLUMNS = (
+    Story.id,
+    Story.created_at,
+    Story.character_id,
+    Story.storyline,
+    Story.description,
+    Story.background_image_url,
+    Story.is_active,
+)
+
+STORY_CHARACTER_COLUMNS = STORY_COLUMNS + (
+    Character.name.label("character_name"),
+    Character.description.label("character_description"),
+    Character.system_prompt.label("character_system_prompt"),
+    Character.tag_list.label("character_tag_list"),
+    Character.main_image_url.label("character_main_image_url"),
+)
+
+CHARACTER_IMAGE_COLUMNS = (
+    CharacterImageModel.id,
+    CharacterImageModel.created_at,
+    CharacterImageModel.character_id,
+    CharacterImageModel.image_url,
+    CharacterImageModel.offset,
+    CharacterImageModel.bounty,
+    CharacterImageModel.is_active,
+    CharacterImageModel.image_variants,
+    CharacterImageModel.image_placeholder,
+)
+
+
+def story_with_character_from_row(row: Row) -> StoryWithCharacterSchema:
+    """Map a STORY_CHARACTER_COLUMNS row onto StoryWithCharacterSchema"""
+    return StoryWithCharacterSchema(
+        id=row.id,
+        created_at=row.created_at,
+        character_id=row.character_id,
+        storyline=row.storyline,
+        description=row.description,
+        background_image_url=row.background_image_url,
+        is_active=row.is_active,
+        character=CharacterBaseSchema(
+            name=row.character_name,
+            description=row.character_description,
+            system_prompt=row.character_system_prompt,
+            tag_list=row.character_tag_list,
+            main_image_url=row.character_main_image_url
+        )
+    )
+
+def parse_tag_list(tag_list: Optional[str]) -> List[str]:
+    """Split a comma-joined tag_list into unique, trimmed tag names (order kept)"""
+    names = []
+    for raw in (tag_list or "").split(","):
+        name = raw.strip()[:64]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def tagged_character_ids(tags: List[str], match_all: bool = True):
+    """Subquery of character ids carrying all (AND) or any (OR) of the tags
+
+    The tags are normalized like stored ones (parse_tag_list), so ' romance' matches 'romance'.
+    """
+    names = parse_tag_list(",".join(tags))
+    query = (
+        select(CharacterTag.character_id)
+        .join(Tag, Tag.id == CharacterTag.tag_id)
+        .where(Tag.name.in_(names))
+    )
+    if match_all:
+        return query.group_by(CharacterTag.character_id).having(func.count(CharacterTag.tag_id) == len(names))
+    return query.distinct()
+
+
+class TagService:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_characters(self, limit: Optional[int] = None, include_inactive: bool = False) -> List[CharacterWithStoriesSchema]:
-        """Get list of characters with their stories"""
-        query = (
-            self.db.query(Character)
-            .options(
-                load_only(
-                    Character.id,
-                    Character.description,
-                    Character.tag_list,
-                ),
-                selectinload(Character.stories).load_only(
-                    Story.id,
-                    Story.storyline,
-                    Story.description,
-                    Story.background_image_url
-                )
+    def set_character_tags(self, character: Character, tag_list: Optional[str]) -> List[str]:
+        """Replace a character's tags and keep the legacy tag_list string in sync (caller commits)"""
+        names = parse_tag_list(tag_list)
+        character.tag_list = ",".join(names)
+        self.db.flush()
+
+        tag_ids = []
+        if names:
+            insert = dialect_insert(self.db)
+            self.db.execute(
+                insert(Tag).values([{"name": name} for name in names])
+                .on_conflict_do_nothing(index_elements=["name"])
+            )
+            tag_ids = list(self.db.execute(select(Tag.id).where(Tag.name.in_(names))).scalars())
+
+        self.db.execute(
+            delete(CharacterTag).where(
+                CharacterTag.character_id == character.id,
+                CharacterTag.tag_id.notin_(tag_ids)
             )
         )
-            
-        characters = query.all()
-        return [CharacterWithStoriesSchema.model_validate(char) for char in characters]
+        if tag_ids:
+            self.db.execute(
+                dialect_insert(self.db)(CharacterTag)
+                .values([{"character_id": character.id, "tag_id": tag_id} for tag_id in tag_ids])
+                .on_conflict_do_nothing()
+            )
+        return names
+
+    def get_tag_counts(self) -> List[TagCountResponse]:
+        """Characters and active stories per tag, counted from the join table"""
+        character_counts = (
+            self.db.query(Tag.id, Tag.name, func.count(CharacterTag.character_id).label("character_count"))
+            .join(CharacterTag, CharacterTag.tag_id == Tag.id)
+            .group_by(Tag.id, Tag.name)
+            .all()
+        )
+        story_counts = dict(
+            self.db.query(CharacterTag.tag_id, func.count(Story.id))
+            .join(Story, Story.character_id == CharacterTag.character_id)
+            .filter(Story.is_active == True)
+            .group_by(CharacterTag.tag_id)
+            .all()
+        )
+        counts = [
+            TagCountResponse(
+                name=row.name,
+                character_count=row.character_count,
+                story_count=story_counts.get(row.id, 0)
+            )
+            for row in character_counts
+        ]
+        return sorted(counts, key=lambda tag: (-tag.character_count, tag.name))
+
+
+class CharacterService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_characters(
+        self,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        match_all: bool = True
+    ) -> KeysetPage:
+        """Get a page of characters with their stories, ordered by id (two queries)"""
+        query = self.db.query(*CHARACTER_COLUMNS)
+        if tags:
+            query = query.filter(Character.id.in_(tagged_character_ids(tags, match_all)))
+        page = keyset_paginate(query, [Character.id], limit, cursor)
+
+        stories_by_character = defaultdict(list)
+        character_ids = [row.id for row in page.items]
+        if character_ids:
+            story_rows = (
+                self.db.query(*STORY_COLUMNS)
+                .filter(Story.character_id.in_(character_ids))
+                .order_by(Story.id)
+                .all()
+            )
+            for story in validate_list(StoryBaseSchema, story_rows):
+                stories_by_character[story.character_id].append(story)
+
+        page.items = [
+            CharacterWithStoriesSchema(**row._mapping, stories=stories_by_character[row.id])
+            for row in page.items
+        ]
+        return page
 
     def get_all_characters(self, limit: Optional[int] = None) -> List[CharacterWithStoriesSchema]:
         """Get all characters with their stories (including inactive)"""
@@ -102,60 +265,36 @@ class CharacterService:
 
     def get_character_photos(self, character_id: int, active_only: bool = True) -> List[CharacterImageSchema]:
         """Get all photos for a specific character"""
-        query = self.db.query(CharacterImageModel).filter(CharacterImageModel.character_id == character_id)
+        query = self.db.query(*CHARACTER_IMAGE_COLUMNS).filter(CharacterImageModel.character_id == character_id)
         
         if active_only:
             query = query.filter(CharacterImageModel.is_active == True)
         
         images = query.order_by(CharacterImageModel.offset).all()
-        return [CharacterImageSchema.model_validate(img) for img in images]
-
-    def get_popular_characters(self, limit: int = 10) -> List[CharacterWithStoriesSchema]:
-        """Get popular characters with their stories"""
-        characters = (
-            self.db.query(Character)
-            .options(
-                selectinload(Character.stories),
-                selectinload(Character.images)
-            )
-            .filter(Character.is_popular == True)
-            .order_by(Character.rank)
-            .limit(limit)
-            .all()
-        )
-        
-        return [CharacterWithStoriesSchema.model_validate(char) for char in characters]
+        return validate_list(CharacterImageSchema, images)
 
 class StoryService:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_stories(self, limit: int, cursor: int = None) -> List[StoryWithCharacterSchema]:
-        """Get all stories with their characters"""
-        query = (
-            self.db.query(Story)
-            .options(
-                joinedload(Story.character).selectinload(Character.images)
-            )
-            .order_by(Story.id)
-            .filter(Story.is_active == True)
-        )
-        if cursor:
-            query = query.filter(Story.id < cursor)
+    def _story_with_character_query(self):
+        return self.db.query(*STORY_CHARACTER_COLUMNS).join(Character, Story.character_id == Character.id)
 
-        return query.limit(limit).all()
+    def get_stories(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        match_all: bool = True
+    ) -> KeysetPage:
+        """Get a page of active stories with their characters, ordered by id"""
+        query = self._story_with_character_query().filter(Story.is_active == True)
+        if tags:
+            query = query.filter(Story.character_id.in_(tagged_character_ids(tags, match_all)))
 
-    def get_popular_stories(self, limit: int = 10) -> List[StoryWithCharacterSchema]:
-        query = (
-            self.db.query(Story)
-            .options(
-                joinedload(Story.character).selectinload(Character.images)
-            )
-            .order_by(Story.id)
-            .filter(Story.is_active == True)
-            .filter(Story.is_popular == True)
-        )
-        return query.limit(limit).all()
+        page = keyset_paginate(query, [Story.id], limit, cursor)
+        page.items = [story_with_character_from_row(row) for row in page.items]
+        return page
 
     def get_story_with_character(self, story_id: int) -> Optional[StoryWithCharacterSchema]:
         """Get story with character information"""
@@ -193,34 +332,31 @@ class StoryService:
 
     def get_stories_by_character(self, character_id: int) -> List[StoryWithCharacterSchema]:
         """Get all stories for a specific character"""
-        stories = (
-            self.db.query(Story)
-            .options(
-                joinedload(Story.character).selectinload(Character.images)
-            )
+        rows = (
+            self._story_with_character_query()
             .filter(
                 and_(
                     Story.character_id == character_id,
                     Story.is_active == True
                 )
             )
+            .order_by(Story.id)
             .all()
         )
         
-        return [StoryWithCharacterSchema.model_validate(story) for story in stories]
+        return [story_with_character_from_row(row) for row in rows]
 
     def get_user_story_matches(self, user_id: int) -> List[StoryWithCharacterSchema]:
         """Get all stories a user has matched with"""
-        matches = (
-            self.db.query(StoryUserMatch)
-            .options(
-                joinedload(StoryUserMatch.story).joinedload(Story.character).selectinload(Character.images)
-            )
+        rows = (
+            self._story_with_character_query()
+            .join(StoryUserMatch, StoryUserMatch.story_id == Story.id)
             .filter(StoryUserMatch.user_id == user_id)
+            .order_by(StoryUserMatch.id)
             .all()
         )
         
-        return [StoryWithCharacterSchema.model_validate(match.story) for match in matches]
+        return [story_with_character_from_row(row) for row in rows]
 
 class ChatHistoryService:
     def __init__(self, db: Session):
@@ -231,9 +367,9 @@ class ChatHistoryService:
         user_id: int, 
         story_id: int, 
         limit: int = 20,
-        cursor: Optional[int] = None
-    ) -> List[StoryChatHistoryWithRelationsSchema]:
-        """Get chat history with all related information"""
+        cursor: Optional[str] = None
+    ) -> KeysetPage:
+        """Get a page of chat history (newest first) with all related information"""
         query = (
             self.db.query(StoryChatHistory)
             .options(
@@ -251,12 +387,11 @@ class ChatHistoryService:
             )
         )
         
-        if cursor:
-            query = query.filter(StoryChatHistory.id < cursor)
-        
-        messages = query.order_by(StoryChatHistory.id).limit(limit).all()
-        
-        return [StoryChatHistoryWithRelationsSchema.model_validate(msg) for msg in messages]
+        page = keyset_paginate(
+            query, [StoryChatHistory.created_at, StoryChatHistory.id], limit, cursor, descending=True
+        )
+        page.items = [StoryChatHistoryWithRelationsSchema.model_validate(msg) for msg in page.items]
+        return page
 
     def get_latest_chat_with_character_info(
         self, 
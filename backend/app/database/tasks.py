@@ -0,0 +1,39 @@
+from celery_app import celery_app
+from app.config import settings
+from app.database.connection import engine
+from app.database.partitions import ensure_partitions
+from app.database.archive import archive_expired_partitions
+from app.database.retention import run_retention
+from app.redis_client import redis_client
+from app.storage.backends import get_storage
+import logging
+
+logger = logging.getLogger(__name__)
+
+@celery_app.task
+def create_chat_history_partitions() -> dict:
+    """Create upcoming monthly partitions of story_chat_histories ahead of time"""
+    with engine.begin() as conn:
+        partitions = ensure_partitions(conn, settings.chat_history_partitions_ahead)
+    logger.info(f"Ensured chat history partitions: {partitions}")
+    return {"partitions": partitions}
+
+@celery_app.task
+def archive_chat_history_partitions() -> dict:
+    """Detach and export story_chat_histories partitions past the retention window"""
+    storage = get_storage(settings.chat_archive_storage_url)
+    archived = archive_expired_partitions(engine, storage, settings.chat_history_retention_months)
+    logger.info(f"Archived chat history partitions: {archived}")
+    return {"archived": archived}
+
+@celery_app.task
+def purge_expired_data() -> dict:
+    """Run the retention purge; overlapping runs are skipped"""
+    lock = redis_client.lock("retention:purge", timeout=settings.retention_max_run_seconds * 2, blocking=False)
+    if not lock.acquire(blocking=False):
+        logger.info("Retention purge already running, skipping")
+        return {"skipped": True}
+    try:
+        return run_retention(engine)
+    finally:
+        lock.release()
@@ -0,0 +1 @@
+# Images module
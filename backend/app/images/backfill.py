@@ -0,0 +1,124 @@
+"""
+Backfill of image variants for rows created before the image pipeline.
+
+Profiles and character images without image_variants are processed in
+batches: the original is downloaded from its current URL, run through
+process_image, the variants are stored, and the row is pointed at them like a
+new upload would be. Rows whose original cannot be fetched or decoded get an
+empty image_variants ({}) so later runs skip them; their URL is left as is.
+
+Runs as the app.images.tasks.backfill_images Celery task, or once from
+backend/:
+  python -m app.images.backfill [--batch-size 50] [--max-seconds 600]
+"""
+from typing import Callable, Dict
+import argparse
+import logging
+import time
+import httpx
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database.models import CharacterImage, Profile
+from app.images.pipeline import ImageProcessingError, available_formats, process_image
+from app.images.service import ImageService, image_key_prefix, primary_url
+
+logger = logging.getLogger(__name__)
+
+
+def fetch_original(client: httpx.Client, url: str) -> bytes:
+    """Download an original image (size-capped like an upload)"""
+    with client.stream("GET", url) as response:
+        response.raise_for_status()
+        data = b""
+        for chunk in response.iter_bytes():
+            data += chunk
+            if len(data) > settings.image_max_upload_bytes:
+                raise ImageProcessingError("Original image is too large")
+    if not data:
+        raise ImageProcessingError("Original image is empty")
+    return data
+
+
+def _backfill_rows(
+    db: Session,
+    model,
+    url_column: str,
+    kind: str,
+    owner: Callable,
+    variant_size: str,
+    client: httpx.Client,
+    image_service: ImageService,
+    formats,
+    batch_size: int,
+    deadline: float
+) -> Dict[str, int]:
+    counts = {"processed": 0, "failed": 0}
+    last_id = 0
+    while time.monotonic() < deadline:
+        rows = (
+            db.query(model)
+            .filter(model.image_variants.is_(None), model.id > last_id)
+            .order_by(model.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        for row in rows:
+            last_id = row.id
+            url = getattr(row, url_column)
+            try:
+                data = fetch_original(client, url)
+                processed = process_image(data, formats, settings.image_max_pixels)
+            except (httpx.HTTPError, ImageProcessingError) as e:
+                logger.warning(f"Image backfill skipped {model.__tablename__} {row.id} ({url}): {e}")
+                row.image_variants = {}
+                counts["failed"] += 1
+                continue
+            variants = image_service.store_variants(image_key_prefix(kind, owner(row), data), processed)
+            setattr(row, url_column, primary_url(variants[variant_size]))
+            row.image_variants = variants
+            row.image_placeholder = processed.placeholder
+            counts["processed"] += 1
+        db.commit()
+    return counts
+
+
+def backfill_image_variants(db: Session, batch_size: int, max_seconds: float) -> Dict[str, Dict[str, int]]:
+    """Give pre-pipeline profiles and character images their variants, within max_seconds"""
+    formats = available_formats(settings.image_formats_list)
+    if not formats:
+        raise ImageProcessingError("No configured image format can be encoded")
+    deadline = time.monotonic() + max_seconds
+    image_service = ImageService(db)
+    with httpx.Client(timeout=settings.image_backfill_fetch_timeout_seconds, follow_redirects=True) as client:
+        return {
+            "profiles": _backfill_rows(
+                db, Profile, "thumbnail_url", "profiles", lambda row: row.user_id, "thumbnail",
+                client, image_service, formats, batch_size, deadline
+            ),
+            "character_images": _backfill_rows(
+                db, CharacterImage, "image_url", "characters", lambda row: row.character_id, "large",
+                client, image_service, formats, batch_size, deadline
+            ),
+        }
+
+
+def main():
+    from app.database.connection import SessionLocal
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=settings.image_backfill_batch_size)
+    parser.add_argument("--max-seconds", type=float, default=settings.image_backfill_max_run_seconds)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        print(backfill_image_variants(db, args.batch_size, args.max_seconds))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
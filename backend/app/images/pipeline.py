@@ -0,0 +1,138 @@
+"""
+Image processing for profile and character images (needs Pillow).
+
+An upload is decoded once, normalized (EXIF orientation, RGB/RGBA), then
+downscaled step by step from the largest variant to the smallest, and each
+variant is encoded to every configured format (WebP, plus AVIF when Pillow
+supports it). A tiny blurred WebP is returned as a data URI placeholder.
+
+process_image is pure CPU work on bytes and runs in a process pool
+(run_image_pipeline), so it neither blocks the event loop nor holds the GIL
+of the API process.
+"""
+from typing import Dict, List, NamedTuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import base64
+import io
+import threading
+from app.config import settings
+
+# Longest edge in pixels, largest first (each variant is resized from the previous one)
+VARIANT_SIZES = {
+    "large": 1280,
+    "medium": 640,
+    "thumbnail": 160,
+}
+
+PLACEHOLDER_SIZE = 16
+
+ENCODE_OPTIONS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "avif": {"format": "AVIF", "quality": 50, "speed": 6},
+}
+
+CONTENT_TYPES = {
+    "webp": "image/webp",
+    "avif": "image/avif",
+}
+
+
+class ImageProcessingError(Exception):
+    """Raised when an upload cannot be decoded or encoded"""
+    pass
+
+
+class ImageVariant(NamedTuple):
+    size: str
+    format: str
+    width: int
+    height: int
+    data: bytes
+
+
+class ProcessedImage(NamedTuple):
+    width: int
+    height: int
+    variants: List[ImageVariant]
+    placeholder: str
+
+
+def _pil():
+    try:
+        from PIL import Image, ImageFilter, ImageOps, features
+    except ImportError:
+        raise ImageProcessingError("Pillow is required for image processing")
+    return Image, ImageFilter, ImageOps, features
+
+
+def available_formats(requested: List[str]) -> List[str]:
+    """Requested output formats this Pillow build can encode"""
+    _, _, _, features = _pil()
+    return [fmt for fmt in requested if fmt in ENCODE_OPTIONS and features.check(fmt)]
+
+
+def process_image(data: bytes, formats: List[str], max_pixels: int) -> ProcessedImage:
+    """Decode data once and encode every size variant in every format"""
+    Image, ImageFilter, ImageOps, _ = _pil()
+    Image.MAX_IMAGE_PIXELS = max_pixels
+
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            image = ImageOps.exif_transpose(source)
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    except (Image.DecompressionBombError, OSError, ValueError) as e:
+        raise ImageProcessingError(f"Could not decode image: {e}")
+
+    width, height = image.size
+    variants = []
+    current = image
+    for size, edge in VARIANT_SIZES.items():
+        if max(current.size) > edge:
+            current = current.copy()
+            current.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+        for fmt in formats:
+            buffer = io.BytesIO()
+            current.save(buffer, **ENCODE_OPTIONS[fmt])
+            variants.append(ImageVariant(size, fmt, current.width, current.height, buffer.getvalue()))
+
+    tiny = current.copy()
+    tiny.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.Resampling.BILINEAR)
+    tiny = tiny.filter(ImageFilter.GaussianBlur(1))
+    buffer = io.BytesIO()
+    tiny.save(buffer, format="WEBP", quality=30)
+    placeholder = "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+    return ProcessedImage(width, height, variants, placeholder)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_image_pool() -> ProcessPoolExecutor:
+    """Process pool shared by all image uploads of this API process"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=settings.image_process_workers)
+        return _pool
+
+
+def shutdown_image_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+async def run_image_pipeline(data: bytes) -> ProcessedImage:
+    """Run process_image on the process pool without blocking the event loop"""
+    formats = available_formats(settings.image_formats_list)
+    if not formats:
+        raise ImageProcessingError("No configured image format can be encoded")
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_image_pool(), process_image, data, formats, settings.image_max_pixels
+    )
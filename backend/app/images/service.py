@@ -0,0 +1,86 @@
+from typing import Dict, Optional, Tuple
+from fastapi import HTTPException, UploadFile
+from sqlalchemy.orm import Session
+import hashlib
+import io
+from app.config import settings
+from app.database.models import CharacterImage, Profile
+from app.storage.backends import BaseStorage, get_storage
+from app.images.pipeline import CONTENT_TYPES, ImageProcessingError, ProcessedImage, run_image_pipeline
+
+
+def image_key_prefix(kind: str, owner_id: int, data: bytes) -> str:
+    """Content-addressed prefix, so variant URLs are immutable and re-uploads are idempotent"""
+    return f"{kind}/{owner_id}/{hashlib.sha256(data).hexdigest()[:20]}"
+
+
+async def process_upload(file: UploadFile) -> Tuple[bytes, ProcessedImage]:
+    """Read an upload (size-capped) and run it through the image pipeline"""
+    data = await file.read(settings.image_max_upload_bytes + 1)
+    if len(data) > settings.image_max_upload_bytes:
+        raise HTTPException(status_code=413, detail="Image is too large")
+    if not data:
+        raise HTTPException(status_code=400, detail="Empty upload")
+    try:
+        return data, await run_image_pipeline(data)
+    except ImageProcessingError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def primary_url(variant: dict) -> str:
+    """WebP URL of a size variant, or its first format when WebP is disabled"""
+    urls = {key: value for key, value in variant.items() if key not in ("width", "height")}
+    return urls.get("webp") or next(iter(urls.values()))
+
+
+class ImageService:
+    def __init__(self, db: Session, storage: Optional[BaseStorage] = None):
+        self.db = db
+        self.storage = storage or get_storage(settings.image_storage_url, settings.image_public_base_url)
+
+    def store_variants(self, prefix: str, processed: ProcessedImage) -> Dict[str, dict]:
+        """Write every variant and return {size: {"width", "height", <format>: url}}"""
+        variants: Dict[str, dict] = {}
+        for variant in processed.variants:
+            url = self.storage.save(
+                f"{prefix}/{variant.size}.{variant.format}",
+                io.BytesIO(variant.data),
+                CONTENT_TYPES[variant.format]
+            )
+            entry = variants.setdefault(variant.size, {"width": variant.width, "height": variant.height})
+            entry[variant.format] = url
+        return variants
+
+    def set_profile_image(self, user_id: int, processed: ProcessedImage, variants: Dict[str, dict]) -> Optional[Profile]:
+        """Point the user's profile at the new variants"""
+        profile = self.db.query(Profile).filter(Profile.user_id == user_id).first()
+        if not profile:
+            return None
+        profile.thumbnail_url = primary_url(variants["thumbnail"])
+        profile.image_variants = variants
+        profile.image_placeholder = processed.placeholder
+        self.db.commit()
+        self.db.refresh(profile)
+        return profile
+
+    def add_character_image(
+        self,
+        character_id: int,
+        processed: ProcessedImage,
+        variants: Dict[str, dict],
+        offset: int,
+        bounty: int
+    ) -> CharacterImage:
+        """Record a new character image; image_url points at the large variant for older clients"""
+        image = CharacterImage(
+            character_id=character_id,
+            image_url=primary_url(variants["large"]),
+            offset=offset,
+            bounty=bounty,
+            image_variants=variants,
+            image_placeholder=processed.placeholder
+        )
+        self.db.add(image)
+        self.db.commit()
+        self.db.refresh(image)
+        return image
@@ -0,0 +1,28 @@
+from celery_app import celery_app
+from app.config import settings
+from app.database.connection import SessionLocal
+from app.images.backfill import backfill_image_variants
+from app.redis_client import redis_client
+import logging
+
+logger = logging.getLogger(__name__)
+
+@celery_app.task
+def backfill_images() -> dict:
+    """Create variants for pre-pipeline images; rerun until nothing is left (overlapping runs are skipped)"""
+    lock = redis_client.lock(
+        "images:backfill", timeout=settings.image_backfill_max_run_seconds * 2, blocking=False
+    )
+    if not lock.acquire(blocking=False):
+        logger.info("Image backfill already running, skipping")
+        return {"skipped": True}
+    db = SessionLocal()
+    try:
+        result = backfill_image_variants(
+            db, settings.image_backfill_batch_size, settings.image_backfill_max_run_seconds
+        )
+        logger.info(f"Image backfill: {result}")
+        return result
+    finally:
+        db.close()
+        lock.release()
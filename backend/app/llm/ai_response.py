@@ -1,29 +1,44 @@
 from typing import Dict, List
 import logging
+from opentelemetry import trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
 from .client_factory import LLMClientFactory
 
 logger = logging.getLogger(__name__)
 
+tracer = trace.get_tracer(__name__)
+
 
 async def generate_ai_response(
     messages: List[Dict[str, str]],
     model: str
 ) -> str:
-    try:
-        client = LLMClientFactory.create_client(model)
-        logger.info(f"Created client for model: {model} with provider: {client.get_provider_name()}")
-        
-        # Generate response
-        response = await client.generate_response(
-            messages=messages,
-            model=model,
-        )
-        
-        if not response or not response.strip():
-            raise RuntimeError("Generated response is empty")
+    # Clients add gen_ai.usage.* token counts and time to first token to this span
+    with tracer.start_as_current_span(f"llm.generate {model}", kind=SpanKind.CLIENT, attributes={
+        "gen_ai.operation.name": "chat",
+        "gen_ai.request.model": model,
+        "gen_ai.request.message_count": len(messages),
+        "gen_ai.request.input_chars": sum(len(m.get("content") or "") for m in messages),
+    }, record_exception=False, set_status_on_exception=False) as span:
+        try:
+            client = LLMClientFactory.create_client(model)
+            span.set_attribute("gen_ai.system", client.get_provider_name())
+            logger.info(f"Created client for model: {model} with provider: {client.get_provider_name()}")
+            
+            # Generate response
+            response = await client.generate_response(
+                messages=messages,
+                model=model,
+            )
+            
+            if not response or not response.strip():
+                raise RuntimeError("Generated response is empty")
+
+            span.set_attribute("gen_ai.response.output_chars", len(response.strip()))
+            return response.strip()
             
-        return response.strip()
-        
-    except Exception as e:
-        logger.error(f"Failed to generate AI response: {str(e)}")
-        raise RuntimeError(f"AI response generation failed: {str(e)}")
+        except Exception as e:
+            span.record_exception(e)
+            span.set_status(Status(StatusCode.ERROR, type(e).__name__))
+            logger.error(f"Failed to generate AI response: {str(e)}")
+            raise RuntimeError(f"AI response generation failed: {str(e)}")
@@ -2,6 +2,7 @@ from typing import Dict, Type, Optional, List
 from app.llm.clients.base_client import BaseLLMClient, ConfigurationError
 from app.llm.clients.ollama_client import OllamaClient
 from app.llm.clients.gemini_client import GeminiClient
+from app.llm.clients.fake_client import FakeClient
 from app.config import settings
 import logging
 
@@ -46,9 +47,13 @@ class LLMClientFactory:
         return list(cls._model_providers.keys())
     
     @classmethod
-    def register_client(cls, provider: str, client_class: Type[BaseLLMClient]):
-        """Register a new LLM client"""
+    def register_client(cls, provider: str, client_class: Type[BaseLLMClient], models: Optional[List[str]] = None):
+        """Register a new LLM client, optionally with the model names it serves"""
         cls._clients[provider] = client_class
+        for model in models or []:
+            cls._model_providers[model] = provider
+        if models:
+            cls._default_models[provider] = models[0]
         logger.info(f"Registered LLM client: {provider}")
     
     @classmethod
@@ -60,7 +65,7 @@ class LLMClientFactory:
     def create_client(cls, model: str) -> BaseLLMClient:
         """Create an LLM client instance"""
 
-        provider = cls._model_providers[model]
+        provider = cls._model_providers.get(model)
 
         if provider is None:
             raise ConfigurationError(f"Unknown model: {model}")
@@ -70,3 +75,7 @@ class LLMClientFactory:
         
         client_class = cls._clients[provider]
         return client_class()
+
+
+if settings.fake_llm_enabled:
+    LLMClientFactory.register_client("fake", FakeClient, settings.fake_llm_models_list)
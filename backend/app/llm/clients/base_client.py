@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional, AsyncGenerator
 import logging
+from opentelemetry import trace
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +34,21 @@ class BaseLLMClient(ABC):
         """Clean up resources (override if needed)"""
         pass
     
+    def record_usage(
+        self,
+        input_tokens: Optional[int] = None,
+        output_tokens: Optional[int] = None,
+        time_to_first_token: Optional[float] = None,
+    ) -> None:
+        """Add token counts and time to first token (seconds) to the current LLM span"""
+        span = trace.get_current_span()
+        if input_tokens is not None:
+            span.set_attribute("gen_ai.usage.input_tokens", input_tokens)
+        if output_tokens is not None:
+            span.set_attribute("gen_ai.usage.output_tokens", output_tokens)
+        if time_to_first_token is not None:
+            span.set_attribute("gen_ai.response.time_to_first_token", round(time_to_first_token, 4))
+
     def get_provider_name(self) -> str:
         """Get the name of the LLM provider"""
         return self.__class__.__name__.replace("Client", "").lower()
@@ -61,5 +61,6 @@ class ClaudeClient(BaseLLMClient):
             system=system_instruction,
             messages=claude_messages,
         )
+        self.record_usage(input_tokens=response.usage.input_tokens, output_tokens=response.usage.output_tokens)
         return response.content[0].text
 
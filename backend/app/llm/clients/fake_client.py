@@ -0,0 +1,104 @@
+import asyncio
+import hashlib
+import json
+import random
+import time
+from typing import AsyncGenerator, Dict, List
+from app.config import settings
+from app.llm.clients.base_client import BaseLLMClient, GenerationError
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCRIPT = [
+    "오늘 하루는 어땠어? 나는 네 생각을 많이 했어.",
+    "그랬구나. 조금 더 자세히 얘기해 줄래?",
+    "같이 산책이라도 갈까? 바람 쐬면 기분이 나아질 거야.",
+]
+
+FAILURE_MODES = ("timeout", "5xx", "empty")
+
+
+class FakeClient(BaseLLMClient):
+    """Deterministic in-process LLM for offline tests and benchmarks
+
+    The reply depends only on the conversation: fake-echo repeats the last
+    user message, fake-scripted picks a reply from FAKE_LLM_SCRIPT by a hash
+    of the messages. It is paced like a real model (time to first token,
+    then tokens per second). fake-timeout, fake-5xx and fake-empty always
+    fail that way; FAKE_LLM_FAILURE_RATE injects FAKE_LLM_FAILURE_MODE into
+    the other models for a deterministic share of conversations.
+    """
+
+    def get_provider_name(self) -> str:
+        return "fake"
+
+    @staticmethod
+    def _digest(messages: List[Dict[str, str]]) -> str:
+        return hashlib.sha256(json.dumps(messages, ensure_ascii=False, sort_keys=True).encode()).hexdigest()
+
+    def _reply(self, messages: List[Dict[str, str]], model: str, digest: str) -> str:
+        if "scripted" in model:
+            script = [line.strip() for line in settings.fake_llm_script.split("|") if line.strip()] or DEFAULT_SCRIPT
+            return script[int(digest, 16) % len(script)]
+        last_user = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+        return last_user
+
+    def _failure(self, model: str, digest: str) -> str:
+        """Failure mode for this request, or "" to succeed"""
+        for mode in FAILURE_MODES:
+            if model.endswith(f"-{mode}"):
+                return mode
+        if settings.fake_llm_failure_rate > 0:
+            rng = random.Random(f"{settings.fake_llm_seed}:{digest}")
+            if rng.random() < settings.fake_llm_failure_rate:
+                return settings.fake_llm_failure_mode
+        return ""
+
+    async def _fail(self, failure: str, model: str) -> None:
+        if failure == "timeout":
+            await asyncio.sleep(settings.fake_llm_timeout_seconds)
+            raise GenerationError(f"Fake generation timed out after {settings.fake_llm_timeout_seconds}s ({model})")
+        if failure == "5xx":
+            await asyncio.sleep(settings.fake_llm_ttft_seconds)
+            raise GenerationError(f"Fake generation failed: Server error '503 Service Unavailable' ({model})")
+
+    async def stream_response(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+    ) -> AsyncGenerator[str, None]:
+        """Yield the reply token by token (whitespace-separated words)"""
+        digest = self._digest(messages)
+        failure = self._failure(model, digest)
+        await self._fail(failure, model)
+
+        await asyncio.sleep(settings.fake_llm_ttft_seconds)
+        if failure == "empty":
+            return
+        delay = 1.0 / settings.fake_llm_tokens_per_second
+        for i, token in enumerate(self._reply(messages, model, digest).split()):
+            if i:
+                await asyncio.sleep(delay)
+            yield token if i == 0 else f" {token}"
+
+    async def generate_response(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+    ) -> str:
+        """Generate the whole reply, taking as long as streaming it would"""
+        start = time.perf_counter()
+        tokens = []
+        async for token in self.stream_response(messages, model):
+            if not tokens:
+                self.record_usage(time_to_first_token=time.perf_counter() - start)
+            tokens.append(token)
+        self.record_usage(
+            input_tokens=sum(len((m.get("content") or "").split()) for m in messages),
+            output_tokens=len(tokens)
+        )
+        return "".join(tokens)
+
+    async def list_models(self) -> List[Dict[str, str]]:
+        return [{"name": model} for model in settings.fake_llm_models_list]
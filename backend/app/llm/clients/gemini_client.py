@@ -88,6 +88,9 @@ class GeminiClient(BaseLLMClient):
             contents=gemini_messages,
             config=generation_config,
         )
+        usage = response.usage_metadata
+        if usage is not None:
+            self.record_usage(input_tokens=usage.prompt_token_count, output_tokens=usage.candidates_token_count)
         # Extract response text
         if response.text:
             return response.text.strip()
@@ -46,6 +46,13 @@ class OllamaClient(BaseLLMClient):
             response.raise_for_status()
             
             data = response.json()
+            # Non-streaming: the first token follows model load and prompt evaluation (durations in ns)
+            self.record_usage(
+                input_tokens=data.get("prompt_eval_count"),
+                output_tokens=data.get("eval_count"),
+                time_to_first_token=(data.get("load_duration", 0) + data.get("prompt_eval_duration", 0)) / 1e9
+                if "prompt_eval_duration" in data else None
+            )
             return data["message"]["content"]
             
         except Exception as e:
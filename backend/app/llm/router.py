@@ -8,7 +8,8 @@ from app.llm.tasks import (
 )
 from app.llm.client_factory import LLMClientFactory
 from app.config import settings
-from app.chat.chat_service import ChatService
+from app.chat.chat_service import ChatService, STATUS_PENDING, STATUS_CANCELLED
+from app.cache.persona import get_story_persona
 from app.api.jwt_auth import get_current_user_or_anonymous
 from app.profile.services import UserService
 from app.database.connection import get_db
@@ -100,19 +101,46 @@ async def get_chat_history_status(
     db: Session = Depends(get_db)
 ):
     """Get the status of a chat history"""
+    chat_service = ChatService(db)
+    status = chat_service.get_story_chat_history_status(story_chat_history_id)
+    if not status or status.status is None:
+        raise HTTPException(status_code=404, detail="Chat history status not found")
+
     try:
-        chat_service = ChatService(db)
-        status = chat_service.get_story_chat_history_status(story_chat_history_id)
-    
         return ChatHistoryStatusResponse(
             story_chat_history_id=story_chat_history_id,
             status=status.status,
             error_message=status.error_message,
-            elapsed_time=status.elapsed_time
+            elapsed_time=status.elapsed_time or 0
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get chat history status: {str(e)}")
 
+@router.post("/chat_history/{story_chat_history_id}/cancel", response_model=ChatHistoryStatusResponse)
+async def cancel_chat_history(
+    story_chat_history_id: int,
+    user_id: int = Depends(get_current_user_or_anonymous),
+    db: Session = Depends(get_db)
+):
+    """Cancel a pending AI response; a late worker result is then discarded"""
+    chat_service = ChatService(db)
+    chat_history = chat_service.get_story_chat_history_by_id(story_chat_history_id)
+    if not chat_history:
+        raise HTTPException(status_code=404, detail="Chat history not found")
+    if chat_history.user_id != user_id:
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+    if not chat_service.transition_story_chat_history_status(story_chat_history_id, STATUS_CANCELLED):
+        raise HTTPException(status_code=409, detail=f"Cannot cancel chat history in status {chat_history.status}")
+
+    status = chat_service.get_story_chat_history_status(story_chat_history_id)
+    return ChatHistoryStatusResponse(
+        story_chat_history_id=story_chat_history_id,
+        status=status.status,
+        error_message=status.error_message,
+        elapsed_time=status.elapsed_time or 0
+    )
+
 @router.post("/chat", response_model=LLMResponse)
 async def chat_with_llm(
     request: ChatRequest,
@@ -136,13 +164,14 @@ async def chat_with_llm(
         print(f"Final model: {model}")
         
         chat_service = ChatService(db)
-        story = chat_service.get_story(story_id)
-        character = story.character
+        persona = get_story_persona(db, story_id)
+        if persona is None:
+            raise HTTPException(status_code=404, detail="Story not found")
         
         try:
             chat_service.add_message(
                 user_id=user_id,
-                character_id=character.id,
+                character_id=persona.character_id,
                 story_id=story_id,
                 message=request.message,
                 character_image_id=None,
@@ -167,9 +196,8 @@ async def chat_with_llm(
 
         messages = []
         
-        character = chat_service.get_character(character.id)
-        messages.append({"role": "user", "content": f"{character.system_prompt}\n\n이제부터 위의 캐릭터로 완벽하게 연기하며 대화하세요."})
-        messages.append({"role": "model", "content": f"네, 알겠습니다. 지금부터 {character.description} 역할로 대화하겠습니다."})
+        messages.append({"role": "user", "content": f"{persona.system_prompt}\n\n이제부터 위의 캐릭터로 완벽하게 연기하며 대화하세요."})
+        messages.append({"role": "model", "content": f"네, 알겠습니다. 지금부터 {persona.description} 역할로 대화하겠습니다."})
 
         chat_history = chat_service.get_user_chat_history(user_id, story_id, max_count=5)
         if len(chat_history) > 0:
@@ -182,18 +210,13 @@ async def chat_with_llm(
 
         story_chat_history = chat_service.add_message(
             user_id=user_id,
-            character_id=character.id,
+            character_id=persona.character_id,
             story_id=story_id,
             message="",
             character_image_id=None,
             message_type="text",
-            is_user_message=False
-        )
-        chat_service.add_story_chat_history_status(
-            story_chat_history_id=story_chat_history.id,
-            status="pending",
-            error_message=None,
-            elapsed_time=0
+            is_user_message=False,
+            status=STATUS_PENDING
         )
         try:
             task = generate_text_llm.delay(
@@ -212,6 +235,8 @@ async def chat_with_llm(
             print(f"Failed to submit Celery task: {e}")
             raise HTTPException(status_code=500, detail=f"Failed to submit processing task: {str(e)}")
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Unexpected error in chat endpoint: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
\ No newline at end of file
@@ -1,8 +1,9 @@
 from celery_app import celery_app
 import time
 from typing import List, Dict
-from app.chat.chat_service import ChatService
+from app.chat.chat_service import ChatService, STATUS_COMPLETED, STATUS_FAILED
 from app.llm.ai_response import generate_ai_response
+from opentelemetry import trace
 import asyncio
 import logging
 
@@ -15,6 +16,7 @@ def generate_text_llm(messages: List[Dict[str, str]],
     """Generate text using any LLM provider - accepts keyword arguments"""
     start_time = time.time()
     chat_service = ChatService()
+    trace.get_current_span().set_attribute("chat.story_chat_history_id", story_chat_history_id)
     
     logger.info(f"Starting task with model: {model}, story_chat_history_id: {story_chat_history_id}")
 
@@ -29,17 +31,19 @@ def generate_text_llm(messages: List[Dict[str, str]],
         
         response_time = time.time() - start_time
 
-        chat_service.add_story_chat_history_status(
+        completed = chat_service.transition_story_chat_history_status(
             story_chat_history_id=story_chat_history_id,
-            status="completed",
+            status=STATUS_COMPLETED,
             error_message=None,
-            elapsed_time=response_time
-        )
-
-        chat_service.update_story_chat_history(
-            story_chat_history_id=story_chat_history_id,
+            elapsed_time=response_time,
             contents=response
         )
+        if not completed:
+            logger.info(f"Discarding response for story_chat_history_id: {story_chat_history_id}, no longer pending")
+            return {
+                "response": None,
+                "response_time": response_time
+            }
 
         logger.info(f"Task completed successfully for story_chat_history_id: {story_chat_history_id}")
         return {
@@ -53,9 +57,9 @@ def generate_text_llm(messages: List[Dict[str, str]],
         
         logger.error(f"Task failed for story_chat_history_id: {story_chat_history_id}, error: {error_message}")
         
-        chat_service.add_story_chat_history_status(
+        chat_service.transition_story_chat_history_status(
             story_chat_history_id=story_chat_history_id,
-            status="failed",
+            status=STATUS_FAILED,
             error_message=error_message,
             elapsed_time=response_time
         )
@@ -1,17 +1,64 @@
 import httpx
+import asyncio
+import logging
 from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
+KAUTH_BASE_URL = "https://kauth.kakao.com"
+KAPI_BASE_URL = "https://kapi.kakao.com"
+
+
 class KakaoOAuth:
     def __init__(self):
         self.client_id = settings.kakao_rest_api_key
         self.client_secret = settings.kakao_client_secret
         self.redirect_uri = settings.kakao_redirect_uri
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """프로세스 전체에서 공유하는 커넥션 풀 클라이언트 (keep-alive로 TLS 핸드셰이크 재사용)"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(settings.kakao_timeout_seconds, connect=settings.kakao_connect_timeout_seconds),
+                limits=httpx.Limits(
+                    max_connections=settings.kakao_max_connections,
+                    max_keepalive_connections=settings.kakao_max_keepalive_connections
+                ),
+                # 연결 수립 실패는 요청이 전송되기 전이므로 항상 재시도해도 안전
+                transport=httpx.AsyncHTTPTransport(retries=settings.kakao_max_retries)
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """공유 클라이언트 종료 (앱 종료 시)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(self, method: str, url: str, idempotent: bool, **kwargs) -> Optional[httpx.Response]:
+        """요청 전송. 멱등 요청만 타임아웃/5xx에서 재시도하고, 끝내 실패하면 None"""
+        attempts = settings.kakao_max_retries + 1 if idempotent else 1
+        for attempt in range(attempts):
+            try:
+                response = await self.client.request(method, url, **kwargs)
+                if response.status_code < 500 or attempt == attempts - 1:
+                    return response
+                logger.warning(f"카카오 API {response.status_code} 응답, 재시도: {url}")
+            except httpx.HTTPError as e:
+                if attempt == attempts - 1:
+                    logger.error(f"카카오 API 요청 실패: {url}: {e}")
+                    return None
+                logger.warning(f"카카오 API 요청 오류, 재시도: {url}: {e}")
+            await asyncio.sleep(settings.kakao_retry_backoff_seconds * (2 ** attempt))
+        return None
         
     def get_authorization_url(self) -> str:
         """카카오 로그인 URL 생성"""
-        base_url = "https://kauth.kakao.com/oauth/authorize"
+        base_url = f"{KAUTH_BASE_URL}/oauth/authorize"
         params = {
             "client_id": self.client_id,
             "redirect_uri": self.redirect_uri,
@@ -20,10 +67,23 @@ class KakaoOAuth:
         
         query_string = "&".join([f"{k}={v}" for k, v in params.items()])
         return f"{base_url}?{query_string}"
+
+    @staticmethod
+    def _token_result(token_data: Dict[str, Any], refresh_token: Optional[str] = None) -> Dict[str, Any]:
+        # 토큰 만료 시간 계산 (현재 시간 + expires_in 초)
+        expires_in = token_data.get("expires_in", 21600)  # 기본 6시간
+        expires_at = datetime.utcnow() + timedelta(seconds=expires_in)
+
+        return {
+            "access_token": token_data.get("access_token"),
+            "refresh_token": token_data.get("refresh_token", refresh_token),  # 새 리프레시 토큰이 없으면 기존 것 유지
+            "expires_at": expires_at,
+            "token_type": token_data.get("token_type", "bearer"),
+            "scope": token_data.get("scope")
+        }
     
     async def get_tokens(self, code: str) -> Optional[Dict[str, Any]]:
         """인증 코드로 액세스 토큰과 리프레시 토큰 획득"""
-        url = "https://kauth.kakao.com/oauth/token"
         data = {
             "grant_type": "authorization_code",
             "client_id": self.client_id,
@@ -32,27 +92,14 @@ class KakaoOAuth:
             "code": code
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, data=data)
-            if response.status_code == 200:
-                token_data = response.json()
-                
-                # 토큰 만료 시간 계산 (현재 시간 + expires_in 초)
-                expires_in = token_data.get("expires_in", 21600)  # 기본 6시간
-                expires_at = datetime.utcnow() + timedelta(seconds=expires_in)
-                
-                return {
-                    "access_token": token_data.get("access_token"),
-                    "refresh_token": token_data.get("refresh_token"),
-                    "expires_at": expires_at,
-                    "token_type": token_data.get("token_type", "bearer"),
-                    "scope": token_data.get("scope")
-                }
-            return None
+        # 인증 코드는 일회용이므로 전송된 요청은 재시도하지 않음
+        response = await self._request("POST", f"{KAUTH_BASE_URL}/oauth/token", idempotent=False, data=data)
+        if response is not None and response.status_code == 200:
+            return self._token_result(response.json())
+        return None
     
     async def refresh_access_token(self, refresh_token: str) -> Optional[Dict[str, Any]]:
         """리프레시 토큰으로 액세스 토큰 갱신"""
-        url = "https://kauth.kakao.com/oauth/token"
         data = {
             "grant_type": "refresh_token",
             "client_id": self.client_id,
@@ -60,46 +107,30 @@ class KakaoOAuth:
             "refresh_token": refresh_token
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, data=data)
-            if response.status_code == 200:
-                token_data = response.json()
-                
-                # 토큰 만료 시간 계산
-                expires_in = token_data.get("expires_in", 21600)
-                expires_at = datetime.utcnow() + timedelta(seconds=expires_in)
-                
-                return {
-                    "access_token": token_data.get("access_token"),
-                    "refresh_token": token_data.get("refresh_token", refresh_token),  # 새 리프레시 토큰이 없으면 기존 것 유지
-                    "expires_at": expires_at,
-                    "token_type": token_data.get("token_type", "bearer"),
-                    "scope": token_data.get("scope")
-                }
-            return None
+        # 리프레시 토큰이 교체될 수 있으므로 전송된 요청은 재시도하지 않음
+        response = await self._request("POST", f"{KAUTH_BASE_URL}/oauth/token", idempotent=False, data=data)
+        if response is not None and response.status_code == 200:
+            return self._token_result(response.json(), refresh_token)
+        return None
     
     async def get_user_info(self, access_token: str) -> Optional[Dict[str, Any]]:
         """액세스 토큰으로 사용자 정보 획득"""
-        url = "https://kapi.kakao.com/v2/user/me"
         headers = {
             "Authorization": f"Bearer {access_token}"
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers)
-            if response.status_code == 200:
-                return response.json()
-            return None
+        response = await self._request("GET", f"{KAPI_BASE_URL}/v2/user/me", idempotent=True, headers=headers)
+        if response is not None and response.status_code == 200:
+            return response.json()
+        return None
     
     async def revoke_token(self, access_token: str) -> bool:
         """토큰 무효화 (로그아웃)"""
-        url = "https://kapi.kakao.com/v1/user/logout"
         headers = {
             "Authorization": f"Bearer {access_token}"
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, headers=headers)
-            return response.status_code == 200
+        response = await self._request("POST", f"{KAPI_BASE_URL}/v1/user/logout", idempotent=True, headers=headers)
+        return response is not None and response.status_code == 200
 
 kakao_oauth = KakaoOAuth()
@@ -9,10 +9,9 @@ from app.login.kakao import kakao_oauth
 from app.config import settings
 import logging
 import os
-from app.api.jwt_auth import create_tokens_for_user, get_current_user_required
-from app.api.jwt_auth import REFRESH_TOKEN_EXPIRE_DAYS
-from datetime import timedelta
+from app.api.jwt_auth import create_access_token_for_user, get_current_user_required
 from app.api.auth import RefreshTokenRequest
+from app.api.refresh_tokens import RefreshTokenService
 from app.profile.services import UserService
 
 
@@ -55,38 +54,15 @@ async def kakao_callback_page(
         
         kakao_id = str(user_info.get("id"))
         
-        # 3. 사용자 확인 또는 생성
-        user = db.query(User).filter(User.kakao_id == kakao_id).first()
-        is_new_user = False
-        
-        if not user:
-            user_service = UserService(db)
-            user = user_service.create_user(
-                kakao_id=kakao_id,
-                kakao_access_token=access_token,
-                kakao_refresh_token=refresh_token,
-                kakao_token_expires_at=expires_at,
-                is_anonymous=False
-            )
-            db.add(user)
-            db.commit()
-            db.refresh(user)
-            is_new_user = True
-        else:
-            user.kakao_access_token = access_token
-            user.kakao_refresh_token = refresh_token
-            user.kakao_token_expires_at = expires_at
-            user.is_anonymous = False
-            db.commit()
-
-        # 4. JWT 토큰 생성
-        tokens = create_tokens_for_user(user.id, is_anonymous=False)
-        user.refresh_token = tokens["refresh_token"]
-        user.refresh_token_expires_at = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-        user.access_token = tokens["access_token"]
+        # 3. 사용자 생성 또는 갱신 + JWT 발급을 한 트랜잭션으로 (로그인마다 새 refresh token family)
+        user_id, is_new_user = UserService(db).upsert_kakao_user(kakao_id, access_token, refresh_token, expires_at)
+        tokens = {
+            "access_token": create_access_token_for_user(user_id, is_anonymous=False),
+            "refresh_token": RefreshTokenService(db).issue(user_id)
+        }
         db.commit()
         
-        # 5. callback-bridge.html로 리다이렉트
+        # 4. callback-bridge.html로 리다이렉트
         from urllib.parse import urlencode
         params = {
             'access_token': tokens["access_token"],
@@ -139,7 +115,6 @@ async def kakao_callback(
             )
         
         # 2. 액세스 토큰으로 사용자 정보 획득
-        logger.info(f"액세스 토큰: {access_token}")
         user_info = await kakao_oauth.get_user_info(access_token)
         if not user_info:
             logger.error("사용자 정보 획득 실패")
@@ -155,42 +130,14 @@ async def kakao_callback(
         # 3. 사용자 정보 파싱 - kakao_id만 사용
         kakao_id = str(user_info.get("id"))
         
-        # 4. 데이터베이스에서 사용자 확인 또는 생성
-        user = db.query(User).filter(User.kakao_id == kakao_id).first()
-        is_new_user = False
-        
-        if not user:
-            user_service = UserService(db)
-            user = user_service.create_user(
-                kakao_id=kakao_id,
-                kakao_access_token=access_token,
-                kakao_refresh_token=refresh_token,
-                kakao_token_expires_at=expires_at,
-                is_anonymous=False
-            )
-            # 새 사용자 생성 - 최소한의 정보만 저장
-
-            db.add(user)
-            db.commit()
-            db.refresh(user)
-            is_new_user = True
-            logger.info(f"새 사용자 생성: kakao_id={kakao_id} (DB ID: {user.id})")
-        else:
-            # 기존 사용자 토큰만 업데이트
-            user.kakao_access_token = access_token
-            user.kakao_refresh_token = refresh_token
-            user.kakao_token_expires_at = expires_at
-            user.is_anonymous = False
-            db.commit()
-
-            logger.info(f"기존 사용자 토큰 업데이트: kakao_id={kakao_id} (DB ID: {user.id})")
-
-        tokens = create_tokens_for_user(user.id, is_anonymous=False)
-        user.refresh_token = tokens["refresh_token"]
-        user.refresh_token_expires_at = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-        user.access_token = tokens["access_token"]
+        # 4. 사용자 생성 또는 갱신 + JWT 발급을 한 트랜잭션으로 (로그인마다 새 refresh token family)
+        user_id, is_new_user = UserService(db).upsert_kakao_user(kakao_id, access_token, refresh_token, expires_at)
+        tokens = {
+            "access_token": create_access_token_for_user(user_id, is_anonymous=False),
+            "refresh_token": RefreshTokenService(db).issue(user_id)
+        }
         db.commit()
-        db.refresh(user)
+        logger.info(f"{'새 사용자 생성' if is_new_user else '기존 사용자 토큰 업데이트'}: kakao_id={kakao_id} (DB ID: {user_id})")
         
         return JSONResponse(
             status_code=200,
@@ -229,11 +176,7 @@ async def check_kakao_login(
     request: RefreshTokenRequest,
     db: Session = Depends(get_db)
 ):
-    user = db.query(User).filter(
-        User.refresh_token == request.refresh_token,
-        User.refresh_token_expires_at > datetime.utcnow(),
-        User.is_anonymous == False
-        ).first()
+    user = RefreshTokenService(db).get_active_user(request.refresh_token, include_anonymous=False)
 
     if not user:
         raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
@@ -241,7 +184,7 @@ async def check_kakao_login(
     return {
         "kakao_id": user.kakao_id,
         "is_anonymous": user.is_anonymous,
-        "refresh_token": user.refresh_token
+        "refresh_token": request.refresh_token
     }
 
 @router.post("/kakao/refresh/{kakao_id}")
@@ -0,0 +1,27 @@
+from celery_app import celery_app
+from app.config import settings
+from app.database.connection import SessionLocal
+from app.login.token_refresh import refresh_expiring_kakao_tokens
+from app.redis_client import redis_client
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+@celery_app.task
+def refresh_kakao_tokens() -> dict:
+    """Refresh Kakao access tokens that are about to expire; overlapping runs are skipped"""
+    lock = redis_client.lock(
+        "kakao:token-refresh", timeout=settings.kakao_token_refresh_max_run_seconds * 2, blocking=False
+    )
+    if not lock.acquire(blocking=False):
+        logger.info("Kakao token refresh already running, skipping")
+        return {"skipped": True}
+    try:
+        db = SessionLocal()
+        try:
+            return asyncio.run(refresh_expiring_kakao_tokens(db))
+        finally:
+            db.close()
+    finally:
+        lock.release()
@@ -0,0 +1,92 @@
+"""
+카카오 액세스 토큰 사전 갱신
+
+만료가 kakao_token_refresh_window_minutes 이내로 다가온 사용자를 만료 시각 인덱스로
+골라, 배치마다 공유 커넥션 풀 클라이언트로 제한된 동시성(세마포어)으로 갱신하고 결과를
+한 번의 bulk UPDATE로 기록한다. 요청 경로에서는 카카오 토큰 갱신을 기다리지 않는다.
+"""
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import time
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database.models import User
+from app.login.kakao import KakaoOAuth
+
+logger = logging.getLogger(__name__)
+
+
+def select_expiring_users(db: Session, after_id: int, limit: int, now: datetime) -> List[Tuple[int, str]]:
+    """곧 만료되는 (아직 만료되지 않은) 카카오 토큰 보유 사용자 -> [(user_id, kakao_refresh_token)]"""
+    horizon = now + timedelta(minutes=settings.kakao_token_refresh_window_minutes)
+    rows = (
+        db.query(User.id, User.kakao_refresh_token)
+        .filter(
+            User.id > after_id,
+            User.kakao_refresh_token.isnot(None),
+            User.kakao_token_expires_at > now,
+            User.kakao_token_expires_at <= horizon,
+            User.is_active == True
+        )
+        .order_by(User.id)
+        .limit(limit)
+        .all()
+    )
+    return [(row.id, row.kakao_refresh_token) for row in rows]
+
+
+async def refresh_tokens_concurrently(
+    kakao: KakaoOAuth,
+    users: List[Tuple[int, str]],
+    concurrency: int
+) -> List[Dict]:
+    """동시 요청 수를 concurrency로 제한하여 갱신, 성공한 사용자의 bulk UPDATE 파라미터 반환"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def refresh(user_id: int, refresh_token: str) -> Optional[Dict]:
+        async with semaphore:
+            token_data = await kakao.refresh_access_token(refresh_token)
+        if not token_data or not token_data.get("access_token"):
+            return None
+        return {
+            "id": user_id,
+            "kakao_access_token": token_data["access_token"],
+            "kakao_refresh_token": token_data["refresh_token"],
+            "kakao_token_expires_at": token_data["expires_at"],
+        }
+
+    results = await asyncio.gather(*(refresh(user_id, token) for user_id, token in users))
+    return [result for result in results if result is not None]
+
+
+async def refresh_expiring_kakao_tokens(db: Session, max_seconds: Optional[float] = None) -> dict:
+    """만료 임박 토큰을 배치 단위로 갱신 (시간 예산 안에서)"""
+    deadline = time.monotonic() + (max_seconds or settings.kakao_token_refresh_max_run_seconds)
+    kakao = KakaoOAuth()
+    after_id = 0
+    selected = refreshed = 0
+    try:
+        while time.monotonic() < deadline:
+            users = select_expiring_users(db, after_id, settings.kakao_token_refresh_batch_size, datetime.utcnow())
+            if not users:
+                break
+            selected += len(users)
+            after_id = users[-1][0]
+
+            updates = await refresh_tokens_concurrently(kakao, users, settings.kakao_token_refresh_concurrency)
+            if updates:
+                # 기본 키 기준 ORM bulk UPDATE (executemany 한 번)
+                db.execute(update(User), updates)
+                db.commit()
+            refreshed += len(updates)
+
+            if len(users) < settings.kakao_token_refresh_batch_size:
+                break
+    finally:
+        await kakao.aclose()
+
+    logger.info(f"카카오 토큰 사전 갱신: 대상 {selected}명, 성공 {refreshed}명")
+    return {"selected": selected, "refreshed": refreshed, "failed": selected - refreshed}
@@ -15,6 +15,15 @@ from app.login.routes import router as kakao_auth_router
 from app.api.auth import router as jwt_auth_router
 from app.profile.router import router as profile_router
 from app.config import settings
+from app.cache.persona import start_persona_invalidation_listener
+from app.images.pipeline import shutdown_image_pool
+from app.login.kakao import kakao_oauth
+from app.database.instrumentation import QueryStatsMiddleware, query_metrics
+from app.tracing.middleware import TracingMiddleware
+from app.tracing.provider import configure_tracing, shutdown_tracing
+from fastapi.responses import PlainTextResponse
+from fastapi.staticfiles import StaticFiles
+from urllib.parse import urlparse
 
 # Load environment variables
 load_dotenv()
@@ -25,6 +34,35 @@ app = FastAPI(
     version="1.0.0"
 )
 
+@app.on_event("startup")
+async def start_cache_listeners():
+    """Subscribe this process to persona cache invalidations"""
+    start_persona_invalidation_listener()
+
+@app.on_event("startup")
+async def start_tracing():
+    configure_tracing("matehub-api")
+
+@app.on_event("shutdown")
+async def flush_traces():
+    shutdown_tracing()
+
+@app.on_event("shutdown")
+async def stop_image_pool():
+    shutdown_image_pool()
+
+@app.on_event("shutdown")
+async def close_kakao_client():
+    await kakao_oauth.aclose()
+
+# Local stand-in for the image CDN when variants are stored on the filesystem
+if urlparse(settings.image_storage_url).scheme in ("", "file"):
+    app.mount(
+        "/media",
+        StaticFiles(directory=urlparse(settings.image_storage_url).path, check_dir=False),
+        name="media"
+    )
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -32,8 +70,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Trace-Id"],
 )
 
+# Per-request SQL statement counts, DB time and N+1 detection
+if settings.sql_metrics_enabled:
+    app.add_middleware(QueryStatsMiddleware)
+
+# One server span per request, continuing the caller's traceparent (no-op unless TRACING_ENABLED)
+app.add_middleware(TracingMiddleware)
+
 # Include routers
 app.include_router(jwt_auth_router)
 app.include_router(llm_router)
@@ -67,6 +113,11 @@ async def root():
         "version": "1.0.0"
     }
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Per-route SQL metrics of this process (Prometheus text format)"""
+    return query_metrics.render_prometheus()
+
 @app.get("/health")
 async def health_check():
     """Comprehensive health check"""
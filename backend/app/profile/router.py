@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Request, Response, UploadFile, File
+from starlette.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
@@ -8,16 +9,26 @@ from app.profile.services import ProfileService
 from app.profile.schemas import ProfileResponse
 from app.profile.services import UserService
 from app.database.connection import get_db
+from app.cache.conditional import etag_matches, not_modified, set_validators
+from app.images.service import ImageService, image_key_prefix, process_upload
 from sqlalchemy.orm import Session
 
 router = APIRouter(prefix="/profile", tags=["Profile"])
 
 @router.get("/")
 async def get_profile(
+    request: Request,
+    response: Response,
     user_id: int = Depends(get_current_user_required),
     db: Session = Depends(get_db)
 ):
-    return ProfileService(db).get_profile(user_id)
+    profile_service = ProfileService(db)
+    etag = profile_service.get_profile_etag(user_id)
+    if etag:
+        if etag_matches(request, etag):
+            return not_modified(etag, settings.profile_cache_control)
+        set_validators(response, etag, settings.profile_cache_control)
+    return profile_service.get_profile(user_id)
 
 @router.put("/", response_model=ProfileResponse)
 async def update_profile(
@@ -25,4 +36,25 @@ async def update_profile(
     user_id: int = Depends(get_current_user_required),
     db: Session = Depends(get_db)
 ):
-    return ProfileService(db).update_profile(user_id, profile_data)
\ No newline at end of file
+    return ProfileService(db).update_profile(user_id, profile_data)
+
+@router.post("/image")
+async def upload_profile_image(
+    file: UploadFile = File(...),
+    user_id: int = Depends(get_current_user_required),
+    db: Session = Depends(get_db)
+):
+    """Upload a profile image; stores resized WebP/AVIF variants and a blur placeholder"""
+    data, processed = await process_upload(file)
+    image_service = ImageService(db)
+    variants = await run_in_threadpool(
+        image_service.store_variants, image_key_prefix("profiles", user_id, data), processed
+    )
+    profile = image_service.set_profile_image(user_id, processed, variants)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return {
+        "thumbnail_url": profile.thumbnail_url,
+        "image_variants": profile.image_variants,
+        "image_placeholder": profile.image_placeholder
+    }
@@ -20,8 +20,6 @@ class UserSchema(BaseModel):
     kakao_access_token: str = None
     kakao_refresh_token: str = None
     kakao_token_expires_at: datetime = None
-    refresh_token: str = None
-    refresh_token_expires_at: datetime = None
     is_anonymous: bool = True
     is_active: bool = True
 
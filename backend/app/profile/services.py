@@ -1,7 +1,10 @@
 from sqlalchemy.orm import Session, selectinload, joinedload, load_only
-from sqlalchemy import and_, desc
-from typing import List, Optional
+from sqlalchemy import and_, desc, func, literal, literal_column, text
+from typing import List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from app.config import settings
 from app.database.models import User, Profile
+from app.database.connection import dialect_insert
 from app.profile.schemas import ProfileResponse, UserSchema
 from fastapi import HTTPException
 
@@ -15,6 +18,13 @@ class ProfileService:
         print(f"Profile: {profile}")
         return profile
 
+    def get_profile_etag(self, user_id: int) -> Optional[str]:
+        """ETag of the user's profile from its id and updated_at, without loading the row"""
+        row = self.db.query(Profile.id, Profile.updated_at).filter(Profile.user_id == user_id).first()
+        if not row or not row.updated_at:
+            return None
+        return f'"profile-{row.id}-{int(row.updated_at.timestamp() * 1_000_000)}"'
+
     def update_profile(self, user_id: int, profile_data: Profile) -> Optional[Profile]:
         profile = self.db.query(Profile).filter(Profile.user_id == user_id).first()
         profile.nickname = profile_data.nickname
@@ -33,6 +43,66 @@ class UserService:
         user = self.db.query(User).filter(User.id == user_id).first()
         return user
 
+    def reserve_anonymous_user_id(self) -> int:
+        """Id for a new anonymous identity, taken from the users id sequence without inserting a row
+
+        The row is created by ensure_user on the identity's first write. Databases
+        without sequences fall back to inserting the row right away.
+        """
+        if self.db.get_bind().dialect.name == "postgresql":
+            return self.db.scalar(text("SELECT nextval(pg_get_serial_sequence('users', 'id'))"))
+        user = User(is_anonymous=True, is_active=True)
+        self.db.add(user)
+        self.db.commit()
+        return user.id
+
+    def ensure_user(self, user_id: int) -> None:
+        """Insert the anonymous user row for user_id unless it exists (idempotent; the caller commits)"""
+        self.db.execute(
+            dialect_insert(self.db)(User)
+            .values(id=user_id, is_anonymous=True, is_active=True)
+            .on_conflict_do_nothing(index_elements=[User.id])
+        )
+
+    def touch_anonymous_user(self, user_id: int) -> None:
+        """Record activity of a stateless anonymous identity for the retention purge
+
+        Bumps users.updated_at at most once per anonymous_activity_touch_interval_hours,
+        so most refreshes match no row; identities without a row yet are untouched.
+        """
+        stale = datetime.now(timezone.utc) - timedelta(hours=settings.anonymous_activity_touch_interval_hours)
+        self.db.query(User).filter(
+            User.id == user_id,
+            User.is_anonymous == True,
+            User.updated_at < stale
+        ).update({User.updated_at: func.now()}, synchronize_session=False)
+        self.db.commit()
+
+    def upsert_kakao_user(
+        self,
+        kakao_id: str,
+        kakao_access_token: str,
+        kakao_refresh_token: Optional[str],
+        kakao_token_expires_at: datetime
+    ) -> Tuple[int, bool]:
+        """Create or update the user of a Kakao login in one statement; the caller commits. Returns (user_id, is_new)"""
+        kakao_tokens = {
+            "kakao_access_token": kakao_access_token,
+            "kakao_refresh_token": kakao_refresh_token,
+            "kakao_token_expires_at": kakao_token_expires_at,
+            "is_anonymous": False,
+        }
+        insert = dialect_insert(self.db)(User).values(kakao_id=kakao_id, is_active=True, **kakao_tokens)
+        # xmax is 0 only for a freshly inserted row version (PostgreSQL; elsewhere is_new is False)
+        inserted = literal_column("xmax = 0") if self.db.get_bind().dialect.name == "postgresql" else literal(None)
+        row = self.db.execute(
+            insert
+            # set_ bypasses the ORM onupdate, so updated_at is bumped here
+            .on_conflict_do_update(index_elements=[User.kakao_id], set_={**kakao_tokens, "updated_at": func.now()})
+            .returning(User.id, inserted)
+        ).first()
+        return row[0], bool(row[1])
+
     def create_user(self, user_data: UserSchema) -> Optional[User]:
         user = User(
             name=user_data.name,
@@ -40,8 +110,6 @@ class UserService:
             kakao_access_token=user_data.kakao_access_token,
             kakao_refresh_token=user_data.kakao_refresh_token,
             kakao_token_expires_at=user_data.kakao_token_expires_at,
-            refresh_token=user_data.refresh_token,
-            refresh_token_expires_at=user_data.refresh_token_expires_at,
             is_anonymous=user_data.is_anonymous,
             is_active=user_data.is_active
         )
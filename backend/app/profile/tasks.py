@@ -23,38 +23,6 @@ def update_user_profile(user_email: str, profile_data: Dict[str, Any]) -> dict:
         "status": "updated"
     }
 
-@celery_app.task
-def upload_profile_image(user_email: str, filename: str, file_size: int, content_type: str) -> dict:
-    """Process profile image upload"""
-    # Simulate image processing time
-    time.sleep(3)
-    
-    # Generate unique filename
-    file_extension = filename.split('.')[-1] if '.' in filename else 'jpg'
-    unique_filename = f"{uuid.uuid4()}.{file_extension}"
-    
-    # Simulate image processing (resize, optimize, etc.)
-    processed_sizes = {
-        "thumbnail": f"thumb_{unique_filename}",
-        "medium": f"med_{unique_filename}",
-        "large": f"large_{unique_filename}"
-    }
-    
-    # Simulate cloud storage upload
-    image_url = f"https://cdn.matehub.com/profiles/{unique_filename}"
-    
-    return {
-        "user_email": user_email,
-        "original_filename": filename,
-        "unique_filename": unique_filename,
-        "file_size": file_size,
-        "content_type": content_type,
-        "image_url": image_url,
-        "processed_sizes": processed_sizes,
-        "uploaded_at": time.time(),
-        "status": "uploaded"
-    }
-
 @celery_app.task
 def generate_user_stats(user_email: str) -> dict:
     """Generate comprehensive user statistics"""
@@ -0,0 +1 @@
+# Ranking module
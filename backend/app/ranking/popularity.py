@@ -0,0 +1,130 @@
+"""
+Engagement-driven popularity ranking kept in Redis sorted sets.
+
+A periodic job scores every story from recent activity (user chat messages
+and new story matches), with each event's weight halving every
+popularity_half_life_hours. Character scores are the sum of their stories'.
+The top entries go into two sorted sets, and their ready-to-send JSON goes
+into companion hashes, so /popular endpoints answer from Redis alone.
+
+Activity is aggregated per (story, day) in SQL and decayed in Python, which
+keeps the job's result set small and the SQL portable.
+"""
+from typing import Dict, List, Tuple
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+import logging
+from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
+from app.config import settings
+from app.database.models import Character, Story, StoryChatHistory, StoryUserMatch
+from app.database.services import story_with_character_from_row, STORY_CHARACTER_COLUMNS
+from app.character.schemas import CharacterWithStoriesSchema, StoryWithCharacterSchema
+from app.api.responses import dump_json
+from app.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+STORY_LEADERBOARD_KEY = "ranking:stories"
+CHARACTER_LEADERBOARD_KEY = "ranking:characters"
+STORY_ITEMS_KEY = "ranking:stories:items"
+CHARACTER_ITEMS_KEY = "ranking:characters:items"
+
+
+def _decay(day: date, today: date) -> float:
+    age_hours = (today - day).days * 24
+    return 0.5 ** (age_hours / settings.popularity_half_life_hours)
+
+
+def _daily_counts(db: Session, model, since: datetime, *criteria) -> List[Tuple[int, date, int]]:
+    day = func.date(model.created_at)
+    return (
+        db.query(model.story_id, day, func.count())
+        .filter(model.created_at >= since, *criteria)
+        .group_by(model.story_id, day)
+        .all()
+    )
+
+
+def compute_story_scores(db: Session, now: datetime) -> Dict[int, float]:
+    """Time-decayed engagement score per active story"""
+    since = now - timedelta(days=settings.popularity_window_days)
+    today = now.date()
+    scores: Dict[int, float] = defaultdict(float)
+
+    activity = [
+        (settings.popularity_message_weight, _daily_counts(
+            db, StoryChatHistory, since, StoryChatHistory.is_user_message == True
+        )),
+        (settings.popularity_match_weight, _daily_counts(db, StoryUserMatch, since)),
+    ]
+    for weight, rows in activity:
+        for story_id, day, count in rows:
+            if isinstance(day, str):
+                day = date.fromisoformat(day)
+            scores[story_id] += weight * count * _decay(day, today)
+
+    active = {story_id for (story_id,) in db.query(Story.id).filter(Story.is_active == True)}
+    return {story_id: score for story_id, score in scores.items() if story_id in active}
+
+
+def _top(scores: Dict[int, float]) -> Dict[int, float]:
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return dict(ranked[:settings.popularity_leaderboard_size])
+
+
+def _publish(leaderboard_key: str, items_key: str, scores: Dict[int, float], items: Dict[int, bytes]) -> None:
+    """Swap in a new leaderboard and its payloads in one transaction"""
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.delete(leaderboard_key, items_key)
+    if scores:
+        pipe.zadd(leaderboard_key, scores)
+        pipe.hset(items_key, mapping=items)
+    pipe.execute()
+
+
+def refresh_popularity_rankings(db: Session) -> dict:
+    """Recompute both leaderboards and their cached payloads"""
+    story_scores = compute_story_scores(db, datetime.now(timezone.utc))
+
+    character_of = dict(db.query(Story.id, Story.character_id).filter(Story.id.in_(list(story_scores))))
+    character_scores: Dict[int, float] = defaultdict(float)
+    for story_id, score in story_scores.items():
+        character_scores[character_of[story_id]] += score
+
+    top_stories = _top(story_scores)
+    top_characters = _top(character_scores)
+
+    story_rows = (
+        db.query(*STORY_CHARACTER_COLUMNS)
+        .join(Character, Story.character_id == Character.id)
+        .filter(Story.id.in_(list(top_stories)))
+        .all()
+    )
+    story_items = {
+        row.id: dump_json(StoryWithCharacterSchema, story_with_character_from_row(row)) for row in story_rows
+    }
+
+    characters = (
+        db.query(Character)
+        .options(selectinload(Character.stories))
+        .filter(Character.id.in_(list(top_characters)))
+        .all()
+    )
+    character_items = {
+        character.id: dump_json(CharacterWithStoriesSchema, CharacterWithStoriesSchema.model_validate(character))
+        for character in characters
+    }
+
+    _publish(STORY_LEADERBOARD_KEY, STORY_ITEMS_KEY, top_stories, story_items)
+    _publish(CHARACTER_LEADERBOARD_KEY, CHARACTER_ITEMS_KEY, top_characters, character_items)
+    return {"stories": len(top_stories), "characters": len(top_characters)}
+
+
+def top_items_json(leaderboard_key: str, items_key: str, limit: int) -> Tuple[bytes, int]:
+    """The top limit payloads as a JSON array, and how many there are; Redis only"""
+    ids = redis_client.zrevrange(leaderboard_key, 0, limit - 1)
+    if not ids:
+        return b"[]", 0
+    items = [item for item in redis_client.hmget(items_key, ids) if item is not None]
+    return b"[" + b",".join(items) + b"]", len(items)
@@ -0,0 +1,14 @@
+from celery_app import celery_app
+from app.database.routing import read_session
+from app.ranking.popularity import refresh_popularity_rankings
+import logging
+
+logger = logging.getLogger(__name__)
+
+@celery_app.task
+def refresh_popularity() -> dict:
+    """Recompute the story and character leaderboards (reads from a replica)"""
+    with read_session() as db:
+        result = refresh_popularity_rankings(db)
+    logger.info(f"Refreshed popularity rankings: {result}")
+    return result
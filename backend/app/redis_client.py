@@ -0,0 +1,9 @@
+import redis
+from app.config import settings
+
+# Shared Redis connection pool for application data (separate from the Celery broker usage)
+redis_client = redis.Redis.from_url(
+    settings.redis_url,
+    socket_timeout=1.0,
+    socket_connect_timeout=1.0
+)
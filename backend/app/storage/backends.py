@@ -0,0 +1,88 @@
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Optional
+from urllib.parse import urlparse
+from pathlib import Path
+import shutil
+import logging
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class StorageError(Exception):
+    """Raised when a storage backend is misconfigured or a write fails"""
+    pass
+
+
+class BaseStorage(ABC):
+    """Abstract base class for blob storage backends"""
+
+    @abstractmethod
+    def save(self, key: str, data: BinaryIO, content_type: Optional[str] = None) -> str:
+        """Store a file-like object under key and return its location"""
+        pass
+
+    @abstractmethod
+    def url_for(self, key: str) -> str:
+        """Public URL (or location) of a stored key"""
+        pass
+
+
+class LocalStorage(BaseStorage):
+    """Stores files under a local directory, e.g. file:///var/lib/matehub/archive"""
+
+    def __init__(self, root: str, public_base_url: Optional[str] = None):
+        self.root = Path(root)
+        self.public_base_url = public_base_url
+
+    def save(self, key: str, data: BinaryIO, content_type: Optional[str] = None) -> str:
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".part")
+        with open(tmp_path, "wb") as f:
+            shutil.copyfileobj(data, f)
+        tmp_path.replace(path)
+        return self.url_for(key)
+
+    def url_for(self, key: str) -> str:
+        if self.public_base_url:
+            return f"{self.public_base_url.rstrip('/')}/{key}"
+        return str(self.root / key)
+
+
+class S3Storage(BaseStorage):
+    """Stores files in an S3-compatible bucket, e.g. s3://bucket/prefix (needs boto3)"""
+
+    def __init__(self, bucket: str, prefix: str = "", public_base_url: Optional[str] = None):
+        try:
+            import boto3
+        except ImportError:
+            raise StorageError("boto3 is required for s3:// storage URLs")
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.public_base_url = public_base_url
+        self.client = boto3.client("s3", endpoint_url=settings.storage_endpoint_url)
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def save(self, key: str, data: BinaryIO, content_type: Optional[str] = None) -> str:
+        extra_args = {"ContentType": content_type} if content_type else None
+        self.client.upload_fileobj(data, self.bucket, self._key(key), ExtraArgs=extra_args)
+        return self.url_for(key)
+
+    def url_for(self, key: str) -> str:
+        if self.public_base_url:
+            return f"{self.public_base_url.rstrip('/')}/{key}"
+        return f"s3://{self.bucket}/{self._key(key)}"
+
+
+def get_storage(url: str, public_base_url: Optional[str] = None) -> BaseStorage:
+    """Create a storage backend from a file:// or s3:// URL"""
+    parsed = urlparse(url)
+    if parsed.scheme in ("", "file"):
+        return LocalStorage(parsed.path or url, public_base_url)
+    if parsed.scheme == "s3":
+        return S3Storage(parsed.netloc, parsed.path, public_base_url)
+    raise StorageError(f"Unsupported storage URL: {url}")
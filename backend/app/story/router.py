@@ -1,17 +1,24 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.database.connection import get_db
+from app.database.connection import get_db, dialect_insert
+from app.database.query_budget import query_budget
+from app.database.routing import get_read_db, get_user_read_db, mark_user_write, read_session
+from app.cache.catalog import cached_catalog_response, invalidate_catalog, json_response
+from app.api.responses import dump_json, typed_json_response
+from app.ranking.popularity import top_items_json, STORY_LEADERBOARD_KEY, STORY_ITEMS_KEY
+from redis.exceptions import RedisError
+from sqlalchemy.exc import IntegrityError
 from app.database.models import User
 from app.api.jwt_auth import get_current_user_or_anonymous
 from app.character.schemas import (
     StoryWithCharacterSchema, 
     StoryDetailResponse, 
-    StoryUserMatchSchema,
     StoryUserMatchCreateSchema,
     StoryListResponse
 )
-from app.database.services import StoryService, RelationshipQueryService
+from app.database.services import StoryService, RelationshipQueryService, TagService
+from app.profile.services import UserService
 from .schemas import (
     CreateStoryUserMatchRequest,
     StoryUserMatchCreateResponse,
@@ -23,33 +30,74 @@ from app.database.models import StoryUserMatch as StoryUserMatchModel, Story, Us
 
 router = APIRouter(prefix="/stories", tags=["stories"])
 
+# PostgreSQL's default name for the story_user_matches.story_id foreign key
+STORY_MATCH_STORY_FK = "story_user_matches_story_id_fkey"
+
+
+def _is_unknown_story(error: IntegrityError) -> bool:
+    """Whether an insert into story_user_matches failed on its story foreign key"""
+    orig = error.orig
+    if getattr(orig, "pgcode", None) == "23503":
+        diag = getattr(orig, "diag", None)
+        return getattr(diag, "constraint_name", None) == STORY_MATCH_STORY_FK
+    # SQLite does not name the constraint; the user row was just ensured, so it is the story
+    return "FOREIGN KEY constraint failed" in str(orig)
+
 
 @router.get("/", response_model=StoryListResponse)
+@query_budget(1)
 async def get_stories(
-    cursor: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page"),
     limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """Get list of stories with optional filtering"""
+    """Get a page of active stories"""
     story_service = StoryService(db)
     
-    stories = story_service.get_stories(limit, cursor)
-    return StoryListResponse(stories=stories, total=len(stories))
+    page = story_service.get_stories(limit, cursor)
+    return typed_json_response(StoryListResponse, StoryListResponse.model_construct(
+        stories=page.items,
+        total=len(page.items),
+        has_more=page.has_more,
+        next_cursor=page.next_cursor
+    ))
 
 @router.get("/popular", response_model=StoryListResponse)
+@query_budget(0)
 async def get_popular_stories(
-    limit: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db)
+    request: Request,
+    limit: int = Query(10, ge=1, le=100)
 ):
-    story_service = StoryService(db)
-    stories = story_service.get_popular_stories(limit)
+    """Top stories by recent engagement, straight from the Redis leaderboard"""
+    try:
+        stories, total = top_items_json(STORY_LEADERBOARD_KEY, STORY_ITEMS_KEY, limit)
+    except RedisError:
+        raise HTTPException(status_code=503, detail="Popularity rankings are unavailable")
+    body = b'{"stories":' + stories + b',"total":' + str(total).encode() + b',"has_more":false,"next_cursor":null}'
+    return json_response(body, request=request)
 
-    return StoryListResponse(stories=stories, total=len(stories))
+@router.get("/by-tags", response_model=StoryListResponse)
+@query_budget(1)
+async def get_stories_by_tags(
+    tags: List[str] = Query(..., description="Character tag names to filter by"),
+    match: str = Query("all", pattern="^(all|any)$", description="all = AND, any = OR"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page"),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_read_db)
+):
+    """Get a page of active stories whose character carries the given tags"""
+    page = StoryService(db).get_stories(limit, cursor, tags=tags, match_all=match == "all")
+    return typed_json_response(StoryListResponse, StoryListResponse.model_construct(
+        stories=page.items,
+        total=len(page.items),
+        has_more=page.has_more,
+        next_cursor=page.next_cursor
+    ))
 
 @router.get("/{story_id}", response_model=StoryDetailResponse)
 async def get_story_detail(
     story_id: int, 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     story_service = StoryService(db)
     story = story_service.get_story_detail(story_id)
@@ -60,24 +108,27 @@ async def get_story_detail(
     return story
 
 @router.get("/character/{character_id}", response_model=List[StoryWithCharacterSchema])
-async def get_stories_by_character(
+@query_budget(1)
+def get_stories_by_character(
     character_id: int,
-    db: Session = Depends(get_db)
+    request: Request
 ):
     """Get all stories for a specific character"""
-    story_service = StoryService(db)
-    
-    try:
-        stories = story_service.get_stories_by_character(character_id)
-        return stories
-    except Exception as e:
-        raise HTTPException(status_code=404, detail="Character not found or no stories available")
+    def build() -> bytes:
+        with read_session() as db:
+            try:
+                stories = StoryService(db).get_stories_by_character(character_id)
+            except Exception as e:
+                raise HTTPException(status_code=404, detail="Character not found or no stories available")
+        return dump_json(List[StoryWithCharacterSchema], stories)
+
+    return cached_catalog_response(f"stories:character:{character_id}", build, request)
 
 @router.get("/{story_id}/stats")
 async def get_story_stats(
     story_id: int, 
     user_id: int = Depends(get_current_user_or_anonymous), 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get engagement statistics for a story"""
     stats_service = RelationshipQueryService(db)
@@ -88,58 +139,70 @@ async def get_story_stats(
     
     return stats
 
-@router.post("/user-match", response_model=StoryUserMatchSchema)
+@router.post("/user-match", response_model=StoryUserMatchCreateResponse)
 async def create_story_user_match(
     request: CreateStoryUserMatchRequest,
     user_id: int = Depends(get_current_user_or_anonymous),
     db: Session = Depends(get_db)
 ):
-    story = db.query(Story).filter(Story.id == request.story_id).first()
-    if not story:
-        raise HTTPException(status_code=404, detail="Story not found")
-    
-    # Check if match already exists
-    existing_match = db.query(StoryUserMatchModel).filter(
-        StoryUserMatchModel.story_id == request.story_id,
-        StoryUserMatchModel.user_id == user_id
-    ).first()
-    
-    if existing_match:
+    # Anonymous users are materialized on their first match
+    UserService(db).ensure_user(user_id)
+
+    # One statement: the (user_id, story_id) unique constraint rejects duplicates
+    # and the story foreign key rejects unknown stories, race-free
+    try:
+        match = db.execute(
+            dialect_insert(db)(StoryUserMatchModel)
+            .values(
+                story_id=request.story_id,
+                user_id=user_id,
+                user_name_in_story=request.user_name_in_story,
+                progress=request.progress or 0,
+                intimacy=request.intimacy or 0
+            )
+            .on_conflict_do_nothing(index_elements=[StoryUserMatchModel.user_id, StoryUserMatchModel.story_id])
+            .returning(
+                StoryUserMatchModel.id,
+                StoryUserMatchModel.story_id,
+                StoryUserMatchModel.user_name_in_story,
+                StoryUserMatchModel.progress,
+                StoryUserMatchModel.intimacy
+            )
+        ).first()
+    except IntegrityError as e:
+        db.rollback()
+        if _is_unknown_story(e):
+            raise HTTPException(status_code=404, detail="Story not found")
+        raise
+
+    if match is None:
+        db.rollback()
         raise HTTPException(status_code=400, detail="Story user match already exists")
-    
-    # Create new match
-    story_user_match = StoryUserMatchModel(
-        story_id=request.story_id,
-        user_id=user_id,
-        user_name_in_story=request.user_name_in_story,
-        progress=request.progress or 0,
-        intimacy=request.intimacy or 0
-    )
-    
-    db.add(story_user_match)
+
     db.commit()
-    db.refresh(story_user_match)
+    mark_user_write(user_id)
     
     return StoryUserMatchCreateResponse(
-        id=story_user_match.id,
-        story_id=story_user_match.story_id,
-        user_name_in_story=story_user_match.user_name_in_story,
-        progress=story_user_match.progress,
-        intimacy=story_user_match.intimacy,
+        id=match.id,
+        story_id=match.story_id,
+        user_name_in_story=match.user_name_in_story,
+        progress=match.progress,
+        intimacy=match.intimacy,
         message="Story user match created successfully"
     )
 
 @router.get("/user-match/", response_model=List[StoryWithCharacterSchema])
+@query_budget(1)
 async def get_user_story_matches(
     user_id: int = Depends(get_current_user_or_anonymous),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_user_read_db)
 ):
     """Get all story matches for a specific user"""
     story_service = StoryService(db)
 
     try:
         stories = story_service.get_user_story_matches(user_id)
-        return stories
+        return typed_json_response(List[StoryWithCharacterSchema], stories)
     except Exception as e:
         raise HTTPException(status_code=404, detail="User not found or no story matches")
 
@@ -187,6 +250,7 @@ async def create_story(
     db.add(story)
     db.commit()
     db.refresh(story)
+    invalidate_catalog()
 
     return story
 
@@ -204,6 +268,8 @@ async def create_character(
         main_image_url=character_data.main_image_url
     )
     db.add(character)
+    TagService(db).set_character_tags(character, character_data.tag_list)
     db.commit()
     db.refresh(character)
+    invalidate_catalog()
     return character
\ No newline at end of file
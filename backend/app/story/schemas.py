@@ -135,6 +135,8 @@ class StoryChatHistoryStatusSchema(StoryChatHistoryStatusBaseSchema, TimestampMi
 class StoryListResponse(BaseSchema):
     stories: List[StoryWithCharacterSchema]
     total: int
+    has_more: bool = False
+    next_cursor: Optional[str] = None
 
 class StoryDetailResponse(StoryWithRelationsSchema):
     pass
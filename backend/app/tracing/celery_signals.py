@@ -0,0 +1,109 @@
+"""
+Trace context across the Celery broker.
+
+The publisher opens a producer span and injects its context (W3C traceparent)
+into the task message headers; the worker extracts it and runs the task inside
+a consumer span of the same trace, so a chat turn reads as one trace from the
+HTTP request through the task to the LLM call.
+"""
+from typing import Dict, Tuple
+import logging
+import threading
+from celery import signals
+from opentelemetry import context as otel_context
+from opentelemetry import propagate, trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from app.tracing.provider import configure_tracing, shutdown_tracing
+
+logger = logging.getLogger(__name__)
+
+tracer = trace.get_tracer(__name__)
+
+_publishing: Dict[str, object] = {}
+_running: Dict[str, Tuple[object, object]] = {}
+_lock = threading.Lock()
+
+
+def _before_task_publish(sender=None, headers=None, **kwargs):
+    if headers is None:
+        return
+    task_id = headers.get("id")
+    span = tracer.start_span(f"celery.publish {sender}", kind=SpanKind.PRODUCER, attributes={
+        "messaging.system": "celery",
+        "messaging.operation.type": "send",
+        "messaging.destination.name": kwargs.get("routing_key") or "",
+        "celery.task_name": sender or "",
+        "celery.task_id": task_id or "",
+    })
+    propagate.inject(headers, context=trace.set_span_in_context(span))
+    with _lock:
+        _publishing[task_id] = span
+
+
+def _after_task_publish(headers=None, **kwargs):
+    with _lock:
+        span = _publishing.pop((headers or {}).get("id"), None)
+    if span is not None:
+        span.end()
+
+
+def _task_prerun(task_id=None, task=None, **kwargs):
+    # Custom message headers become attributes of the task request
+    carrier = {key: getattr(task.request, key, None) for key in ("traceparent", "tracestate")}
+    parent = propagate.extract({key: value for key, value in carrier.items() if value})
+    span = tracer.start_span(f"celery.run {task.name}", context=parent, kind=SpanKind.CONSUMER, attributes={
+        "messaging.system": "celery",
+        "messaging.operation.type": "process",
+        "celery.task_name": task.name,
+        "celery.task_id": task_id or "",
+        "celery.retries": task.request.retries or 0,
+    })
+    token = otel_context.attach(trace.set_span_in_context(span, parent))
+    with _lock:
+        _running[task_id] = (span, token)
+
+
+def _task_failure(task_id=None, exception=None, **kwargs):
+    with _lock:
+        entry = _running.get(task_id)
+    if entry is not None and exception is not None:
+        span = entry[0]
+        span.record_exception(exception)
+        span.set_status(Status(StatusCode.ERROR, type(exception).__name__))
+
+
+def _task_postrun(task_id=None, state=None, **kwargs):
+    with _lock:
+        entry = _running.pop(task_id, None)
+    if entry is None:
+        return
+    span, token = entry
+    span.set_attribute("celery.state", state or "")
+    otel_context.detach(token)
+    span.end()
+
+
+def _worker_init(**kwargs):
+    configure_tracing("matehub-worker")
+
+
+def _worker_shutdown(**kwargs):
+    shutdown_tracing()
+
+
+_installed = False
+
+
+def install_celery_tracing() -> None:
+    """Connect the publish and worker signals of this process (idempotent)"""
+    global _installed
+    if _installed:
+        return
+    signals.before_task_publish.connect(_before_task_publish, weak=False)
+    signals.after_task_publish.connect(_after_task_publish, weak=False)
+    signals.task_prerun.connect(_task_prerun, weak=False)
+    signals.task_failure.connect(_task_failure, weak=False)
+    signals.task_postrun.connect(_task_postrun, weak=False)
+    signals.worker_init.connect(_worker_init, weak=False)
+    signals.worker_shutdown.connect(_worker_shutdown, weak=False)
+    _installed = True
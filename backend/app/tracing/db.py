@@ -0,0 +1,70 @@
+"""
+Client spans for SQL statements.
+
+A span is opened only inside an already recording trace (an HTTP request or a
+Celery task), so pool checkouts and migrations don't produce orphan traces.
+"""
+import logging
+from opentelemetry import trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+tracer = trace.get_tracer(__name__)
+
+_SPAN_ATTRIBUTE = "_otel_span"
+
+
+def _operation(statement: str) -> str:
+    words = statement.lstrip().split(None, 1)
+    return words[0].upper() if words else "SQL"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is None or not trace.get_current_span().is_recording():
+        return
+    operation = _operation(statement)
+    span = tracer.start_span(f"db {operation}", kind=SpanKind.CLIENT, attributes={
+        "db.system": conn.dialect.name,
+        "db.operation.name": operation,
+        "db.query.text": statement[:settings.tracing_db_statement_max_length],
+    })
+    if executemany:
+        span.set_attribute("db.operation.batch.size", len(parameters))
+    setattr(context, _SPAN_ATTRIBUTE, span)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    span = getattr(context, _SPAN_ATTRIBUTE, None)
+    if span is None:
+        return
+    if cursor.rowcount is not None and cursor.rowcount >= 0:
+        span.set_attribute("db.response.returned_rows", cursor.rowcount)
+    span.end()
+
+
+def _handle_error(exception_context):
+    context = exception_context.execution_context
+    span = getattr(context, _SPAN_ATTRIBUTE, None)
+    if span is None:
+        return
+    span.record_exception(exception_context.original_exception)
+    span.set_status(Status(StatusCode.ERROR, type(exception_context.original_exception).__name__))
+    span.end()
+
+
+_installed = False
+
+
+def install_db_tracing() -> None:
+    """Hook every engine of this process (idempotent)"""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+    _installed = True
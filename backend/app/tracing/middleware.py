@@ -0,0 +1,82 @@
+"""
+Server spans for HTTP requests.
+
+Continues the caller's trace when the request carries a W3C traceparent
+header, and returns the trace id as X-Trace-Id so a user report can be
+matched to its trace (python -m app.tracing.view TRACE_ID). FastAPI releases
+with native telemetry open the server span themselves once a tracer provider
+is configured; that span is then reused instead of nesting a second one.
+"""
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Optional
+import logging
+from opentelemetry import propagate, trace
+from opentelemetry.trace import Span, SpanKind, Status, StatusCode
+
+logger = logging.getLogger(__name__)
+
+tracer = trace.get_tracer(__name__)
+
+_request_span: ContextVar[Optional[Span]] = ContextVar("request_span", default=None)
+
+
+def request_span() -> Span:
+    """Server span of the request being served (the current span outside requests)"""
+    return _request_span.get() or trace.get_current_span()
+
+
+class TracingMiddleware:
+    """ASGI middleware opening one server span per HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def _start_span(self, scope, method: str):
+        if scope.get("fastapi.telemetry") is not None:
+            return nullcontext(trace.get_current_span())
+        carrier = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope.get("headers", [])}
+        return tracer.start_as_current_span(
+            f"{method} {scope.get('path', '')}",
+            context=propagate.extract(carrier),
+            kind=SpanKind.SERVER,
+            attributes={
+                "http.request.method": method,
+                "url.path": scope.get("path", ""),
+                "user_agent.original": carrier.get("user-agent", ""),
+            },
+            record_exception=True,
+            set_status_on_exception=True
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope.get("method", "GET")
+        with self._start_span(scope, method) as span:
+            span_context = span.get_span_context()
+            token = _request_span.set(span)
+
+            async def send_with_trace_id(message):
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    span.set_attribute("http.response.status_code", status)
+                    if status >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                    if span_context.is_valid:
+                        headers = list(message.get("headers", []))
+                        headers.append((b"x-trace-id", f"{span_context.trace_id:032x}".encode()))
+                        message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace_id)
+            finally:
+                _request_span.reset(token)
+                route = getattr(scope.get("route"), "path", None)
+                # A native FastAPI span names itself and may already have ended
+                if route and span.is_recording():
+                    span.update_name(f"{method} {route}")
+                    span.set_attribute("http.route", route)
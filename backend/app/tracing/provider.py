@@ -0,0 +1,134 @@
+"""
+OpenTelemetry tracer setup and the JSON-lines file exporter.
+
+Instrumented code only uses the OpenTelemetry API, which is a no-op until
+configure_tracing() installs an SDK tracer provider (needs opentelemetry-sdk).
+Spans go to TRACING_EXPORTER:
+
+  file     one JSON object per span appended to TRACING_FILE_PATH (default);
+           read it back with python -m app.tracing.view
+  otlp     OTLP/HTTP to TRACING_OTLP_ENDPOINT (needs
+           opentelemetry-exporter-otlp-proto-http), e.g. a local collector
+  console  pretty-printed to stdout
+"""
+from typing import Optional, Sequence
+from pathlib import Path
+import json
+import logging
+import threading
+from opentelemetry import trace
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def span_to_dict(span) -> dict:
+    """An SDK ReadableSpan as a flat, OTLP-like JSON document"""
+    context = span.get_span_context()
+    parent = span.parent
+    return {
+        "trace_id": f"{context.trace_id:032x}",
+        "span_id": f"{context.span_id:016x}",
+        "parent_span_id": f"{parent.span_id:016x}" if parent else None,
+        "name": span.name,
+        "kind": span.kind.name,
+        "service": span.resource.attributes.get("service.name"),
+        "start_time_unix_nano": span.start_time,
+        "end_time_unix_nano": span.end_time,
+        "duration_ms": round((span.end_time - span.start_time) / 1e6, 3) if span.end_time else None,
+        "status": span.status.status_code.name,
+        "status_description": span.status.description,
+        "attributes": dict(span.attributes or {}),
+        "events": [
+            {"name": event.name, "time_unix_nano": event.timestamp, "attributes": dict(event.attributes or {})}
+            for event in span.events
+        ],
+    }
+
+
+def _file_exporter_class():
+    from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+    class FileSpanExporter(SpanExporter):
+        """Appends finished spans to a JSON-lines file (a local stand-in for a collector)"""
+
+        def __init__(self, path: str):
+            self.path = Path(path)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._lock = threading.Lock()
+
+        def export(self, spans: Sequence) -> "SpanExportResult":
+            lines = "".join(json.dumps(span_to_dict(span), ensure_ascii=False, default=str) + "\n" for span in spans)
+            try:
+                with self._lock, self.path.open("a", encoding="utf-8") as f:
+                    f.write(lines)
+            except OSError as e:
+                logger.error(f"Could not write spans to {self.path}: {e}")
+                return SpanExportResult.FAILURE
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self) -> None:
+            pass
+
+    return FileSpanExporter
+
+
+def _exporter():
+    if settings.tracing_exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter(endpoint=settings.tracing_otlp_endpoint)
+    if settings.tracing_exporter == "console":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+        return ConsoleSpanExporter()
+    return _file_exporter_class()(settings.tracing_file_path)
+
+
+def configure_tracing(service_name: str) -> bool:
+    """Install the SDK tracer provider for this process once; False when tracing stays off
+
+    Safe before a fork: the batch processor restarts its export thread in
+    forked Celery worker processes.
+    """
+    global _configured
+    if not settings.tracing_enabled:
+        return False
+    with _configure_lock:
+        if _configured:
+            return True
+        try:
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+            from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+            exporter = _exporter()
+        except ImportError as e:
+            logger.warning(f"Tracing is enabled but its packages are missing, spans are dropped: {e}")
+            return False
+
+        provider = TracerProvider(
+            resource=Resource.create({"service.name": service_name, "deployment.environment": settings.environment}),
+            sampler=ParentBased(TraceIdRatioBased(settings.tracing_sample_ratio))
+        )
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+        trace.set_tracer_provider(provider)
+
+        from app.tracing.db import install_db_tracing
+        install_db_tracing()
+        _configured = True
+        logger.info(f"Tracing enabled for {service_name} ({settings.tracing_exporter})")
+        return True
+
+
+def shutdown_tracing() -> None:
+    """Flush buffered spans (app or worker shutdown)"""
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "shutdown"):
+        provider.shutdown()
+
+
+def current_trace_id() -> Optional[str]:
+    context = trace.get_current_span().get_span_context()
+    return f"{context.trace_id:032x}" if context.is_valid else None
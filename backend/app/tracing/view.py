@@ -0,0 +1,100 @@
+"""
+Read traces back from the JSON-lines span file.
+
+  python -m app.tracing.view                 slowest traces
+  python -m app.tracing.view --user 42       slowest traces of one user
+  python -m app.tracing.view TRACE_ID        one trace as a tree, with each
+                                             span's offset and duration
+
+The trace id of a request is in its X-Trace-Id response header.
+"""
+from typing import Dict, List, Optional
+from collections import defaultdict
+from pathlib import Path
+import argparse
+import json
+from app.config import settings
+
+SHOWN_ATTRIBUTES = (
+    "http.route", "http.response.status_code", "enduser.id", "celery.task_id", "celery.state",
+    "gen_ai.request.model", "gen_ai.usage.input_tokens", "gen_ai.usage.output_tokens",
+    "gen_ai.response.time_to_first_token", "db.response.returned_rows",
+)
+
+
+def load_spans(path: str) -> Dict[str, List[dict]]:
+    """Spans of the file grouped by trace id"""
+    traces: Dict[str, List[dict]] = defaultdict(list)
+    with Path(path).open(encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                span = json.loads(line)
+                traces[span["trace_id"]].append(span)
+    return traces
+
+
+def trace_duration_ms(spans: List[dict]) -> float:
+    start = min(span["start_time_unix_nano"] for span in spans)
+    end = max(span["end_time_unix_nano"] for span in spans)
+    return (end - start) / 1e6
+
+
+def root_span(spans: List[dict]) -> dict:
+    ids = {span["span_id"] for span in spans}
+    roots = [span for span in spans if span["parent_span_id"] not in ids]
+    return min(roots or spans, key=lambda span: span["start_time_unix_nano"])
+
+
+def print_slowest(traces: Dict[str, List[dict]], user: Optional[str], limit: int) -> None:
+    if user is not None:
+        traces = {
+            trace_id: spans for trace_id, spans in traces.items()
+            if any(str(span["attributes"].get("enduser.id")) == user for span in spans)
+        }
+    ranked = sorted(traces.items(), key=lambda item: trace_duration_ms(item[1]), reverse=True)[:limit]
+    for trace_id, spans in ranked:
+        root = root_span(spans)
+        print(f"{trace_id}  {trace_duration_ms(spans):>10.1f}ms  {len(spans):>4} spans  {root['name']}")
+
+
+def print_tree(spans: List[dict]) -> None:
+    children: Dict[Optional[str], List[dict]] = defaultdict(list)
+    ids = {span["span_id"] for span in spans}
+    for span in spans:
+        parent = span["parent_span_id"] if span["parent_span_id"] in ids else None
+        children[parent].append(span)
+    start = min(span["start_time_unix_nano"] for span in spans)
+
+    def walk(parent: Optional[str], depth: int) -> None:
+        for span in sorted(children[parent], key=lambda s: s["start_time_unix_nano"]):
+            offset = (span["start_time_unix_nano"] - start) / 1e6
+            attributes = " ".join(
+                f"{key}={span['attributes'][key]}" for key in SHOWN_ATTRIBUTES if key in span["attributes"]
+            )
+            status = " ERROR" if span["status"] == "ERROR" else ""
+            print(f"{offset:>9.1f}ms {span['duration_ms']:>9.1f}ms  {'  ' * depth}{span['name']} "
+                  f"[{span['service']}]{status} {attributes}".rstrip())
+            walk(span["span_id"], depth + 1)
+
+    walk(None, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trace_id", nargs="?", help="print this trace as a tree")
+    parser.add_argument("--file", default=settings.tracing_file_path)
+    parser.add_argument("--user", default=None, help="only traces with this enduser.id")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    traces = load_spans(args.file)
+    if args.trace_id:
+        if args.trace_id not in traces:
+            parser.error(f"trace {args.trace_id} not found in {args.file}")
+        print_tree(traces[args.trace_id])
+    else:
+        print_slowest(traces, args.user, args.limit)
+
+
+if __name__ == "__main__":
+    main()
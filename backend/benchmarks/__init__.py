@@ -0,0 +1 @@
+# Benchmarks (not part of the test suite)
@@ -0,0 +1,191 @@
+"""
+Fake Ollama-compatible server for load tests (no model, no GPU, no cost).
+
+Answers POST /api/chat (plain and streamed NDJSON) and GET /api/tags like
+Ollama does. How long a reply takes is time-to-first-token, drawn from a
+latency distribution, plus reply tokens / token rate; a share of requests
+can be made to fail.
+
+Point the Celery worker at it with OLLAMA_BASE_URL=http://127.0.0.1:11435
+and send chats with an Ollama model (e.g. gemma3:12b).
+
+Run from backend/:
+  python -m benchmarks.fake_ollama [--port 11435] [--latency lognormal:0.3,0.4]
+      [--tokens-per-second 40] [--tokens 120] [--error-rate 0.02] [--error-status 500]
+
+Latency distributions (seconds): fixed:S, uniform:LOW,HIGH, lognormal:MEDIAN,SIGMA
+"""
+from typing import Callable, Optional
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import json
+import math
+import random
+import threading
+import time
+
+REPLY_WORDS = "오늘 하루는 어땠어? 나는 네 생각을 많이 했어. 같이 산책이라도 갈까?".split()
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Sampler for a latency spec such as fixed:0.2, uniform:0.1,0.5 or lognormal:0.3,0.4"""
+    kind, _, args = spec.partition(":")
+    values = [float(value) for value in args.split(",") if value]
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "lognormal" and len(values) == 2:
+        median, sigma = values
+        return lambda rng: rng.lognormvariate(math.log(median), sigma)
+    raise ValueError(f"Invalid latency spec: {spec}")
+
+
+@dataclass
+class FakeOllamaConfig:
+    latency: str = "lognormal:0.3,0.4"
+    tokens_per_second: float = 40.0
+    tokens: int = 120
+    error_rate: float = 0.0
+    error_status: int = 500
+    seed: Optional[int] = None
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: FakeOllamaConfig):
+        super().__init__(address, FakeOllamaHandler)
+        self.config = config
+        self.sample_latency = parse_latency(config.latency)
+        self.rng = random.Random(config.seed)
+        self.rng_lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def draw(self):
+        """(time to first token, seconds per token, fail?) for one request"""
+        with self.rng_lock:
+            self.requests += 1
+            fail = self.rng.random() < self.config.error_rate
+            if fail:
+                self.errors += 1
+            return max(0.0, self.sample_latency(self.rng)), 1.0 / self.config.tokens_per_second, fail
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: FakeOllamaServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _chunk(self, body: dict) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode() + b"\n"
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": "gemma3:12b"}, {"name": "llama3.2"}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)) or 0)
+        if self.path != "/api/chat":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": "invalid JSON"})
+            return
+
+        first_token, per_token, fail = self.server.draw()
+        time.sleep(first_token)
+        if fail:
+            self._send_json(self.server.config.error_status, {"error": "injected failure"})
+            return
+
+        model = request.get("model", "gemma3:12b")
+        words = [REPLY_WORDS[i % len(REPLY_WORDS)] for i in range(self.server.config.tokens)]
+        started = time.perf_counter()
+
+        if request.get("stream", True):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for word in words:
+                time.sleep(per_token)
+                self._chunk({"model": model, "message": {"role": "assistant", "content": word + " "}, "done": False})
+            self._chunk(self._final(model, "", len(words), started, first_token))
+            self.wfile.write(b"0\r\n\r\n")
+            return
+
+        time.sleep(per_token * len(words))
+        self._send_json(200, self._final(model, " ".join(words), len(words), started, first_token))
+
+    @staticmethod
+    def _final(model: str, content: str, tokens: int, started: float, first_token: float) -> dict:
+        eval_ns = int((time.perf_counter() - started) * 1e9)
+        return {
+            "model": model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "message": {"role": "assistant", "content": content},
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": eval_ns + int(first_token * 1e9),
+            "load_duration": 0,
+            "prompt_eval_duration": int(first_token * 1e9),
+            "eval_count": tokens,
+            "eval_duration": eval_ns,
+        }
+
+
+def start_fake_ollama(host: str = "127.0.0.1", port: int = 11435, config: Optional[FakeOllamaConfig] = None) -> FakeOllamaServer:
+    """Serve in a background thread; stop with server.shutdown()"""
+    server = FakeOllamaServer((host, port), config or FakeOllamaConfig())
+    threading.Thread(target=server.serve_forever, name="fake-ollama", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", default=FakeOllamaConfig.latency, help="time-to-first-token distribution")
+    parser.add_argument("--tokens-per-second", type=float, default=FakeOllamaConfig.tokens_per_second)
+    parser.add_argument("--tokens", type=int, default=FakeOllamaConfig.tokens, help="reply length in tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    parse_latency(args.latency)
+    config = FakeOllamaConfig(
+        args.latency, args.tokens_per_second, args.tokens, args.error_rate, args.error_status, args.seed
+    )
+    server = FakeOllamaServer((args.host, args.port), config)
+    print(f"Fake Ollama on http://{args.host}:{args.port} ({config})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"{server.requests} requests, {server.errors} injected errors")
+
+
+if __name__ == "__main__":
+    main()
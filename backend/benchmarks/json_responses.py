@@ -0,0 +1,145 @@
+"""
+Micro-benchmark: FastAPI response_model serialization vs. app.api.responses.
+
+Builds large StoryListResponse and chat-history payloads from ORM-like rows
+and times three ways of turning them into response bytes:
+
+  legacy    per-row model_validate, FastAPI re-validates against
+            response_model, jsonable output + json.dumps (FastAPI < 0.130)
+  fastapi   per-row model_validate, FastAPI re-validates, then dumps with
+            pydantic-core (the dump_json path of newer FastAPI)
+  validated validate_list once + typed_json_response (no re-validation)
+
+Run from backend/:  python -m benchmarks.json_responses [--items 2000] [--repeat 20]
+"""
+from types import SimpleNamespace
+from datetime import datetime, timedelta, timezone
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from app.api.responses import typed_json_response, validate_list
+from app.character.schemas import CharacterBaseSchema, StoryListResponse, StoryWithCharacterSchema
+from app.chat.schemas import ChatHistoryResponse, CursorPaginatedChatHistoryResponse
+
+
+def story_rows(n: int):
+    now = datetime.now(timezone.utc)
+    character = SimpleNamespace(
+        name="하루", description="다정한 소꿉친구" * 10, system_prompt="당신은 하루입니다. " * 80,
+        tag_list="로맨스,일상,학원", main_image_url="https://cdn.example.com/characters/1/main.webp"
+    )
+    return [
+        SimpleNamespace(
+            id=i, created_at=now - timedelta(minutes=i), character_id=1,
+            storyline="비 오는 날 우산을 같이 쓰게 된 두 사람. " * 20, description="방과 후 이야기 " * 10,
+            background_image_url=f"https://cdn.example.com/stories/{i}.webp", is_active=True, character=character
+        )
+        for i in range(n)
+    ]
+
+
+def chat_rows(n: int):
+    now = datetime.now(timezone.utc)
+    return [
+        SimpleNamespace(
+            id=i, user_id=7, character_id=1, story_id=3, character_image_id=None,
+            contents="오늘 하루는 어땠어? 나는 네 생각을 많이 했어. " * 6, is_user_message=i % 2 == 0,
+            message_type="text", created_at=now - timedelta(seconds=i)
+        )
+        for i in range(n)
+    ]
+
+
+async def fastapi_path(response_model, content, dump_json: bool) -> bytes:
+    field = create_model_field(name="Response", type_=response_model, mode="serialization")
+    serialized = await serialize_response(field=field, response_content=content, dump_json=dump_json)
+    if dump_json:
+        return serialized
+    # JSONResponse.render
+    return json.dumps(serialized, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def story_cases(rows):
+    def legacy(dump_json):
+        stories = [StoryWithCharacterSchema.model_validate(row) for row in rows]
+        content = StoryListResponse(stories=stories, total=len(stories))
+        return asyncio.run(fastapi_path(StoryListResponse, content, dump_json))
+
+    def validated():
+        stories = validate_list(StoryWithCharacterSchema, rows)
+        content = StoryListResponse.model_construct(stories=stories, total=len(stories), has_more=False, next_cursor=None)
+        return typed_json_response(StoryListResponse, content).body
+
+    return legacy, validated
+
+
+def chat_cases(rows):
+    def legacy(dump_json):
+        messages = [ChatHistoryResponse.model_validate(row) for row in rows]
+        content = CursorPaginatedChatHistoryResponse(
+            messages=messages, has_more=False, next_cursor=None, total_count=len(messages)
+        )
+        return asyncio.run(fastapi_path(CursorPaginatedChatHistoryResponse, content, dump_json))
+
+    def validated():
+        messages = validate_list(ChatHistoryResponse, rows)
+        content = CursorPaginatedChatHistoryResponse.model_construct(
+            messages=messages, has_more=False, next_cursor=None, total_count=len(messages)
+        )
+        return typed_json_response(CursorPaginatedChatHistoryResponse, content).body
+
+    return legacy, validated
+
+
+def timed(fn, repeat: int) -> float:
+    fn()  # warm up (TypeAdapter / schema compilation)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def run(items: int, repeat: int) -> dict:
+    results = {}
+    for name, (legacy, validated) in {
+        "StoryListResponse": story_cases(story_rows(items)),
+        "CursorPaginatedChatHistoryResponse": chat_cases(chat_rows(items)),
+    }.items():
+        # Same document either way
+        assert json.loads(legacy(True)) == json.loads(validated())
+        results[name] = {
+            "legacy_ms": timed(lambda: legacy(False), repeat),
+            "fastapi_ms": timed(lambda: legacy(True), repeat),
+            "validated_ms": timed(validated, repeat),
+            "bytes": len(validated()),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=2000, help="rows per payload")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per case (median reported)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.items, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{args.items} items, median of {args.repeat} runs")
+    print(f"{'payload':<38}{'legacy':>10}{'fastapi':>10}{'validated':>11}{'speedup':>9}")
+    for name, r in results.items():
+        speedup = r["fastapi_ms"] / r["validated_ms"]
+        print(f"{name:<38}{r['legacy_ms']:>8.1f}ms{r['fastapi_ms']:>8.1f}ms{r['validated_ms']:>9.1f}ms{speedup:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+Load test of the chat path end to end, without paying for LLM calls.
+
+Runs each scenario for a fixed time with N concurrent virtual users and
+reports throughput, p50/p95/p99 latency, errors and SQL statements per
+request:
+
+  anonymous_token  POST /auth/anonymous-token with a fresh identity
+  chat             POST /llm/chat, then poll /llm/chat_history_status until the
+                   reply is done ("chat" is the POST, "chat_e2e" the whole turn)
+  status           GET /llm/chat_history_status of an existing message
+  chat_history     GET /chat/history of the virtual user's conversation
+
+The chat scenarios need a Celery worker whose Ollama client points at the fake
+server (benchmarks/fake_ollama.py), e.g. OLLAMA_BASE_URL=http://127.0.0.1:11435,
+or a worker with FAKE_LLM_ENABLED=true and --model fake-echo (no HTTP at all).
+
+By default requests go through the ASGI app in this process (--in-process), so
+SQL statements are counted; against a running server (--base-url) they are not.
+Results are written as JSON named after the current commit; compare two runs
+with --compare OLD.json NEW.json.
+
+Run from backend/:
+  python -m benchmarks.fake_ollama &
+  python -m benchmarks.load_test [--scenarios chat,chat_history] [--concurrency 20]
+      [--duration 30] [--story-id 1] [--model gemma3:12b] [--base-url http://localhost:8000]
+"""
+from typing import Awaitable, Callable, Dict, List, Optional
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import time
+import httpx
+
+SCENARIOS = ("anonymous_token", "chat", "status", "chat_history")
+TERMINAL_STATUSES = {"completed", "failed", "cancelled"}
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+class Recorder:
+    """Latency samples and error counts per metric name"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, name: str, seconds: float, ok: bool) -> None:
+        self.samples[name].append(seconds)
+        if not ok:
+            self.errors[name] += 1
+
+    async def timed(self, name: str, request: Awaitable[httpx.Response]) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError:
+            self.record(name, time.perf_counter() - start, False)
+            return None
+        self.record(name, time.perf_counter() - start, response.status_code < 400)
+        return response
+
+
+def summarize(samples: List[float], errors: int, elapsed: float, queries: Optional[int]) -> dict:
+    ms = sorted(sample * 1000 for sample in samples)
+    cuts = statistics.quantiles(ms, n=100, method="inclusive") if len(ms) > 1 else ms * 99
+    return {
+        "requests": len(ms),
+        "errors": errors,
+        "throughput_rps": round(len(ms) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(ms), 2) if ms else None,
+        "p50_ms": round(cuts[49], 2) if ms else None,
+        "p95_ms": round(cuts[94], 2) if ms else None,
+        "p99_ms": round(cuts[98], 2) if ms else None,
+        "max_ms": round(ms[-1], 2) if ms else None,
+        "queries": queries,
+        "queries_per_request": round(queries / len(ms), 2) if queries is not None and ms else None,
+    }
+
+
+async def anonymous_token(client: httpx.AsyncClient) -> Optional[dict]:
+    response = await client.post("/auth/anonymous-token", json={"refresh_token": ""})
+    return response.json() if response.status_code == 200 else None
+
+
+class VirtualUser:
+    """One simulated client with its own anonymous identity"""
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, args):
+        self.client = client
+        self.recorder = recorder
+        self.args = args
+        self.headers: Dict[str, str] = {}
+        self.last_message_id: Optional[int] = None
+
+    async def login(self) -> None:
+        tokens = await anonymous_token(self.client)
+        if tokens is None:
+            raise RuntimeError("Could not get an anonymous token")
+        self.headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    async def send_chat(self, record: bool = True) -> None:
+        recorder = self.recorder if record else Recorder()
+        start = time.perf_counter()
+        response = await recorder.timed("chat", self.client.post(
+            "/llm/chat",
+            json={"message": "오늘 뭐 했어?", "story_id": self.args.story_id, "model": self.args.model},
+            headers=self.headers
+        ))
+        if response is None or response.status_code >= 400:
+            return
+        self.last_message_id = response.json()["story_chat_history_id"]
+
+        deadline = start + self.args.chat_timeout
+        status = None
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(self.args.poll_interval)
+            poll = await recorder.timed(
+                "status_poll", self.client.get(f"/llm/chat_history_status/{self.last_message_id}")
+            )
+            if poll is not None and poll.status_code == 200:
+                status = poll.json()["status"]
+                if status in TERMINAL_STATUSES:
+                    break
+        recorder.record("chat_e2e", time.perf_counter() - start, status == "completed")
+
+    async def run(self, scenario: str) -> None:
+        if scenario == "anonymous_token":
+            await self.recorder.timed("anonymous_token", self.client.post(
+                "/auth/anonymous-token", json={"refresh_token": ""}
+            ))
+        elif scenario == "chat":
+            await self.send_chat()
+        elif scenario == "status":
+            await self.recorder.timed("status", self.client.get(f"/llm/chat_history_status/{self.last_message_id}"))
+        elif scenario == "chat_history":
+            await self.recorder.timed("chat_history", self.client.get(
+                "/chat/history", params={"story_id": self.args.story_id, "limit": 20}, headers=self.headers
+            ))
+
+
+def query_counter():
+    """Counts SQL statements on every engine of this process"""
+    from app.database.query_budget import QueryCounter
+    return QueryCounter()
+
+
+async def run_scenario(scenario: str, client: httpx.AsyncClient, args) -> Dict[str, dict]:
+    users = [VirtualUser(client, Recorder(), args) for _ in range(args.concurrency)]
+    # Setup outside the measurement: identities, and a message for the pollers to read
+    await asyncio.gather(*(user.login() for user in users))
+    if scenario in ("status", "chat_history"):
+        await asyncio.gather(*(user.send_chat(record=False) for user in users))
+
+    recorder = Recorder()
+    for user in users:
+        user.recorder = recorder
+
+    async def loop(user: VirtualUser) -> None:
+        while time.perf_counter() < deadline:
+            await user.run(scenario)
+
+    counter = query_counter() if args.in_process else None
+    start = time.perf_counter()
+    deadline = start + args.duration
+    if counter is not None:
+        with counter:
+            await asyncio.gather(*(loop(user) for user in users))
+    else:
+        await asyncio.gather(*(loop(user) for user in users))
+    elapsed = time.perf_counter() - start
+
+    queries = counter.count if counter is not None else None
+    results = {}
+    for name, samples in recorder.samples.items():
+        # Statements are attributed to the scenario's main request
+        results[name] = summarize(samples, recorder.errors[name], elapsed, queries if name == scenario else None)
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    if args.in_process:
+        from app.main import app
+        transport = httpx.ASGITransport(app=app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.request_timeout)
+    else:
+        limits = httpx.Limits(max_connections=args.concurrency * 2)
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.request_timeout, limits=limits)
+
+    async with client:
+        scenarios = {}
+        for scenario in args.scenarios:
+            print(f"Running {scenario} for {args.duration}s with {args.concurrency} users...")
+            scenarios[scenario] = await run_scenario(scenario, client, args)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "mode": "in-process" if args.in_process else args.base_url,
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "story_id": args.story_id,
+            "model": args.model,
+        },
+        "scenarios": scenarios,
+    }
+
+
+def print_results(results: dict) -> None:
+    print(f"{'metric':<18}{'req':>7}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'q/req':>7}")
+    for metrics in results["scenarios"].values():
+        for name, r in metrics.items():
+            qpr = "-" if r["queries_per_request"] is None else f"{r['queries_per_request']:.1f}"
+            p50, p95, p99 = (f"{r[key]:.0f}ms" if r[key] is not None else "-" for key in ("p50_ms", "p95_ms", "p99_ms"))
+            print(f"{name:<18}{r['requests']:>7}{r['errors']:>6}{r['throughput_rps']:>9.1f}{p50:>9}{p95:>9}{p99:>9}{qpr:>7}")
+
+
+def compare(old_path: str, new_path: str) -> None:
+    old, new = (json.loads(Path(path).read_text()) for path in (old_path, new_path))
+    print(f"{old['meta']['commit']} -> {new['meta']['commit']}")
+    print(f"{'metric':<18}{'rps':>18}{'p95':>22}{'q/req':>14}")
+    for scenario, metrics in new["scenarios"].items():
+        for name, r in metrics.items():
+            before = old["scenarios"].get(scenario, {}).get(name)
+            if before is None:
+                continue
+            rps = f"{before['throughput_rps']:.1f} -> {r['throughput_rps']:.1f}"
+            p95 = f"{before['p95_ms']}ms -> {r['p95_ms']}ms"
+            qpr = f"{before['queries_per_request']} -> {r['queries_per_request']}"
+            print(f"{name:<18}{rps:>18}{p95:>22}{qpr:>14}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated, run in order")
+    parser.add_argument("--concurrency", type=int, default=10, help="virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per scenario")
+    parser.add_argument("--story-id", type=int, default=1)
+    parser.add_argument("--model", default="gemma3:12b", help="an Ollama model, served by the fake server")
+    parser.add_argument("--base-url", default=None, help="test a running server instead of the in-process app")
+    parser.add_argument("--poll-interval", type=float, default=0.25)
+    parser.add_argument("--chat-timeout", type=float, default=60.0)
+    parser.add_argument("--request-timeout", type=float, default=30.0)
+    parser.add_argument("--output", default=None, help="results JSON (default: benchmarks/results/load-<commit>-<time>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two results files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    args.scenarios = [scenario for scenario in args.scenarios.split(",") if scenario]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    args.in_process = args.base_url is None
+
+    results = asyncio.run(run(args))
+    print_results(results)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / (
+        f"load-{results['meta']['commit'] or 'unknown'}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
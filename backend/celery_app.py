@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.schedules import crontab
 import time
 import os
 
@@ -44,9 +45,40 @@ celery_app.conf.update(
     include=[
         'celery_app',
         'app.llm.tasks',  # Re-enabled for LLM tasks
-    ]
+        'app.database.tasks',
+        'app.ranking.tasks',
+        'app.login.tasks',
+        'app.images.tasks',
+    ],
+    # Periodic jobs (run with: celery -A celery_app beat)
+    beat_schedule={
+        'create-chat-history-partitions': {
+            'task': 'app.database.tasks.create_chat_history_partitions',
+            'schedule': crontab(minute=0, hour=3),
+        },
+        'archive-chat-history-partitions': {
+            'task': 'app.database.tasks.archive_chat_history_partitions',
+            'schedule': crontab(minute=30, hour=3, day_of_month=1),
+        },
+        'purge-expired-data': {
+            'task': 'app.database.tasks.purge_expired_data',
+            'schedule': crontab(minute=15),
+        },
+        'refresh-popularity': {
+            'task': 'app.ranking.tasks.refresh_popularity',
+            'schedule': crontab(minute='*/10'),
+        },
+        'refresh-kakao-tokens': {
+            'task': 'app.login.tasks.refresh_kakao_tokens',
+            'schedule': crontab(minute='*/15'),
+        },
+    },
 )
 
+# Propagate trace context through task headers; workers export their own spans
+from app.tracing.celery_signals import install_celery_tracing
+install_celery_tracing()
+
 @celery_app.task
 def add_numbers(x: int, y: int) -> int:
     """Simple task to add two numbers"""
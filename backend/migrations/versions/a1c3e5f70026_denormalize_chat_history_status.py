@@ -0,0 +1,50 @@
+"""denormalize current status onto story_chat_histories
+
+Revision ID: a1c3e5f70026
+Revises: 
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c3e5f70026'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('story_chat_histories', sa.Column('status', sa.String(length=32), nullable=True))
+    op.add_column('story_chat_histories', sa.Column('error_message', sa.Text(), nullable=True))
+    op.add_column('story_chat_histories', sa.Column('elapsed_time', sa.Float(), nullable=True))
+    op.add_column('story_chat_histories', sa.Column('status_updated_at', sa.DateTime(timezone=True), nullable=True))
+
+    # Backfill from the latest audit row of each message
+    op.execute("""
+        UPDATE story_chat_histories h
+        SET status = latest.status,
+            error_message = latest.error_message,
+            elapsed_time = latest.elapsed_time,
+            status_updated_at = latest.created_at
+        FROM (
+            SELECT DISTINCT ON (story_chat_history_id)
+                   story_chat_history_id, status, error_message, elapsed_time, created_at
+            FROM story_chat_history_statuses
+            ORDER BY story_chat_history_id, created_at DESC, id DESC
+        ) latest
+        WHERE latest.story_chat_history_id = h.id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('story_chat_histories', 'status_updated_at')
+    op.drop_column('story_chat_histories', 'elapsed_time')
+    op.drop_column('story_chat_histories', 'error_message')
+    op.drop_column('story_chat_histories', 'status')
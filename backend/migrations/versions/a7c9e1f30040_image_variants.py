@@ -0,0 +1,32 @@
+"""image variants and blur placeholders on profiles and character images
+
+Revision ID: a7c9e1f30040
+Revises: f6b8d0e20037
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c9e1f30040'
+down_revision: Union[str, Sequence[str], None] = 'f6b8d0e20037'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ('profiles', 'character_images'):
+        op.add_column(table, sa.Column('image_variants', sa.JSON(), nullable=True))
+        op.add_column(table, sa.Column('image_placeholder', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ('character_images', 'profiles'):
+        op.drop_column(table, 'image_placeholder')
+        op.drop_column(table, 'image_variants')
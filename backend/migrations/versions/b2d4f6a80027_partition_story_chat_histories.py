@@ -0,0 +1,94 @@
+"""partition story_chat_histories by month on created_at
+
+Revision ID: b2d4f6a80027
+Revises: a1c3e5f70026
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2d4f6a80027'
+down_revision: Union[str, Sequence[str], None] = 'a1c3e5f70026'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS_AHEAD = 3
+
+
+def _add_months(value: date, months: int) -> date:
+    month_index = value.year * 12 + value.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+
+    # The audit table can no longer reference story_chat_histories(id) alone
+    op.drop_constraint('story_chat_history_statuses_story_chat_history_id_fkey', 'story_chat_history_statuses', type_='foreignkey')
+    op.create_index('ix_story_chat_history_statuses_story_chat_history_id', 'story_chat_history_statuses', ['story_chat_history_id'])
+
+    op.rename_table('story_chat_histories', 'story_chat_histories_legacy')
+    op.execute("ALTER TABLE story_chat_histories_legacy RENAME CONSTRAINT story_chat_histories_pkey TO story_chat_histories_legacy_pkey")
+    op.execute("UPDATE story_chat_histories_legacy SET created_at = now() WHERE created_at IS NULL")
+
+    op.execute("""
+        CREATE TABLE story_chat_histories (
+            LIKE story_chat_histories_legacy INCLUDING DEFAULTS,
+            PRIMARY KEY (id, created_at),
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (character_id) REFERENCES characters (id),
+            FOREIGN KEY (story_id) REFERENCES stories (id),
+            FOREIGN KEY (character_image_id) REFERENCES character_images (id)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER SEQUENCE story_chat_histories_id_seq OWNED BY story_chat_histories.id")
+
+    oldest = conn.execute(sa.text("SELECT min(created_at) FROM story_chat_histories_legacy")).scalar()
+    today = datetime.now(timezone.utc).date()
+    start = date((oldest or today).year, (oldest or today).month, 1)
+    last = _add_months(date(today.year, today.month, 1), PARTITIONS_AHEAD)
+    while start <= last:
+        end = _add_months(start, 1)
+        op.execute(
+            f"CREATE TABLE story_chat_histories_y{start.year:04d}m{start.month:02d} "
+            f"PARTITION OF story_chat_histories FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        start = end
+
+    op.create_index('ix_story_chat_histories_user_story_created', 'story_chat_histories', ['user_id', 'story_id', 'created_at'])
+
+    op.execute("INSERT INTO story_chat_histories SELECT * FROM story_chat_histories_legacy")
+    op.drop_table('story_chat_histories_legacy')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.rename_table('story_chat_histories', 'story_chat_histories_partitioned')
+    op.execute("""
+        CREATE TABLE story_chat_histories (
+            LIKE story_chat_histories_partitioned INCLUDING DEFAULTS,
+            PRIMARY KEY (id),
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (character_id) REFERENCES characters (id),
+            FOREIGN KEY (story_id) REFERENCES stories (id),
+            FOREIGN KEY (character_image_id) REFERENCES character_images (id)
+        )
+    """)
+    op.execute("ALTER SEQUENCE story_chat_histories_id_seq OWNED BY story_chat_histories.id")
+    op.execute("INSERT INTO story_chat_histories SELECT * FROM story_chat_histories_partitioned")
+    op.execute("DROP TABLE story_chat_histories_partitioned CASCADE")
+
+    op.drop_index('ix_story_chat_history_statuses_story_chat_history_id', table_name='story_chat_history_statuses')
+    op.execute("DELETE FROM story_chat_history_statuses s WHERE NOT EXISTS (SELECT 1 FROM story_chat_histories h WHERE h.id = s.story_chat_history_id)")
+    op.create_foreign_key(
+        'story_chat_history_statuses_story_chat_history_id_fkey',
+        'story_chat_history_statuses', 'story_chat_histories',
+        ['story_chat_history_id'], ['id']
+    )
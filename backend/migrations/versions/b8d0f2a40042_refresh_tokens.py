@@ -0,0 +1,62 @@
+"""hashed refresh tokens in their own table
+
+Revision ID: b8d0f2a40042
+Revises: a7c9e1f30040
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d0f2a40042'
+down_revision: Union[str, Sequence[str], None] = 'a7c9e1f30040'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'refresh_tokens',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('token_hash', sa.String(length=64), nullable=False),
+        sa.Column('family_id', sa.String(length=36), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('revoked_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('token_hash'),
+    )
+    op.create_index('ix_refresh_tokens_user_id', 'refresh_tokens', ['user_id'])
+    op.create_index('ix_refresh_tokens_family_id', 'refresh_tokens', ['family_id'])
+    op.create_index('ix_refresh_tokens_expires_at', 'refresh_tokens', ['expires_at'])
+
+    # Carry over live plaintext tokens as hashes, one family per user
+    op.execute(
+        """
+        INSERT INTO refresh_tokens (user_id, token_hash, family_id, expires_at)
+        SELECT id, encode(sha256(convert_to(refresh_token, 'UTF8')), 'hex'), gen_random_uuid()::text, refresh_token_expires_at
+        FROM users
+        WHERE refresh_token IS NOT NULL AND refresh_token_expires_at > now()
+        """
+    )
+
+    op.drop_column('users', 'refresh_token_expires_at')
+    op.drop_column('users', 'refresh_token')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Plaintext tokens cannot be recovered from their hashes; users log in again
+    op.add_column('users', sa.Column('refresh_token', sa.Text(), nullable=True))
+    op.add_column('users', sa.Column('refresh_token_expires_at', sa.DateTime(timezone=True), nullable=True))
+    op.drop_index('ix_refresh_tokens_expires_at', table_name='refresh_tokens')
+    op.drop_index('ix_refresh_tokens_family_id', table_name='refresh_tokens')
+    op.drop_index('ix_refresh_tokens_user_id', table_name='refresh_tokens')
+    op.drop_table('refresh_tokens')
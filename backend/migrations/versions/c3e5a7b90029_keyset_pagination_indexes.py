@@ -0,0 +1,38 @@
+"""indexes for keyset pagination
+
+Revision ID: c3e5a7b90029
+Revises: b2d4f6a80027
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e5a7b90029'
+down_revision: Union[str, Sequence[str], None] = 'b2d4f6a80027'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index('ix_story_chat_histories_user_story_created', table_name='story_chat_histories')
+    op.create_index(
+        'ix_story_chat_histories_user_story_created', 'story_chat_histories',
+        ['user_id', 'story_id', 'created_at', 'id']
+    )
+    op.create_index('ix_stories_active_id', 'stories', ['id'], postgresql_where=sa.text('is_active'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_stories_active_id', table_name='stories')
+    op.drop_index('ix_story_chat_histories_user_story_created', table_name='story_chat_histories')
+    op.create_index(
+        'ix_story_chat_histories_user_story_created', 'story_chat_histories',
+        ['user_id', 'story_id', 'created_at']
+    )
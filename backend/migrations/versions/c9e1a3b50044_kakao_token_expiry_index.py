@@ -0,0 +1,31 @@
+"""index users by kakao token expiry for the refresh sweeper
+
+Revision ID: c9e1a3b50044
+Revises: b8d0f2a40042
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e1a3b50044'
+down_revision: Union[str, Sequence[str], None] = 'b8d0f2a40042'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_users_kakao_token_expires_at', 'users', ['kakao_token_expires_at'],
+        postgresql_where=sa.text('kakao_refresh_token IS NOT NULL')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_kakao_token_expires_at', table_name='users')
@@ -0,0 +1,38 @@
+"""one story match per user and story
+
+Revision ID: d0f2b4c60046
+Revises: c9e1a3b50044
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd0f2b4c60046'
+down_revision: Union[str, Sequence[str], None] = 'c9e1a3b50044'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep the oldest of any duplicates left by the old check-then-insert race
+    op.execute("""
+        DELETE FROM story_user_matches m
+        USING story_user_matches keep
+        WHERE m.user_id = keep.user_id
+          AND m.story_id = keep.story_id
+          AND m.id > keep.id
+    """)
+    op.create_unique_constraint(
+        'uq_story_user_matches_user_story', 'story_user_matches', ['user_id', 'story_id']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_story_user_matches_user_story', 'story_user_matches', type_='unique')
@@ -0,0 +1,57 @@
+"""normalized tags and character_tags
+
+Revision ID: d4f6b8c00031
+Revises: c3e5a7b90029
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f6b8c00031'
+down_revision: Union[str, Sequence[str], None] = 'c3e5a7b90029'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'tags',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('name', sa.String(length=64), nullable=False, unique=True),
+    )
+    op.create_table(
+        'character_tags',
+        sa.Column('character_id', sa.Integer(), sa.ForeignKey('characters.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('tag_id', sa.Integer(), sa.ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True),
+    )
+    op.create_index('ix_character_tags_tag_character', 'character_tags', ['tag_id', 'character_id'])
+
+    # Populate from the legacy comma-joined Character.tag_list
+    op.execute("""
+        INSERT INTO tags (name)
+        SELECT DISTINCT left(trim(t.name), 64)
+        FROM characters c, regexp_split_to_table(c.tag_list, ',') AS t(name)
+        WHERE trim(t.name) <> ''
+        ON CONFLICT (name) DO NOTHING
+    """)
+    op.execute("""
+        INSERT INTO character_tags (character_id, tag_id)
+        SELECT DISTINCT c.id, tags.id
+        FROM characters c, regexp_split_to_table(c.tag_list, ',') AS t(name)
+        JOIN tags ON tags.name = left(trim(t.name), 64)
+        ON CONFLICT DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_character_tags_tag_character', table_name='character_tags')
+    op.drop_table('character_tags')
+    op.drop_table('tags')
@@ -0,0 +1,32 @@
+"""index profiles by user for the profile ETag probe
+
+Revision ID: e1a3c5d70037
+Revises: d0f2b4c60046
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a3c5d70037'
+down_revision: Union[str, Sequence[str], None] = 'd0f2b4c60046'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Covers id too, so get_profile_etag is an index-only scan
+    op.create_index(
+        'ix_profiles_user_updated', 'profiles', ['user_id', 'updated_at'],
+        postgresql_include=['id']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_profiles_user_updated', table_name='profiles')
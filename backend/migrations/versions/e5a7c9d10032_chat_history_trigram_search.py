@@ -0,0 +1,37 @@
+"""trigram search index on chat history contents
+
+Revision ID: e5a7c9d10032
+Revises: d4f6b8c00031
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a7c9d10032'
+down_revision: Union[str, Sequence[str], None] = 'd4f6b8c00031'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+    # Created on the partitioned parent, so every existing and future monthly
+    # partition gets its own GIN index
+    op.create_index(
+        'ix_story_chat_histories_contents_trgm', 'story_chat_histories',
+        ['user_id', 'story_id', 'contents'],
+        postgresql_using='gin',
+        postgresql_ops={'contents': 'gin_trgm_ops'}
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_story_chat_histories_contents_trgm', table_name='story_chat_histories')
@@ -0,0 +1,32 @@
+"""users.updated_at, bumped by Kakao login upserts
+
+Revision ID: f2b4d6e80046
+Revises: e1a3c5d70037
+Create Date: 2026-10-19 20:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b4d6e80046'
+down_revision: Union[str, Sequence[str], None] = 'e1a3c5d70037'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'users',
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True)
+    )
+    op.execute("UPDATE users SET updated_at = created_at WHERE created_at IS NOT NULL")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'updated_at')
@@ -0,0 +1,69 @@
+"""
+Shared fixtures: the app on an in-memory SQLite database with a small catalog.
+
+Redis is not required; without it the caches fall back to the database, so
+the query budgets below are checked against the uncached code paths.
+"""
+import os
+
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ.setdefault("DEBUG", "false")
+os.environ.setdefault("TRACING_ENABLED", "false")
+
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.api.jwt_auth import create_access_token_for_user
+from app.database.connection import SessionLocal, engine
+from app.database.models import (
+    Base, Character, CharacterImage, CharacterTag, Story, StoryChatHistory, StoryUserMatch, Tag, User
+)
+
+# app, query_budget_client and query_stats fixtures
+pytest_plugins = ["app.database.pytest_plugin"]
+
+CHARACTER_COUNT = 6
+USER_ID = 1
+
+
+@pytest.fixture(scope="session", autouse=True)
+def catalog():
+    """Schema plus characters with tags, images and stories, and one user's conversation"""
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    tags = [Tag(name=f"tag{i}") for i in range(2)]
+    db.add_all(tags)
+    db.add(User(id=USER_ID, is_anonymous=False))
+    db.flush()
+
+    for i in range(CHARACTER_COUNT):
+        character = Character(
+            name=f"character{i}", description="d", system_prompt="s", tag_list="tag0,tag1", main_image_url="m"
+        )
+        db.add(character)
+        db.flush()
+        db.add_all(CharacterTag(character_id=character.id, tag_id=tag.id) for tag in tags)
+        db.add_all(
+            CharacterImage(character_id=character.id, image_url=f"i{j}", offset=j, bounty=0) for j in range(2)
+        )
+        db.add(Story(character_id=character.id, storyline="s", description="d", background_image_url="b"))
+    db.flush()
+
+    now = datetime.now(timezone.utc)
+    db.add(StoryUserMatch(story_id=1, user_id=USER_ID, user_name_in_story="u", progress=0, intimacy=0))
+    db.add_all(
+        StoryChatHistory(
+            id=i + 1, user_id=USER_ID, character_id=1, story_id=1, contents=f"message {i}",
+            is_user_message=i % 2 == 0, message_type="text", is_active=True,
+            created_at=now - timedelta(minutes=i)
+        )
+        for i in range(8)
+    )
+    db.commit()
+    db.close()
+    yield
+    Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def auth_headers():
+    return {"Authorization": f"Bearer {create_access_token_for_user(USER_ID)}"}
@@ -0,0 +1,54 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.api.jwt_auth import verify_anonymous_refresh_token
+from app.api.refresh_tokens import RefreshTokenService
+from app.database.connection import SessionLocal
+from app.database.models import User
+from tests.conftest import USER_ID
+
+
+@pytest.fixture
+def client(app):
+    with TestClient(app) as client:
+        yield client
+
+
+def issue_token(user_id: int) -> str:
+    db = SessionLocal()
+    try:
+        token = RefreshTokenService(db).issue(user_id)
+        db.commit()
+        return token
+    finally:
+        db.close()
+
+
+def test_anonymous_token_exchanges_a_legacy_anonymous_token_once(client):
+    db = SessionLocal()
+    user = User(is_anonymous=True, is_active=True)
+    db.add(user)
+    db.commit()
+    anonymous_id = user.id
+    db.close()
+    legacy = issue_token(anonymous_id)
+
+    response = client.post("/auth/anonymous-token", json={"refresh_token": legacy})
+    assert response.status_code == 200
+    assert response.json()["user_id"] == anonymous_id
+    assert verify_anonymous_refresh_token(response.json()["refresh_token"]) == anonymous_id
+
+    again = client.post("/auth/anonymous-token", json={"refresh_token": legacy})
+    assert again.json()["user_id"] != anonymous_id
+
+
+def test_anonymous_token_does_not_accept_a_kakao_users_token(client):
+    kakao_token = issue_token(USER_ID)
+
+    response = client.post("/auth/anonymous-token", json={"refresh_token": kakao_token})
+    assert response.status_code == 200
+    assert response.json()["user_id"] != USER_ID
+
+    # the Kakao token is untouched and still rotates through /auth/refresh
+    refreshed = client.post("/auth/refresh", json={"refresh_token": kakao_token})
+    assert refreshed.status_code == 200
+    assert refreshed.json()["user_type"] == "authenticated"
@@ -0,0 +1,9 @@
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.mark.parametrize("q", ["", " ", "  \t "])
+def test_search_rejects_a_blank_query(app, auth_headers, q):
+    with TestClient(app) as client:
+        response = client.get("/chat/search", params={"story_id": 1, "q": q}, headers=auth_headers)
+    assert response.status_code == 422
@@ -0,0 +1,119 @@
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import text
+from app.config import settings
+from app.database.connection import SessionLocal
+from app.database.instrumentation import QueryStats, fingerprint, normalize_statement, record_queries
+from app.database.models import Character
+from app.database.pytest_plugin import QueryBudgetClient
+from app.database.query_budget import query_budget
+from tests.conftest import CHARACTER_COUNT
+
+
+@pytest.mark.parametrize("statement, normalized", [
+    ("SELECT * FROM users WHERE id = 42", "SELECT * FROM users WHERE id = ?"),
+    ("SELECT * FROM t WHERE name = 'it''s' AND score > 1.5", "SELECT * FROM t WHERE name = ? AND score > ?"),
+    ("SELECT * FROM t WHERE id IN (?, ?, ?)", "SELECT * FROM t WHERE id IN (?)"),
+    ("SELECT * FROM t WHERE id IN (%(id_1)s, %(id_2)s)", "SELECT * FROM t WHERE id IN (?)"),
+    ("SELECT * FROM t WHERE id IN ($1, $2)", "SELECT * FROM t WHERE id IN (?)"),
+    ("SELECT a\n  FROM t\n WHERE b = :b", "SELECT a FROM t WHERE b = :b"),
+])
+def test_normalize_statement(statement, normalized):
+    assert normalize_statement(statement) == normalized
+
+
+def test_fingerprint_ignores_literals_and_list_length():
+    assert fingerprint("SELECT * FROM t WHERE id = 1") == fingerprint("SELECT * FROM t WHERE id = 2")
+    assert fingerprint("SELECT * FROM t WHERE id IN (?)") == fingerprint("SELECT * FROM t WHERE id IN (?, ?)")
+    assert fingerprint("SELECT * FROM t WHERE id = 1") != fingerprint("SELECT * FROM u WHERE id = 1")
+
+
+def test_repeated_uses_the_n_plus_one_threshold():
+    stats = QueryStats()
+    for i in range(settings.sql_n_plus_one_threshold - 1):
+        stats.add(f"SELECT * FROM images WHERE character_id = {i}", 0.001)
+    stats.add("SELECT * FROM characters", 0.001)
+    assert stats.count == settings.sql_n_plus_one_threshold
+    assert stats.repeated() == []
+
+    stats.add("SELECT * FROM images WHERE character_id = 99", 0.001)
+    [repeated] = stats.repeated()
+    assert repeated.count == settings.sql_n_plus_one_threshold
+    assert repeated.statement == "SELECT * FROM images WHERE character_id = ?"
+    assert stats.repeated(threshold=settings.sql_n_plus_one_threshold + 1) == []
+
+
+def test_record_queries_is_scoped():
+    with record_queries() as stats:
+        db = SessionLocal()
+        db.execute(text("SELECT 1"))
+        db.close()
+    db = SessionLocal()
+    db.execute(text("SELECT 2"))
+    db.close()
+    assert stats.count == 1
+
+
+def test_query_stats_fixture(query_stats):
+    db = SessionLocal()
+    db.query(Character).all()
+    db.close()
+    assert query_stats.count == 1
+
+
+def test_budgeted_routes_pass(query_budget_client, auth_headers):
+    for url in ("/characters/", "/characters/profile/1", "/chat/history?story_id=1"):
+        assert query_budget_client.get(url, headers=auth_headers).status_code == 200
+
+
+def lazy_load_app() -> FastAPI:
+    app = FastAPI()
+
+    def image_counts():
+        db = SessionLocal()
+        try:
+            # One query for the characters, then one lazy load of images per character
+            return {c.id: len(c.images) for c in db.query(Character).all()}
+        finally:
+            db.close()
+
+    @app.get("/images-per-character")
+    def images_per_character():
+        return image_counts()
+
+    @app.get("/budgeted-images-per-character")
+    @query_budget(CHARACTER_COUNT + 1)
+    def budgeted_images_per_character():
+        return image_counts()
+
+    @app.get("/two-queries")
+    @query_budget(1)
+    def two_queries():
+        db = SessionLocal()
+        try:
+            db.execute(text("SELECT 1"))
+            db.execute(text("SELECT 2"))
+        finally:
+            db.close()
+        return {}
+
+    return app
+
+
+def test_lazy_load_loop_fails_as_n_plus_one():
+    client = QueryBudgetClient(lazy_load_app())
+    with pytest.raises(pytest.fail.Exception, match="likely N\\+1") as failure:
+        client.get("/images-per-character")
+    assert "FROM character_images" in str(failure.value)
+
+
+def test_lazy_load_loop_within_budget_still_fails():
+    client = QueryBudgetClient(lazy_load_app())
+    with pytest.raises(pytest.fail.Exception, match="likely N\\+1"):
+        client.get("/budgeted-images-per-character")
+
+
+def test_over_budget_fails():
+    client = QueryBudgetClient(lazy_load_app())
+    with pytest.raises(pytest.fail.Exception, match="issued 2 queries, budget is 1"):
+        client.get("/two-queries")
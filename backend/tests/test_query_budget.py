@@ -0,0 +1,85 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from app.database.connection import SessionLocal
+from app.database.query_budget import QueryBudgetExceeded, _api_routes, assert_query_budget, query_budget
+
+BUDGETED_URLS = [
+    "/characters/",
+    "/characters/by-tags?tags=tag0&tags=tag1",
+    "/characters/tags",
+    "/characters/1/photos",
+    "/characters/profile/1",
+    "/stories/",
+    "/stories/by-tags?tags=tag0",
+    "/stories/character/1",
+    "/stories/user-match/",
+    "/chat/history?story_id=1",
+    "/chat/export",
+    "/chat/export?format=csv&story_id=1",
+]
+
+# Not runnable here: /popular is served from Redis rankings only, search needs Postgres (pg_trgm)
+UNCHECKED_PATHS = {"/characters/popular", "/stories/popular", "/chat/search"}
+
+
+@pytest.fixture
+def client(app):
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.mark.parametrize("url", BUDGETED_URLS)
+def test_route_stays_within_budget(client, auth_headers, url):
+    response = assert_query_budget(client, "GET", url, headers=auth_headers)
+    assert response.status_code == 200
+
+
+def test_every_budgeted_route_is_checked(app):
+    checked = {url.split("?")[0] for url in BUDGETED_URLS}
+    budgeted = {
+        route.path for route in _api_routes(app.routes) if hasattr(route.endpoint, "__query_budget__")
+    }
+    for path in budgeted - UNCHECKED_PATHS:
+        assert any(route_matches(path, url) for url in checked), f"{path} has a budget but no test"
+
+
+def route_matches(route_path: str, url: str) -> bool:
+    route_parts, url_parts = route_path.strip("/").split("/"), url.strip("/").split("/")
+    return len(route_parts) == len(url_parts) and all(
+        r == u or r.startswith("{") for r, u in zip(route_parts, url_parts)
+    )
+
+
+def over_budget_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/two-queries")
+    @query_budget(1)
+    def two_queries():
+        db = SessionLocal()
+        try:
+            db.execute(text("SELECT 1"))
+            db.execute(text("SELECT 2"))
+        finally:
+            db.close()
+        return {}
+
+    @app.get("/undeclared")
+    def undeclared():
+        return {}
+
+    return app
+
+
+def test_over_budget_route_fails():
+    client = TestClient(over_budget_app())
+    with pytest.raises(QueryBudgetExceeded, match=r"issued 2 queries, budget is 1"):
+        assert_query_budget(client, "GET", "/two-queries")
+
+
+def test_route_without_budget_fails():
+    client = TestClient(over_budget_app())
+    with pytest.raises(QueryBudgetExceeded, match="No query budget declared"):
+        assert_query_budget(client, "GET", "/undeclared")
@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta, timezone
+from app.config import settings
+from app.database.connection import SessionLocal, engine
+from app.database.models import StoryUserMatch, User
+from app.database.retention import _expired_anonymous_users
+from app.profile.services import UserService
+
+
+def anonymous_user_with_a_match(age_days: int) -> int:
+    """An anonymous user created age_days ago whose only data is one story match"""
+    created = datetime.now(timezone.utc) - timedelta(days=age_days)
+    db = SessionLocal()
+    user = User(is_anonymous=True, is_active=True, created_at=created, updated_at=created)
+    db.add(user)
+    db.flush()
+    db.add(StoryUserMatch(
+        story_id=1, user_id=user.id, user_name_in_story="u", progress=0, intimacy=0, created_at=created
+    ))
+    db.commit()
+    user_id = user.id
+    db.close()
+    return user_id
+
+
+def expired_anonymous_user_ids(after_id: int) -> list:
+    with engine.begin() as conn:
+        return _expired_anonymous_users(conn, after_id, 100, datetime.now(timezone.utc))
+
+
+def test_refreshing_keeps_a_stateless_anonymous_user():
+    age = settings.anonymous_user_retention_days + 10
+    idle = anonymous_user_with_a_match(age)
+    refreshing = anonymous_user_with_a_match(age)
+
+    db = SessionLocal()
+    UserService(db).touch_anonymous_user(refreshing)
+    db.close()
+
+    assert expired_anonymous_user_ids(idle - 1) == [idle]
+    db = SessionLocal()
+    assert db.get(User, idle) is None
+    assert db.get(User, refreshing) is not None
+    assert db.query(StoryUserMatch).filter(StoryUserMatch.user_id == idle).count() == 0
+    db.close()
@@ -0,0 +1,11 @@
+import pytest
+from fastapi.testclient import TestClient
+from tests.conftest import CHARACTER_COUNT
+
+
+@pytest.mark.parametrize("path, key", [("/characters/by-tags", "characters"), ("/stories/by-tags", "stories")])
+def test_tag_filters_normalize_like_stored_tags(app, path, key):
+    with TestClient(app) as client:
+        response = client.get(path, params={"tags": [" tag0", "tag1 ", "tag0"], "match": "all", "limit": 50})
+    assert response.status_code == 200
+    assert len(response.json()[key]) == CHARACTER_COUNT
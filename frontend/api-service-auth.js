@@ -1,6 +1,7 @@
 class ApiService {
     constructor() {
         this.baseURL = 'http://localhost:8000';
+        this.refreshPromise = null;
     }
 
     getAuthHeaders() {
@@ -8,7 +9,17 @@ class ApiService {
         return token ? { 'Authorization': `Bearer ${token}` } : {};
     }
 
-    async refreshToken() {
+    refreshToken() {
+        // 동시에 401을 받은 요청들이 같은 갱신 요청을 공유 (refresh_token은 한 번만 교체)
+        if (!this.refreshPromise) {
+            this.refreshPromise = this.requestTokenRefresh().finally(() => {
+                this.refreshPromise = null;
+            });
+        }
+        return this.refreshPromise;
+    }
+
+    async requestTokenRefresh() {
         const refreshToken = localStorage.getItem('refresh_token');
         if (!refreshToken) return false;
 
@@ -22,6 +33,8 @@ class ApiService {
             if (response.ok) {
                 const tokens = await response.json();
                 localStorage.setItem('access_token', tokens.access_token);
+                // 리프레시 토큰은 매번 교체되므로 새 토큰을 저장해야 다음 갱신이 가능
+                localStorage.setItem('refresh_token', tokens.refresh_token);
                 return true;
             }
         } catch (error) {
@@ -112,8 +125,12 @@ class ApiService {
     }
 
     // 캐릭터 관련 API
-    async getCharacters() {
-        const response = await this.apiCall('/characters/');
+    async getCharacters(limit = 20, cursor = null) {
+        const params = new URLSearchParams({ limit: limit });
+        if (cursor) {
+            params.append('cursor', cursor);
+        }
+        const response = await this.apiCall(`/characters/?${params}`);
         return response.json();
     }
 